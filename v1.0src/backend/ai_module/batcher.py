@@ -0,0 +1,163 @@
+# 마이크로 배칭 추론 큐
+# 동시에 들어온 예측 요청을 짧은 시간(window) 동안 모아서 (B, 24, 10) 텐서 하나로 쌓고
+# model 호출 1회로 처리한 뒤, 각 호출자에게 자신의 (24, 3) 슬라이스를 돌려줌.
+# lease 를 주면 배치를 새 배열로 쌓지 않고 빌린 버퍼(워커 풀의 공유 메모리 슬롯)에 바로 쌓아서 실행함.
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ("x", "future", "enqueued_at")
+
+    def __init__(self, x):
+        self.x = x
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+
+    def __init__(self, run_batch, window_ms=10.0, max_batch_size=32, max_in_flight=1, lease=None, lease_rows=0):
+        # run_batch: (B, 24, 10) ndarray -> (B, 24, 3) ndarray 또는 ((B, 24, 3), tag)
+        # max_in_flight > 1 이면 이전 배치의 추론이 끝나기 전에 다음 배치를 보냄 (워커 프로세스 풀)
+        # lease: 입력 버퍼 대여 (with lease() as l: l.inputs[:B] = ...; l.run(B) -> ((B, 24, 3), tag)), 예: PredictorPool.lease
+        #        배치가 lease_rows 행 이하이면 run_batch 대신 사용
+        self.run_batch = run_batch
+        self.lease = lease
+        self.lease_rows = lease_rows
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = None
+        if self.max_in_flight > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ai-batch")
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "max_batch_size_seen": 0,
+            "last_batch_size": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "errors": 0,
+            "in_flight": 0,
+        }
+
+        self._thread = threading.Thread(target=self._loop, name="ai-micro-batcher", daemon=True)
+        self._thread.start()
+
+    # 1) 요청 제출: x (24, 10) -> (24, 3), 배치 처리 완료까지 대기
+    def submit(self, x, timeout=None):
+        return self.submit_async(x).result(timeout=timeout)
+
+    def submit_async(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 3:
+            x = x[0]
+
+        req = _Request(x)
+        with self._stats_lock:
+            self._stats["requests"] += 1
+        self._queue.put(req)
+        return req.future
+
+    # 2) 배치 수집 루프 (전용 스레드)
+    def _loop(self):
+        while True:
+            # 보낼 수 있는 슬롯이 생길 때까지 대기 (그동안 들어온 요청은 큐에 쌓여 다음 배치가 됨)
+            self._slots.acquire()
+
+            first = self._queue.get()
+            batch = [first]
+            deadline = first.enqueued_at + self.window
+
+            # window 가 끝나거나 max_batch_size 에 도달할 때까지 수집
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # window 가 지났어도 이미 대기 중인 요청은 함께 처리
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._executor is None:
+                self._run_in_slot(batch)
+            else:
+                self._executor.submit(self._run_in_slot, batch)
+
+    def _run_in_slot(self, batch):
+        with self._stats_lock:
+            self._stats["in_flight"] += 1
+        try:
+            self._run(batch)
+        finally:
+            with self._stats_lock:
+                self._stats["in_flight"] -= 1
+            self._slots.release()
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        waits = [(started - r.enqueued_at) * 1000.0 for r in batch]
+
+        with self._stats_lock:
+            s = self._stats
+            s["batches"] += 1
+            s["batched_items"] += len(batch)
+            s["last_batch_size"] = len(batch)
+            s["max_batch_size_seen"] = max(s["max_batch_size_seen"], len(batch))
+            s["wait_ms_total"] += sum(waits)
+            s["wait_ms_max"] = max(s["wait_ms_max"], max(waits))
+
+        try:
+            if self.lease is not None and len(batch) <= self.lease_rows:
+                with self.lease() as lease:
+                    # 요청 행을 빌린 버퍼에 바로 쌓음 (중간 (B, 24, 10) 배열 없음)
+                    np.stack([r.x for r in batch], out=lease.inputs[:len(batch)])
+                    out = lease.run(len(batch))
+            else:
+                X = np.stack([r.x for r in batch])  # (B, 24, 10)
+                out = self.run_batch(X)             # (B, 24, 3)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            for r in batch:
+                r.future.set_exception(e)
+            return
+
+        # run_batch 가 (out, tag) 를 반환하면 tag (예: 모델 버전) 를 각 future 에 기록
+        tag = None
+        if isinstance(out, tuple):
+            out, tag = out
+
+        infer_ms = (time.perf_counter() - started) * 1000.0
+        for i, r in enumerate(batch):
+            # 호출자의 단계별 시간 측정용 (queue_wait / inference)
+            r.future.wait_ms = waits[i]
+            r.future.infer_ms = infer_ms
+            r.future.tag = tag
+            r.future.set_result(out[i])
+
+    # 3) 튜닝용 카운터 (queue depth / batch size / wait time)
+    def stats(self):
+        with self._stats_lock:
+            s = dict(self._stats)
+
+        s["queue_depth"] = self._queue.qsize()
+        s["window_ms"] = self.window * 1000.0
+        s["max_batch_size"] = self.max_batch_size
+        s["max_in_flight"] = self.max_in_flight
+        s["avg_batch_size"] = round(s["batched_items"] / s["batches"], 2) if s["batches"] else 0.0
+        s["avg_wait_ms"] = round(s["wait_ms_total"] / s["batched_items"], 3) if s["batched_items"] else 0.0
+        return s
@@ -0,0 +1,201 @@
+# NumPy 피처 인코더(features.py) 와 기존 pandas 구현의 결과 비교
+# 사용법: python3 ai_module/check_features.py [--cases 500] [--seed 0]
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.utils import EMOTION_TO_INT, STATUS_TO_INT
+from ai_module.features import encode_features, encode_features_batch
+
+def process_input_data_pandas(json_data):
+    # 기존 predict.py 의 pandas 구현 (비교 기준, 수정하지 말 것)
+    seq_list = json_data.get('seq_data', [])
+    current_emotion = json_data.get('emotion', 'NORMAL')
+    current_status = json_data.get('status', 'FREE')
+    
+    if not seq_list: return None
+        
+    df = pd.DataFrame(seq_list)
+    
+    if 'start_time' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['start_time'])
+    elif 'usage_date' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['usage_date'])
+    else:
+        return None
+        
+    df['duration'] = df['duration_ms'] / 1000.0
+    
+    def map_cat(c):
+        c = str(c).lower()
+        if 'sns' in c: return 'SNS'
+        if 'game' in c: return 'GAME'
+        return 'OTHER'
+    
+    df['feat_cat'] = df['category'].apply(map_cat)
+    df['hour_idx'] = df['timestamp'].dt.floor('h')
+    hourly = df.groupby(['hour_idx', 'feat_cat'])['duration'].sum().unstack(fill_value=0)
+    
+    for c in ['SNS', 'GAME', 'OTHER']:
+        if c not in hourly.columns: hourly[c] = 0
+            
+    hourly['total_usage'] = hourly['SNS'] + hourly['GAME'] + hourly['OTHER']
+    
+    if not hourly.empty:
+        # [수정] 00:00 ~ 23:00으로 앵커링하여 희소 데이터가 이동하거나 압축되는 것을 방지.
+        # 데이터는 대부분 하루치라고 가정 (호출자가 보장)
+        # 첫 번째 타임스탬프에서 날짜를 가져옴
+        anchor_date = hourly.index[0].date()
+        start_dt = pd.Timestamp(anchor_date)
+        end_dt = start_dt + pd.Timedelta(hours=23)
+        
+        full_idx = pd.date_range(start_dt, end_dt, freq='h')
+        hourly = hourly.reindex(full_idx, fill_value=0)
+    
+    for col in ['SNS', 'GAME', 'OTHER', 'total_usage']:
+        hourly[col] = hourly[col] / 3600.0
+        
+    hourly['hour'] = hourly.index.hour
+    hourly['dow'] = hourly.index.dayofweek
+    
+    hourly['hour_sin'] = np.sin(2 * np.pi * hourly['hour'] / 24)
+    hourly['hour_cos'] = np.cos(2 * np.pi * hourly['hour'] / 24)
+    hourly['dow_sin'] = np.sin(2 * np.pi * hourly['dow'] / 7)
+    hourly['dow_cos'] = np.cos(2 * np.pi * hourly['dow'] / 7)
+    
+    e_val = EMOTION_TO_INT.get(current_emotion, 0)
+    s_val = STATUS_TO_INT.get(current_status, 0)
+    
+    hourly['emotion_val'] = e_val
+    hourly['status_val'] = s_val
+    
+    feature_cols = ['SNS', 'GAME', 'OTHER', 'total_usage', 'emotion_val', 'status_val', 'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+    
+    SEQ_LEN = 24
+    data = hourly[feature_cols].values
+    
+    if len(data) < SEQ_LEN:
+        pad_len = SEQ_LEN - len(data)
+        pad = np.zeros((pad_len, len(feature_cols)))
+        data = np.vstack([pad, data])
+    else:
+        data = data[-SEQ_LEN:]
+        
+    meta = {}
+    
+    if not df.empty:
+        max_ts = df['timestamp'].max()
+        min_ts = df['timestamp'].min()
+        
+        # 1. 분석 날짜: 
+        # 00-24 및 08-08 패턴 모두 사용자는 "시작일 다음 날"을 직관적으로 기대함.
+        # Case A (00-24): 시작 14일 00:00 -> 종료 14일 23:00. 타겟 = 15일. (시작 + 1일)
+        # Case B (08-08): 시작 14일 08:00 -> 종료 15일 07:00. 타겟 = 15일. (시작 + 1일)
+        # 구 로직 (Max + 1): 15일 + 1 = 16일 (Case B에서 틀림).
+        # 신 로직 (Min + 1): 14일 + 1 = 15일 (둘 다 맞음).
+        target_date = (min_ts + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        meta['analysis_date'] = target_date
+        
+        # 2. 입력 유형 분류
+        start_hour = min_ts.hour
+        if 0 <= start_hour <= 2:
+            meta['input_type'] = "TYPE_ALL_DAY" # 00-24
+        elif 7 <= start_hour <= 9:
+            meta['input_type'] = "TYPE_SHIFTED_DAY" # 08-08
+        else:
+            meta['input_type'] = "TYPE_IRREGULAR"
+    else:
+        meta['analysis_date'] = "Unknown"
+        meta['input_type'] = "Unknown"
+
+    meta['min_ts'] = str(df['timestamp'].min()) if not df.empty else ""
+    meta['max_ts'] = str(df['timestamp'].max()) if not df.empty else ""
+
+    return data.reshape(1, SEQ_LEN, -1), meta
+
+
+def make_case(rng):
+    """다양한 입력 형태 생성: 00-24 / 08-08 / 불규칙 시작, 희소 데이터, usage_date 전용 입력 등"""
+    base = pd.Timestamp("2025-12-01") + pd.Timedelta(days=rng.randrange(60))
+    start_hour = rng.choice([0, 0, 8, 13, 22])
+    span_hours = rng.choice([1, 6, 24, 24, 30])
+    n_rows = rng.choice([1, 3, 20, 100, 300])
+    categories = ["SNS", "GAME", "OTHER", "sns", "Game", "etc", None]
+
+    rows = []
+    for _ in range(n_rows):
+        ts = base + pd.Timedelta(hours=start_hour) + pd.Timedelta(minutes=30 * rng.randrange(span_hours * 2))
+        rows.append({
+            "usage_date": str(ts.date()),
+            "category": rng.choice(categories),
+            "package_name": "com.example.app",
+            "duration_ms": rng.randrange(0, 1800000),
+            "start_time": str(ts),
+        })
+
+    if rng.random() < 0.1 and len(rows) > 1:
+        # start_time 이 비어 있는 행 (NaT) 포함
+        rows[0]["start_time"] = None
+    elif rng.random() < 0.1:
+        # start_time 없이 usage_date 만 있는 입력
+        for r in rows:
+            del r["start_time"]
+
+    return {
+        "emotion": rng.choice(list(EMOTION_TO_INT) + ["UNKNOWN"]),
+        "status": rng.choice(list(STATUS_TO_INT)),
+        "seq_data": rows,
+    }
+
+
+def check(cases=500, seed=0):
+    rng = random.Random(seed)
+    inputs = [make_case(rng) for _ in range(cases)]
+
+    t0 = time.perf_counter()
+    expected = [process_input_data_pandas(d) for d in inputs]
+    t_pandas = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    single = [encode_features(d) for d in inputs]
+    t_numpy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    X_batch, metas = encode_features_batch(inputs)
+    t_batch = time.perf_counter() - t0
+
+    failures = 0
+    for i, (exp, got) in enumerate(zip(expected, single)):
+        X_exp, meta_exp = exp
+        X_got, meta_got = got
+
+        ok = (
+            np.allclose(X_exp, X_got, atol=1e-6)
+            and meta_exp == meta_got
+            and np.allclose(X_got[0], X_batch[i], atol=0)
+            and metas[i] == meta_got
+        )
+        if not ok:
+            failures += 1
+            print(f"[MISMATCH] case {i}: max|dX|={np.abs(X_exp - X_got).max():.2e} meta={meta_exp} vs {meta_got}")
+
+    print(f"cases={cases} failures={failures}")
+    print(f"pandas: {t_pandas * 1000 / cases:.3f} ms/case, numpy: {t_numpy * 1000 / cases:.3f} ms/case, "
+          f"numpy batch: {t_batch * 1000 / cases:.3f} ms/case")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy feature encoder parity check")
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sys.exit(0 if check(args.cases, args.seed) else 1)
@@ -0,0 +1,152 @@
+# 컬럼 단위 로더(preprocessing.py) 와 기존 행 단위 구현의 결과 / 속도 비교
+# 기본 대상은 app_usage 파일이 가장 큰 사용자
+# 사용법: python3 ai_module/check_preprocessing.py [--user u00] [--repeat 3]
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import pandas as pd
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.utils import DATASET_ROOT, PAM_MAPPING, CATEGORY_MAP
+from ai_module import preprocessing
+
+
+# 기존 구현 (비교 기준, 수정하지 말 것)
+def load_app_usage_rowwise(user_id):
+    path = os.path.join(DATASET_ROOT, "app_usage", f"running_app_{user_id}.csv")
+    if not os.path.exists(path):
+        return None
+
+    df = pd.read_csv(path)
+    df = df[['timestamp', 'RUNNING_TASKS_topActivity_mPackage']]
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    df = df.sort_values('timestamp')
+
+    df['next_ts'] = df['timestamp'].shift(-1)
+    df['duration'] = (df['next_ts'] - df['timestamp']).dt.total_seconds()
+    df['duration'] = df['duration'].fillna(0)
+    df.loc[df['duration'] > 3600, 'duration'] = 3600
+
+    def map_category(pkg):
+        if pd.isna(pkg): return "OTHER"
+        if pkg in CATEGORY_MAP:
+            return CATEGORY_MAP[pkg]
+        pkg_lower = pkg.lower()
+        if 'facebook' in pkg_lower or 'twitter' in pkg_lower or 'social' in pkg_lower or 'instagram' in pkg_lower:
+            return "SNS"
+        if 'game' in pkg_lower or 'angrybirds' in pkg_lower or 'candycrush' in pkg_lower:
+            return "GAME"
+        return "OTHER"
+
+    df['category'] = df['RUNNING_TASKS_topActivity_mPackage'].apply(map_category)
+    df['hour_idx'] = df['timestamp'].dt.floor('h')
+
+    hourly = df.groupby(['hour_idx', 'category'])['duration'].sum().unstack(fill_value=0)
+    for col in ['SNS', 'GAME', 'OTHER']:
+        if col not in hourly.columns:
+            hourly[col] = 0
+
+    hourly['total_usage'] = hourly['SNS'] + hourly['GAME'] + hourly['OTHER']
+    return hourly
+
+
+def load_ema_rowwise(user_id):
+    path = os.path.join(DATASET_ROOT, "EMA/response/PAM", f"PAM_{user_id}.json")
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    rows = []
+    for item in data:
+        pid = item.get('picture_idx')
+        ts = item.get('resp_time')
+        if pid and ts:
+            emotion_label = PAM_MAPPING.get(int(pid), 'NORMAL')
+            rows.append({'timestamp': pd.to_datetime(ts, unit='s'), 'emotion': emotion_label})
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return None
+
+    df['hour_idx'] = df['timestamp'].dt.floor('h')
+    return df.groupby('hour_idx').last()['emotion']
+
+
+def load_calendar_rowwise(user_id):
+    path = os.path.join(DATASET_ROOT, "calendar", f"calendar_{user_id}.csv")
+    if not os.path.exists(path):
+        return None
+
+    df = pd.read_csv(path)
+    df['start_time'] = df.apply(
+        lambda row: pd.to_datetime(f"{row['DATE']} {row['TIME']}", format='mixed', errors='coerce'), axis=1
+    )
+    df = df.dropna(subset=['start_time'])
+    df['hour_idx'] = df['start_time'].dt.floor('h')
+    df['status'] = 'BUSY'
+    return df.groupby('hour_idx').first()['status']
+
+
+def largest_user():
+    files = glob.glob(os.path.join(DATASET_ROOT, "app_usage", "running_app_*.csv"))
+    if not files:
+        return None
+    return os.path.basename(max(files, key=os.path.getsize)).split('_')[2].replace('.csv', '')
+
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    if isinstance(a, pd.DataFrame):
+        return a.sort_index(axis=1).equals(b.sort_index(axis=1))
+    return a.equals(b)
+
+
+def _time(fn, user_id, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(user_id)
+        best = min(best, time.perf_counter() - t0)
+    return result, best * 1000
+
+
+def check(user_id, repeat=3):
+    pairs = [
+        ("app_usage", load_app_usage_rowwise, preprocessing.load_app_usage),
+        ("ema", load_ema_rowwise, preprocessing.load_ema),
+        ("calendar", load_calendar_rowwise, preprocessing.load_calendar),
+    ]
+
+    ok = True
+    for name, old, new in pairs:
+        expected, t_old = _time(old, user_id, repeat)
+        got, t_new = _time(new, user_id, repeat)
+        same = _same(expected, got)
+        ok &= same
+        rows = 0 if got is None else len(got)
+        print(f"{name:10s} rows={rows:6d} same={same} row-wise: {t_old:8.1f} ms, column-wise: {t_new:8.1f} ms "
+              f"(x{t_old / max(t_new, 1e-6):.1f})")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Column-wise preprocessing loaders parity / benchmark")
+    parser.add_argument("--user", default=None, help="Default: user with the largest app_usage file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    user_id = args.user or largest_user()
+    if user_id is None:
+        print(f">>> [Error] No app_usage files under {DATASET_ROOT}", flush=True)
+        sys.exit(1)
+
+    print(f"user={user_id}")
+    sys.exit(0 if check(user_id, args.repeat) else 1)
@@ -0,0 +1,80 @@
+# 사용자별 GRU encoder 상태 캐시 (긴 입력 창의 앞부분 재사용)
+# 모델을 --seq-len 168 (7일) 등으로 학습하면 매 예측마다 168 스텝을 실행해야 함.
+# 입력 창에서 어제를 뺀 앞부분(창의 첫날 ~ 그저께)을 0 상태에서 인코딩한 hidden state (64,) 를 저장해두고,
+# 같은 창의 예측은 어제 24 스텝만 이어서 실행.
+# - 증분 캐시가 아님: 날짜가 바뀌면 창이 하루 밀리므로 새 창의 앞부분을 처음부터 다시 인코딩
+#   (GRU 상태에서 가장 오래된 날을 뺄 수 없고, 학습과 같은 창 길이를 지켜야 전체 재계산과 결과가 같음)
+# - 이전 날짜는 그날 기록된 기분/상태로 인코딩 (학습 데이터처럼) -> 오늘 기분이 바뀌어도 상태는 그대로
+#   키: user -> {(model_version, 상태가 포함하는 마지막 날짜): h}
+# - 재사용되는 경우: 같은 날의 반복 예측 / 기분 변경 / 어제 사용 기록 갱신 / 여러 날 예측(outlook)
+# - 사용자당 최근 AI_ENCODER_STATE_PER_USER 개만 보관, 사용자 수는 AI_ENCODER_STATE_USERS 개까지 (LRU)
+# - 과거 날짜의 사용 기록이 바뀌면 invalidate(user, since) 로 그 날짜 이후를 포함하는 상태 제거
+# - 이어서 인코딩(encode(X, h0))이 가능한 numpy 백엔드의 in-process Predictor 에서만 사용 (predictor.context_days)
+import os
+import threading
+from collections import OrderedDict
+
+AI_ENCODER_STATE_USERS = int(os.getenv("AI_ENCODER_STATE_USERS", "10000"))
+AI_ENCODER_STATE_PER_USER = int(os.getenv("AI_ENCODER_STATE_PER_USER", "2"))
+
+
+class EncoderStateCache:
+
+    def __init__(self, max_users=AI_ENCODER_STATE_USERS, per_user=AI_ENCODER_STATE_PER_USER):
+        self.max_users = max_users
+        self.per_user = max(1, per_user)
+        self._states = OrderedDict()  # user -> {(model_version, through_date): h}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    # 1) 같은 모델 버전으로 through_date 까지 인코딩한 상태 -> h 또는 None
+    def get(self, user, version, through_date):
+        with self._lock:
+            h = (self._states.get(user) or {}).get((version, through_date))
+            if h is None:
+                self._stats["misses"] += 1
+                return None
+            self._states.move_to_end(user)
+            self._stats["hits"] += 1
+            return h
+
+    # 2) 저장 (다른 모델 버전 / 오래된 날짜의 상태부터 밀려남)
+    def put(self, user, version, through_date, h):
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            states = self._states.setdefault(user, {})
+            states[(version, through_date)] = h
+            for key in sorted(states, key=lambda k: (k[0] == version, k[1]))[:-self.per_user]:
+                del states[key]
+            self._states.move_to_end(user)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+
+    # 3) since 날짜 이후의 사용 기록이 바뀜 -> 그 날짜를 포함하는 상태 제거
+    def invalidate(self, user, since=None):
+        with self._lock:
+            states = self._states.get(user)
+            if not states:
+                return
+            for key in [k for k in states if since is None or k[1] >= since]:
+                del states[key]
+                self._stats["invalidated"] += 1
+            if not states:
+                del self._states[user]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, users=len(self._states), max_users=self.max_users)
+
+
+class UserHistory:
+    """Predictor.predict(history=...) 인자: 이전 날짜 입력을 필요할 때만 조회하기 위한 정보"""
+
+    def __init__(self, user, through_date, fetch):
+        self.user = user
+        # 예측 입력(어제) 바로 전날 = 캐시 상태가 포함해야 하는 마지막 날짜
+        self.through_date = through_date
+        # fetch(start, end) -> start~end 날짜별 입력 dict 목록 (날짜 순, 기록이 없는 날은 seq_data=[])
+        # 각 dict 의 emotion/status 는 그날 기록된 기분/상태
+        self.fetch = fetch
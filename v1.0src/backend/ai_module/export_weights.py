@@ -0,0 +1,184 @@
+# risk_gru.keras -> risk_gru.npz 가중치 추출
+# API 워커는 .npz 와 np_model.py 만으로 추론하므로 TensorFlow import 가 필요 없음.
+# .keras 파일은 zip(config.json + model.weights.h5) 이므로 h5py 만으로 가중치를 읽을 수 있음.
+# .npz 에는 원본 .keras 의 sha1 (source_sha1) 을 함께 기록 -> predictor.resolve_backend 가 같은 모델에서 추출한 것인지 확인
+#
+# 사용법:
+#   python3 ai_module/export_weights.py                       # 기본 모델 추출
+#   python3 ai_module/export_weights.py --verify              # TF model.predict 와 결과 비교
+#   python3 ai_module/export_weights.py --precision int8 --out saved_models/risk_gru_int8.npz
+import os
+import sys
+import io
+import json
+import hashlib
+import time
+import zipfile
+import argparse
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.np_model import NumpyRiskModel, PRECISIONS, quantize_weights
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "saved_models", "risk_gru.keras")
+NPZ_PATH = os.path.join(os.path.dirname(__file__), "saved_models", "risk_gru.npz")
+
+
+# 파일 내용 digest: (경로, 크기, mtime) 이 같으면 다시 읽지 않음
+_sha1_cache = {}
+
+
+def file_sha1(path):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _sha1_cache.get(key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        if len(_sha1_cache) >= 64:
+            _sha1_cache.clear()
+        _sha1_cache[key] = digest
+    return digest
+
+
+# .npz 를 추출한 원본 .keras 의 sha1 (이전 .npz 는 None)
+def npz_source_sha1(npz_path):
+    with np.load(npz_path) as data:
+        return str(data["source_sha1"]) if "source_sha1" in data.files else None
+
+
+def _layer_sort_key(name):
+    # gru, gru_1, gru_2 ... 순서 (생성 순서)
+    base, _, suffix = name.partition("_")
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _check_config(config):
+    # np_model.py 가 재현하는 구조인지 확인
+    layers = config["config"]["layers"]
+    grus = [l for l in layers if l["class_name"] == "GRU"]
+    if len(grus) != 2:
+        raise ValueError(f"Expected 2 GRU layers, found {len(grus)}")
+    for l in grus:
+        c = l["config"]
+        if not c.get("reset_after", True) or c.get("activation") != "tanh" or c.get("recurrent_activation") != "sigmoid":
+            raise ValueError(f"Unsupported GRU config: {l['config'].get('name')}")
+
+    # 입력 길이 (시간 단위 스텝), 출력 길이
+    inputs = [l for l in layers if l["class_name"] == "InputLayer"]
+    shape = (inputs[0]["config"].get("batch_shape") or inputs[0]["config"].get("batch_input_shape")) if inputs else None
+    input_steps = int(shape[1]) if shape and shape[1] else 24
+
+    repeat = [l for l in layers if l["class_name"] == "RepeatVector"]
+    return input_steps, (int(repeat[0]["config"]["n"]) if repeat else 24)
+
+
+def read_keras_weights(model_path=MODEL_PATH):
+    import h5py
+
+    with zipfile.ZipFile(model_path) as zf:
+        config = json.loads(zf.read("config.json"))
+        weights_bytes = zf.read("model.weights.h5")
+
+    input_steps, output_steps = _check_config(config)
+
+    with h5py.File(io.BytesIO(weights_bytes), "r") as f:
+        layers = f["layers"]
+        gru_names = sorted([n for n in layers if "cell" in layers[n]], key=_layer_sort_key)
+        dense_names = [n for n in layers if n.startswith("time_distributed")]
+
+        enc = layers[gru_names[0]]["cell"]["vars"]
+        dec = layers[gru_names[1]]["cell"]["vars"]
+        dense = layers[dense_names[0]]["layer"]["vars"]
+
+        return {
+            "encoder_kernel": enc["0"][()],
+            "encoder_recurrent_kernel": enc["1"][()],
+            "encoder_bias": enc["2"][()],
+            "decoder_kernel": dec["0"][()],
+            "decoder_recurrent_kernel": dec["1"][()],
+            "decoder_bias": dec["2"][()],
+            "dense_kernel": dense["0"][()],
+            "dense_bias": dense["1"][()],
+            "input_steps": np.array(input_steps),
+            "output_steps": np.array(output_steps),
+        }
+
+
+def export(model_path=MODEL_PATH, npz_path=NPZ_PATH, precision="float32"):
+    weights = quantize_weights(read_keras_weights(model_path), precision)
+    weights["source_sha1"] = np.array(file_sha1(model_path))
+
+    # 쓰는 도중 읽히지 않도록 임시 파일에 쓰고 교체
+    tmp_path = npz_path + ".tmp.npz"
+    np.savez(tmp_path, **weights)
+    os.replace(tmp_path, npz_path)
+
+    size_kb = os.path.getsize(npz_path) / 1024
+    print(f">>> [EXPORT] {model_path} -> {npz_path} ({precision}, {size_kb:.1f} KB)", flush=True)
+    return npz_path
+
+
+def sample_inputs(n=256, seq_len=24, seed=0):
+    # 실제 입력 범위와 비슷한 무작위 입력 (사용량 0~1, 감정 -1/0/1, 상태 0/1, 주기 피처)
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n, seq_len, 10), dtype=np.float32)
+    X[:, :, 0:3] = rng.random((n, seq_len, 3)) * rng.random((n, 1, 1))
+    X[:, :, 3] = X[:, :, 0:3].sum(axis=2)
+    X[:, :, 4] = rng.integers(-1, 2, (n, 1))
+    X[:, :, 5] = rng.integers(0, 2, (n, 1))
+    hours = np.arange(seq_len) % 24
+    X[:, :, 6] = np.sin(2 * np.pi * hours / 24)
+    X[:, :, 7] = np.cos(2 * np.pi * hours / 24)
+    dow = rng.integers(0, 7, (n, 1))
+    X[:, :, 8] = np.sin(2 * np.pi * dow / 7)
+    X[:, :, 9] = np.cos(2 * np.pi * dow / 7)
+    return X
+
+
+def verify(model_path=MODEL_PATH, npz_path=NPZ_PATH, n=256, atol=1e-4):
+    from ai_module.predict import load_tensorflow
+    tf = load_tensorflow()
+
+    np_model = NumpyRiskModel.load(npz_path)
+    X = sample_inputs(n, seq_len=np_model.input_steps)
+    keras_model = tf.keras.models.load_model(model_path)
+
+    expected = keras_model.predict(X, verbose=0)
+    got = np_model.predict(X)
+    max_diff = float(np.abs(expected - got).max())
+
+    # 단건 지연 시간 비교
+    x1 = X[:1]
+    keras_model.predict_on_batch(x1)
+    t0 = time.perf_counter()
+    for _ in range(20):
+        keras_model.predict_on_batch(x1)
+    t_keras = (time.perf_counter() - t0) / 20 * 1000
+
+    t0 = time.perf_counter()
+    for _ in range(20):
+        np_model.predict(x1)
+    t_numpy = (time.perf_counter() - t0) / 20 * 1000
+
+    print(f">>> [VERIFY] samples={n} max|keras - numpy|={max_diff:.2e} (atol={atol})", flush=True)
+    print(f">>> [VERIFY] batch=1 latency: keras {t_keras:.2f} ms, numpy {t_numpy:.2f} ms", flush=True)
+    return max_diff <= atol
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export risk_gru.keras weights to .npz for NumPy inference")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=NPZ_PATH)
+    parser.add_argument("--precision", default="float32", choices=PRECISIONS, help="Weight storage / inference precision")
+    parser.add_argument("--verify", action="store_true", help="Compare against TF model.predict (requires TensorFlow)")
+    args = parser.parse_args()
+
+    export(args.model, args.out, args.precision)
+    if args.verify:
+        sys.exit(0 if verify(args.model, args.out) else 1)
@@ -0,0 +1,219 @@
+# NumPy 피처 인코더
+# process_input_data 의 pandas 파이프라인(DataFrame -> apply -> groupby/unstack -> reindex)을 대체.
+# 입력 행을 (시간, 카테고리) 칸에 바로 누적하여 (24, 10) 텐서와 meta 를 만듦.
+# 결과는 기존 pandas 구현과 동일함 (tests/test_features.py, 속도 비교는 check_features.py).
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.utils import EMOTION_TO_INT, STATUS_TO_INT
+
+SEQ_LEN = 24
+FEATURE_COLS = ['SNS', 'GAME', 'OTHER', 'total_usage', 'emotion_val', 'status_val', 'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+CATEGORIES = ['SNS', 'GAME', 'OTHER']
+
+# 주기 피처는 미리 계산 (hour: 0~23, dow: 0~6)
+_HOURS = np.arange(24)
+HOUR_SIN = np.sin(2 * np.pi * _HOURS / 24)
+HOUR_COS = np.cos(2 * np.pi * _HOURS / 24)
+_DOWS = np.arange(7)
+DOW_SIN = np.sin(2 * np.pi * _DOWS / 7)
+DOW_COS = np.cos(2 * np.pi * _DOWS / 7)
+
+_US_PER_HOUR = 3600 * 1000 * 1000
+_US_PER_DAY = 24 * _US_PER_HOUR
+
+# category 문자열 -> 0:SNS, 1:GAME, 2:OTHER (고유 값마다 1회만 계산)
+_category_index_cache = {}
+
+
+def category_index(c):
+    idx = _category_index_cache.get(c)
+    if idx is None:
+        s = str(c).lower()
+        if 'sns' in s:
+            idx = 0
+        elif 'game' in s:
+            idx = 1
+        else:
+            idx = 2
+        if len(_category_index_cache) < 10000:
+            _category_index_cache[c] = idx
+    return idx
+
+
+def _parse_timestamps(values):
+    # 문자열 목록 -> datetime64[us] (None 은 NaT)
+    try:
+        return np.array(values, dtype='datetime64[us]')
+    except ValueError:
+        parsed = []
+        for v in values:
+            try:
+                parsed.append(np.datetime64(datetime.fromisoformat(str(v)), 'us') if v is not None else np.datetime64('NaT'))
+            except ValueError:
+                parsed.append(np.datetime64('NaT'))
+        return np.array(parsed, dtype='datetime64[us]')
+
+
+def _build_meta(min_us, max_us):
+    min_ts = datetime(1970, 1, 1) + timedelta(microseconds=int(min_us))
+    max_ts = datetime(1970, 1, 1) + timedelta(microseconds=int(max_us))
+
+    meta = {}
+    # 1. 분석 날짜: 시작일 다음 날 (00-24, 08-08 패턴 모두 Min + 1)
+    meta['analysis_date'] = (min_ts + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    # 2. 입력 유형 분류
+    start_hour = min_ts.hour
+    if 0 <= start_hour <= 2:
+        meta['input_type'] = "TYPE_ALL_DAY" # 00-24
+    elif 7 <= start_hour <= 9:
+        meta['input_type'] = "TYPE_SHIFTED_DAY" # 08-08
+    else:
+        meta['input_type'] = "TYPE_IRREGULAR"
+
+    meta['min_ts'] = str(min_ts)
+    meta['max_ts'] = str(max_ts)
+    return meta
+
+
+def encode_features_batch(inputs, out=None):
+    """
+    여러 사용자의 입력(JSON dict)을 한 번에 인코딩.
+    반환: X (B, 24, 10) float32, metas (입력별 meta, 데이터가 없으면 None -> 해당 X 행은 0)
+    out 을 주면 해당 버퍼에 직접 기록함.
+    """
+    B = len(inputs)
+    if out is None:
+        out = np.zeros((B, SEQ_LEN, len(FEATURE_COLS)), dtype=np.float32)
+    else:
+        out[:B] = 0
+
+    # 1) 모든 사용자의 행을 하나의 배열로 펼침
+    ts_values, user_idx, cat_idx, durations = [], [], [], []
+    for b, json_data in enumerate(inputs):
+        seq_list = json_data.get('seq_data', []) or []
+        if not seq_list:
+            continue
+
+        # 기존 구현과 동일: start_time 컬럼이 있으면 start_time, 없으면 usage_date 사용
+        if any('start_time' in row for row in seq_list):
+            ts_key = 'start_time'
+        elif any('usage_date' in row for row in seq_list):
+            ts_key = 'usage_date'
+        else:
+            continue
+
+        for row in seq_list:
+            ts_values.append(row.get(ts_key))
+            user_idx.append(b)
+            cat_idx.append(category_index(row.get('category')))
+            durations.append(row.get('duration_ms') or 0)
+
+    metas = [None] * B
+    if not ts_values:
+        return out, metas
+
+    parsed = _parse_timestamps(ts_values)
+    valid = ~np.isnat(parsed)
+    ts = parsed.astype(np.int64)[valid]  # epoch microseconds
+    user_idx = np.asarray(user_idx, dtype=np.int64)[valid]
+    cat_idx = np.asarray(cat_idx, dtype=np.int64)[valid]
+    durations = np.asarray(durations, dtype=np.float64)[valid] / 1000.0  # 초 단위
+
+    if ts.size == 0:
+        return out, metas
+
+    # 2) 사용자별 최소/최대 시각 -> 앵커 날짜 (첫 데이터 날짜의 00:00 ~ 23:00)
+    big = np.iinfo(np.int64).max
+    min_us = np.full(B, big, dtype=np.int64)
+    max_us = np.full(B, -big, dtype=np.int64)
+    np.minimum.at(min_us, user_idx, ts)
+    np.maximum.at(max_us, user_idx, ts)
+    has_data = min_us != big
+
+    anchor_us = (min_us // _US_PER_DAY) * _US_PER_DAY
+
+    # 3) (사용자, 시간, 카테고리) 칸에 사용 시간 누적 (앵커 날짜 범위 밖의 행은 제외)
+    hour_offset = (ts - anchor_us[user_idx]) // _US_PER_HOUR
+    in_day = (hour_offset >= 0) & (hour_offset < SEQ_LEN)
+    flat_idx = (user_idx[in_day] * SEQ_LEN + hour_offset[in_day]) * 3 + cat_idx[in_day]
+    usage = np.bincount(flat_idx, weights=durations[in_day], minlength=B * SEQ_LEN * 3)
+    usage = usage.reshape(B, SEQ_LEN, 3) / 3600.0
+
+    # 4) 피처 채우기
+    out[:B, :, 0:3] = usage
+    out[:B, :, 3] = usage.sum(axis=2)
+    out[:B, :, 6] = HOUR_SIN
+    out[:B, :, 7] = HOUR_COS
+
+    # 1970-01-01 은 목요일(3) -> dayofweek = (days + 3) % 7
+    dow = ((anchor_us // _US_PER_DAY) + 3) % 7
+
+    for b in np.nonzero(has_data)[0]:
+        json_data = inputs[b]
+        out[b, :, 4] = EMOTION_TO_INT.get(json_data.get('emotion', 'NORMAL'), 0)
+        out[b, :, 5] = STATUS_TO_INT.get(json_data.get('status', 'FREE'), 0)
+        out[b, :, 8] = DOW_SIN[dow[b]]
+        out[b, :, 9] = DOW_COS[dow[b]]
+        metas[b] = _build_meta(min_us[b], max_us[b])
+
+    # 데이터가 없는 행은 0 으로 유지
+    out[:B][~has_data] = 0
+    return out, metas
+
+
+def encode_days(inputs, dates):
+    """
+    연속된 날짜의 입력(날짜별 JSON dict)을 하나의 긴 시퀀스로 인코딩 (encoder_state.py 의 이전 날짜 인코딩용).
+    반환: X (1, 일 수 * 24, 10) float32
+    사용 기록이 없는 날도 학습 데이터(build_user_dataset)와 같이 사용량 0 + 시간/요일/기분 피처로 채움.
+    """
+    X, metas = encode_features_batch(inputs)
+    for b, meta in enumerate(metas):
+        if meta is not None:
+            continue
+        dow = dates[b].weekday()
+        X[b, :, 4] = EMOTION_TO_INT.get(inputs[b].get('emotion', 'NORMAL'), 0)
+        X[b, :, 5] = STATUS_TO_INT.get(inputs[b].get('status', 'FREE'), 0)
+        X[b, :, 6] = HOUR_SIN
+        X[b, :, 7] = HOUR_COS
+        X[b, :, 8] = DOW_SIN[dow]
+        X[b, :, 9] = DOW_COS[dow]
+    return X.reshape(1, len(inputs) * SEQ_LEN, len(FEATURE_COLS))
+
+
+def outlook_batch(X, meta, days):
+    """
+    여러 날 예측(outlook)용 배치: 어제 입력 (1, 24, 10) 을 days 개 복사하고 요일 피처만 하루씩 이동.
+    i 번째 행은 "입력 날짜 + i 일" 의 요일로 보고 analysis_date + i 일을 예측함.
+    반환: X (days, 24, 10), 행별 meta
+    """
+    Xb = np.repeat(X[:1], days, axis=0)
+    first = datetime.fromisoformat(meta['analysis_date'])
+    dow = (first.weekday() - 1 + np.arange(days)) % 7  # 입력 날짜 = 예측 날짜 - 1
+    Xb[:, :, 8] = DOW_SIN[dow][:, None]
+    Xb[:, :, 9] = DOW_COS[dow][:, None]
+
+    metas = []
+    for i in range(days):
+        m = dict(meta)
+        m['analysis_date'] = (first + timedelta(days=i)).strftime("%Y-%m-%d")
+        metas.append(m)
+    return Xb, metas
+
+
+def encode_features(json_data, out=None):
+    """
+    단일 입력 인코딩. process_input_data 와 동일한 반환값: (X (1, 24, 10), meta) 또는 None
+    """
+    X, metas = encode_features_batch([json_data], out=out)
+    if metas[0] is None:
+        return None
+    return X[:1], metas[0]
@@ -0,0 +1,181 @@
+# 모델 레지스트리 (버전별 디렉토리 + manifest 포인터)
+# train.py 가 서빙 중인 risk_gru.keras 를 덮어쓰지 않도록, 학습 결과는 새 버전 디렉토리에 저장하고
+# manifest.json 의 current 를 원자적으로 교체(os.replace)하여 배포함. API 워커는 manifest 를 감시하여 무중단 교체.
+#
+# 구조:
+#   saved_models/
+#     manifest.json                 {"current": "20250101-230000", "previous": "...", "promoted_at": "..."}
+#     versions/<version>/risk_gru.keras
+#     versions/<version>/risk_gru.npz           (float32, 항상 생성)
+#     versions/<version>/<AI_NPZ_NAME>          (서빙용 가중치, 예: risk_gru_int8.npz -> int8)
+#     risk_gru.keras / risk_gru.npz (레거시: manifest 가 없으면 이 파일을 사용)
+#
+# 사용법:
+#   python3 ai_module/model_registry.py list
+#   python3 ai_module/model_registry.py import saved_models/risk_gru.keras   # 기존 모델을 새 버전으로 등록 + 배포
+#   python3 ai_module/model_registry.py promote 20250101-230000              # 특정 버전으로 배포 (롤백)
+import os
+import sys
+import json
+import shutil
+import argparse
+from datetime import datetime
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.np_model import PRECISIONS
+
+REGISTRY_DIR = os.getenv("AI_MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(__file__), "saved_models"))
+MANIFEST_PATH = os.path.join(REGISTRY_DIR, "manifest.json")
+VERSIONS_DIR = os.path.join(REGISTRY_DIR, "versions")
+
+KERAS_NAME = "risk_gru.keras"
+NPZ_DEFAULT_NAME = "risk_gru.npz"
+# 저정밀도 가중치 사용 시: AI_NPZ_NAME=risk_gru_int8.npz (export_weights.py --precision, quant_eval.py 로 정확도 확인)
+# 학습 / import / promote 가 버전 디렉토리에 이 파일을 생성함 (정밀도는 AI_NPZ_PRECISION, 없으면 파일 이름의 _<precision>)
+NPZ_NAME = os.getenv("AI_NPZ_NAME", NPZ_DEFAULT_NAME)
+
+
+def npz_precision(name):
+    # risk_gru_int8.npz -> int8, risk_gru.npz -> float32
+    suffix = os.path.splitext(name)[0].rsplit("_", 1)[-1]
+    return suffix if suffix in PRECISIONS else "float32"
+
+
+NPZ_PRECISION = os.getenv("AI_NPZ_PRECISION") or npz_precision(NPZ_NAME)
+
+
+def model_file_version(model_path):
+    # 레거시 단일 파일: 파일 이름 + 수정 시각 (파일이 교체되면 버전이 바뀜)
+    try:
+        return f"{os.path.basename(model_path)}@{int(os.path.getmtime(model_path))}"
+    except OSError:
+        return "missing"
+
+
+def version_dir(version):
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def list_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(v for v in os.listdir(VERSIONS_DIR) if os.path.isdir(version_dir(v)))
+
+
+# 1) 새 버전 디렉토리 생성 (학습 결과 저장 위치)
+def create_version(version=None):
+    version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = version_dir(version)
+
+    suffix = 1
+    while os.path.exists(path):
+        path = version_dir(f"{version}-{suffix}")
+        suffix += 1
+
+    os.makedirs(path)
+    return os.path.basename(path), path
+
+
+# 버전 디렉토리의 .keras -> NumPy 추론용 가중치: risk_gru.npz (float32) + 서빙용 NPZ_NAME (NPZ_PRECISION)
+# missing_only=True 이면 없는 파일만 생성 (이전에 다른 AI_NPZ_NAME 으로 만든 버전을 배포할 때)
+def export_npz(version_path, missing_only=False):
+    from ai_module.export_weights import export
+
+    keras_path = os.path.join(version_path, KERAS_NAME)
+    variants = {NPZ_DEFAULT_NAME: "float32", NPZ_NAME: NPZ_PRECISION}
+    for name, precision in variants.items():
+        npz_path = os.path.join(version_path, name)
+        if missing_only and os.path.exists(npz_path):
+            continue
+        export(keras_path, npz_path, precision)
+
+
+def read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def manifest_mtime():
+    try:
+        return os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+# 2) 배포: manifest 를 임시 파일에 쓰고 os.replace 로 교체 (읽는 쪽은 항상 완전한 파일만 봄)
+def promote(version):
+    path = version_dir(version)
+    if not os.path.exists(os.path.join(path, KERAS_NAME)):
+        raise FileNotFoundError(f"Model not found in version {version}: {path}")
+    # 서빙용 .npz 가 없으면 API 가 keras 백엔드로 바뀌므로 배포 전에 생성
+    export_npz(path, missing_only=True)
+
+    current = read_manifest() or {}
+    manifest = {
+        "current": version,
+        "previous": current.get("current"),
+        "promoted_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, MANIFEST_PATH)
+
+    print(f">>> [REGISTRY] Promoted {version} (previous: {manifest['previous']})", flush=True)
+    return manifest
+
+
+# 3) 현재 배포 버전: (version, keras_path, npz_path)
+def resolve_current():
+    manifest = read_manifest()
+    if manifest and manifest.get("current"):
+        version = manifest["current"]
+        path = version_dir(version)
+        return version, os.path.join(path, KERAS_NAME), os.path.join(path, NPZ_NAME)
+
+    # manifest 가 없으면 레거시 단일 파일
+    keras_path = os.path.join(REGISTRY_DIR, KERAS_NAME)
+    npz_path = os.path.join(REGISTRY_DIR, NPZ_NAME)
+    return model_file_version(keras_path), keras_path, npz_path
+
+
+# 4) 기존 .keras 파일을 새 버전으로 등록 (.npz 도 함께 추출) 후 배포
+def import_model(keras_path, version=None, promote_now=True):
+    version, path = create_version(version)
+    shutil.copy2(keras_path, os.path.join(path, KERAS_NAME))
+    export_npz(path)
+
+    if promote_now:
+        promote(version)
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="risk_gru model registry")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    p_import = sub.add_parser("import")
+    p_import.add_argument("keras_path")
+    p_import.add_argument("--no-promote", action="store_true")
+    p_promote = sub.add_parser("promote")
+    p_promote.add_argument("version")
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        current = (read_manifest() or {}).get("current")
+        for v in list_versions():
+            print(f"{'*' if v == current else ' '} {v}")
+        if current is None:
+            print(f"(no manifest, legacy model: {resolve_current()[1]})")
+    elif args.cmd == "import":
+        import_model(args.keras_path, promote_now=not args.no_promote)
+    elif args.cmd == "promote":
+        promote(args.version)
@@ -0,0 +1,151 @@
+# TensorFlow 없이 동작하는 NumPy 추론 엔진
+# model.py:build_model 의 구조를 그대로 재현: GRU(64) -> RepeatVector(24) -> GRU(64, seq) -> TimeDistributed(Dense(3, sigmoid))
+# Dropout 은 추론 시 항등 함수이므로 생략.
+# 가중치는 export_weights.py 로 risk_gru.keras 에서 추출한 .npz 를 사용.
+#
+# 정밀도 (export_weights.py --precision)
+# - float32: 기본
+# - float16: 가중치를 float16 으로 저장 (파일/로드 크기 절반), 연산은 float32
+# - int8   : 행렬 가중치를 출력 채널별 scale 과 함께 int8 로 저장 (파일 약 1/4), 로드 시 float32 로 역양자화하여 연산
+#            NumPy 에는 int8 행렬곱(BLAS)이 없어 입력까지 양자화하면 오히려 느리고 정확도만 떨어짐 -> 저장 전용
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+MATRIX_KEYS = (
+    "encoder_kernel", "encoder_recurrent_kernel",
+    "decoder_kernel", "decoder_recurrent_kernel",
+    "dense_kernel",
+)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def quantize_weights(weights, precision="float32"):
+    """float32 가중치 dict -> 저장용 dict (.npz)"""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+
+    out = {
+        "input_steps": np.asarray(weights.get("input_steps", 24)),
+        "output_steps": np.asarray(weights.get("output_steps", 24)),
+        "precision": np.array(precision),
+    }
+    for k, v in weights.items():
+        if k in ("input_steps", "output_steps", "precision"):
+            continue
+        v = np.asarray(v, dtype=np.float32)
+
+        if precision == "int8" and k in MATRIX_KEYS:
+            # 출력 채널(열)별 대칭 양자화
+            scale = np.abs(v).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            out[k + "_q"] = np.clip(np.rint(v / scale), -127, 127).astype(np.int8)
+            out[k + "_scale"] = scale.astype(np.float32)
+        elif precision == "float16":
+            out[k] = v.astype(np.float16)
+        else:
+            out[k] = v
+    return out
+
+
+def _load_matrix(weights, key):
+    # int8 저장 가중치: q * scale (출력 채널별) -> float32
+    if key + "_q" in weights:
+        return np.asarray(weights[key + "_q"], dtype=np.float32) * np.asarray(weights[key + "_scale"], dtype=np.float32)
+    return np.asarray(weights[key], dtype=np.float32)
+
+
+class NumpyGRU:
+    """Keras GRU (reset_after=True, activation=tanh, recurrent_activation=sigmoid) 의 추론 전용 구현."""
+
+    def __init__(self, kernel, recurrent_kernel, bias):
+        # kernel: (in, 3u), recurrent_kernel: (u, 3u)
+        # bias: (2, 3u) [input bias, recurrent bias]
+        # 게이트 순서는 Keras 와 동일: [z | r | h]
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.input_bias = np.asarray(bias[0], dtype=np.float32)
+        self.recurrent_bias = np.asarray(bias[1], dtype=np.float32)
+        self.units = recurrent_kernel.shape[0]
+
+    def step(self, x_proj, h):
+        # x_proj: 입력 투영값 x @ W + b_in (B, 3u)
+        u = self.units
+        h_proj = h @ self.recurrent_kernel + self.recurrent_bias  # (B, 3u)
+
+        z = _sigmoid(x_proj[:, :u] + h_proj[:, :u])
+        r = _sigmoid(x_proj[:, u:2 * u] + h_proj[:, u:2 * u])
+        hh = np.tanh(x_proj[:, 2 * u:] + r * h_proj[:, 2 * u:])
+        return z * h + (1.0 - z) * hh
+
+    def run(self, X, h0=None, return_sequences=False):
+        # X: (B, T, in)
+        B, T, _ = X.shape
+        h = np.zeros((B, self.units), dtype=X.dtype) if h0 is None else h0
+
+        # 모든 시점의 입력 투영을 한 번의 행렬곱으로 계산
+        x_proj = X @ self.kernel + self.input_bias  # (B, T, 3u)
+
+        outputs = np.empty((B, T, self.units), dtype=X.dtype) if return_sequences else None
+        for t in range(T):
+            h = self.step(x_proj[:, t], h)
+            if return_sequences:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+    def run_repeated(self, x, steps, h0=None):
+        # RepeatVector 입력: 모든 시점의 입력이 동일하므로 입력 투영은 1회만 계산
+        B = x.shape[0]
+        h = np.zeros((B, self.units), dtype=x.dtype) if h0 is None else h0
+        x_proj = x @ self.kernel + self.input_bias  # (B, 3u)
+
+        outputs = np.empty((B, steps, self.units), dtype=x.dtype)
+        for t in range(steps):
+            h = self.step(x_proj, h)
+            outputs[:, t] = h
+        return outputs
+
+
+class NumpyRiskModel:
+    """risk_gru 의 NumPy 버전. Keras 모델과 같은 predict / predict_on_batch 인터페이스 제공."""
+
+    def __init__(self, weights):
+        # 연산은 항상 float32 (float16 / int8 저장 가중치는 로드 시 변환)
+        self.dtype = np.float32
+        self.precision = str(weights.get("precision", "float32"))
+
+        self.encoder = NumpyGRU(
+            _load_matrix(weights, "encoder_kernel"), _load_matrix(weights, "encoder_recurrent_kernel"), weights["encoder_bias"]
+        )
+        self.decoder = NumpyGRU(
+            _load_matrix(weights, "decoder_kernel"), _load_matrix(weights, "decoder_recurrent_kernel"), weights["decoder_bias"]
+        )
+        self.dense_kernel = _load_matrix(weights, "dense_kernel")
+        self.dense_bias = np.asarray(weights["dense_bias"], dtype=np.float32)
+        self.output_steps = int(weights.get("output_steps", 24))
+        # 학습 시 입력 길이 (train.py --seq-len, 24 의 배수), 이전 .npz 는 24
+        self.input_steps = int(weights.get("input_steps", 24))
+
+    @classmethod
+    def load(cls, npz_path):
+        with np.load(npz_path) as data:
+            weights = {k: data[k] for k in data.files}
+        return cls(weights)
+
+    # 1) Encoder: (B, T, 10) -> 마지막 hidden state (B, 64)
+    # h0 를 주면 이어서 실행: encode(X[:, t:], encode(X[:, :t])) == encode(X) (encoder_state.py: 이전 날짜 상태 + 어제)
+    def encode(self, X, h0=None):
+        return self.encoder.run(np.asarray(X, dtype=self.dtype), h0=h0)
+
+    # 2) Decoder: hidden state (B, 64) -> (B, 24, 3)
+    def decode(self, h):
+        seq = self.decoder.run_repeated(h, self.output_steps)  # (B, 24, 64)
+        return _sigmoid(seq @ self.dense_kernel + self.dense_bias)
+
+    def predict(self, X, verbose=0):
+        return self.decode(self.encode(X))
+
+    def predict_on_batch(self, X):
+        return self.predict(X)
@@ -0,0 +1,591 @@
+# 상주형 예측기 (In-process Predictor)
+# predict.py 를 매 요청마다 subprocess 로 실행하면 TF import + nvidia-smi + 모델 로드가 매번 반복됨.
+# 워커 시작 시 모델을 한 번만 로드해두고, run_prediction 과 동일한 JSON 결과를 함수 호출로 반환함.
+# 모델은 model_registry 의 manifest 를 감시하여, 새 버전이 배포되면 백그라운드에서 로드/워밍업 후 참조만 교체함 (재시작 없음).
+import os
+import sys
+import time
+import threading
+from datetime import timedelta
+
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module import model_registry
+from ai_module.batcher import MicroBatcher
+from ai_module.encoder_state import EncoderStateCache
+from ai_module.export_weights import file_sha1, npz_source_sha1
+from ai_module.features import SEQ_LEN, FEATURE_COLS, encode_days, encode_features_batch, outlook_batch
+from ai_module.model_registry import model_file_version
+from ai_module.np_model import NumpyRiskModel
+from ai_module.predict import load_tensorflow, process_input_data, summarize_prediction
+
+# 추론 실행 위치: "inprocess" (기본, API 프로세스에 모델 상주) | "pool" (워커 프로세스 풀, worker_pool.py)
+#               | "subprocess" (요청마다 predict.py 실행, PredictionEngine 에서 처리)
+AI_ENGINE_MODE = os.getenv("AI_ENGINE_MODE", "inprocess")
+
+# 추론 백엔드: "auto" (.keras 에서 추출한 .npz 가 있으면 numpy, 없으면 keras) | "numpy" | "keras"
+# numpy 백엔드는 TensorFlow 를 import 하지 않음 (export_weights.py 로 .npz 생성)
+AI_BACKEND = os.getenv("AI_BACKEND", "auto")
+
+# 마이크로 배칭 설정: 요청을 모으는 시간(ms)과 최대 배치 크기
+AI_BATCH_WINDOW_MS = float(os.getenv("AI_BATCH_WINDOW_MS", "10"))
+AI_MAX_BATCH_SIZE = int(os.getenv("AI_MAX_BATCH_SIZE", "32"))
+# 야간 배치 등 다건 예측 시 한 번에 추론할 사용자 수
+AI_BULK_BATCH_SIZE = int(os.getenv("AI_BULK_BATCH_SIZE", "512"))
+# 여러 날 예측(outlook) 최대 일 수
+AI_OUTLOOK_MAX_DAYS = int(os.getenv("AI_OUTLOOK_MAX_DAYS", "7"))
+# 새 모델 버전 확인 주기 (초, 0 이면 감시 안 함)
+AI_MODEL_POLL_SECONDS = float(os.getenv("AI_MODEL_POLL_SECONDS", "30"))
+
+
+def resolve_backend(backend, model_path, npz_path):
+    if backend != "auto":
+        return backend
+    if not os.path.exists(npz_path):
+        return "keras"
+    if not os.path.exists(model_path):
+        return "numpy"
+    # train.py 가 .keras 를 새로 저장했는데 .npz 를 다시 추출하지 않은 경우 keras 사용
+    # (수정 시각은 checkout / 복사 / 배포 시 바뀌므로 .npz 에 기록된 원본 digest 로 비교)
+    if npz_source_sha1(npz_path) != file_sha1(model_path):
+        print(f"[PREDICTOR] {os.path.basename(npz_path)} was not exported from {model_path}, using keras backend",
+              flush=True)
+        return "keras"
+    return "numpy"
+
+
+class LoadedModel:
+    """로드된 모델 한 버전. 교체 시 Predictor 는 이 객체의 참조만 바꿈."""
+
+    def __init__(self, version, backend, path, model, load_ms):
+        self.version = version
+        self.backend = backend
+        self.path = path
+        self.model = model
+        self.load_ms = load_ms
+        self.precision = getattr(model, "precision", "float32")
+        # Keras 모델의 동시 호출을 막기 위한 Lock (모델 단위, subprocess 대기 없음)
+        self._infer_lock = threading.Lock()
+
+    def run(self, X):
+        if self.backend == "numpy":
+            # NumPy 추론은 상태가 없으므로 동시 호출 가능
+            return self.model.predict_on_batch(X)
+
+        with self._infer_lock:
+            # predict() 는 호출마다 tf.data 파이프라인을 구성하므로 작은 배치에는 predict_on_batch 가 빠름
+            return self.model.predict_on_batch(X)
+
+
+class Predictor:
+
+    def __init__(self, model_path=None, npz_path=None, backend=AI_BACKEND,
+                 window_ms=AI_BATCH_WINDOW_MS, max_batch_size=AI_MAX_BATCH_SIZE,
+                 poll_seconds=AI_MODEL_POLL_SECONDS, max_in_flight=1):
+        # model_path 를 직접 주면 해당 파일 고정 (레지스트리 감시 안 함)
+        self.model_path = model_path
+        self.npz_path = npz_path or (os.path.join(os.path.dirname(model_path), model_registry.NPZ_NAME) if model_path else None)
+        self.backend_setting = backend
+        self.poll_seconds = poll_seconds
+
+        self._active = None  # LoadedModel (요청은 시작 시점의 참조를 사용)
+        self._load_lock = threading.Lock()
+        self._manifest_mtime = None
+        self._failed_version = None
+        self._watcher = None
+        self._loader = None  # timeout 이 있는 요청이 시작한 백그라운드 로드
+        self._loader_lock = threading.Lock()
+        self.swaps = 0
+        # 입력 창이 하루보다 긴 모델의 사용자별 encoder 상태 (context_days > 1 일 때만 사용)
+        self.encoder_states = EncoderStateCache()
+
+        # 동시 요청은 배처가 모아서 한 번의 추론으로 처리
+        lease, lease_rows = self._batch_lease()
+        self.batcher = MicroBatcher(
+            self._run, window_ms=window_ms, max_batch_size=max_batch_size, max_in_flight=max_in_flight,
+            lease=lease, lease_rows=lease_rows
+        )
+
+    # batcher 가 배치를 바로 쌓을 입력 버퍼 (in-process 는 없음)
+    def _batch_lease(self):
+        return None, 0
+
+    @property
+    def is_loaded(self):
+        return self._active is not None
+
+    @property
+    def model(self):
+        return self._active.model if self._active is not None else None
+
+    @property
+    def backend(self):
+        if self._active is not None:
+            return self._active.backend
+        _, keras_path, npz_path = self._resolve()
+        return resolve_backend(self.backend_setting, keras_path, npz_path)
+
+    @property
+    def load_ms(self):
+        return self._active.load_ms if self._active is not None else None
+
+    # 모델 입력 창 (일 수): train.py --seq-len 168 로 학습한 모델이면 7
+    # numpy 백엔드만 이어서 인코딩(encode(X, h0))이 가능하므로 그 외에는 1 (어제 24 스텝만 입력)
+    @property
+    def context_days(self):
+        active = self._active
+        if active is None or active.backend != "numpy":
+            return 1
+        return max(1, active.model.input_steps // SEQ_LEN)
+
+    # 결과를 만든 모델의 버전 (예측 캐시 키 / PredictionLog 에 사용)
+    @property
+    def model_version(self):
+        if self._active is not None:
+            return self._active.version
+        return self._resolve()[0]
+
+    # 배포된 버전: (version, keras_path, npz_path)
+    def _resolve(self):
+        if self.model_path is not None:
+            backend = resolve_backend(self.backend_setting, self.model_path, self.npz_path)
+            path = self.npz_path if backend == "numpy" else self.model_path
+            return model_file_version(path), self.model_path, self.npz_path
+        return model_registry.resolve_current()
+
+    def _load_version(self, version, keras_path, npz_path):
+        backend = resolve_backend(self.backend_setting, keras_path, npz_path)
+        path = npz_path if backend == "numpy" else keras_path
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model not found: {path}")
+
+        t0 = time.perf_counter()
+        if backend == "numpy":
+            model = NumpyRiskModel.load(path)
+        else:
+            tf = load_tensorflow()
+            model = tf.keras.models.load_model(path)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        print(f"[PREDICTOR] Model {version} loaded ({backend}, {load_ms:.1f} ms): {path}", flush=True)
+        return LoadedModel(version, backend, path, model, load_ms)
+
+    # 1) 모델 로드 (프로세스당 1회, 이후 교체는 감시 스레드가 담당)
+    def load(self):
+        if self._active is not None:
+            return self._active
+
+        with self._load_lock:
+            if self._active is None:
+                self._manifest_mtime = model_registry.manifest_mtime()
+                self._active = self._load_version(*self._resolve())
+                self._start_watcher()
+
+        return self._active
+
+    # 2) 텐서 추론: (B, 24, 10) -> (B, 24, 3)
+    # 배치 작업(야간 알림 등)은 직접 호출, 단건 요청은 batcher 를 거쳐 호출됨
+    def predict_tensor(self, X):
+        return self._run(X)[0]
+
+    # (출력, 모델 버전): 배치 하나는 항상 한 버전의 모델로 실행
+    def _run(self, X):
+        active = self.load()
+        return active.run(X), active.version
+
+    # 새 버전 감시: manifest 가 바뀌면 새 모델을 로드/워밍업한 뒤 참조 교체
+    def _start_watcher(self):
+        if self.model_path is not None or self.poll_seconds <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_loop, name="ai-model-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"[PREDICTOR ERROR] Model update check failed: {e}", flush=True)
+
+    def check_for_update(self):
+        mtime = model_registry.manifest_mtime()
+        if mtime is None or mtime == self._manifest_mtime:
+            return False
+        self._manifest_mtime = mtime
+
+        version, keras_path, npz_path = model_registry.resolve_current()
+        current = self._active
+        if current is not None and version == current.version:
+            return False
+        if version == self._failed_version:
+            return False
+
+        try:
+            new = self._load_version(version, keras_path, npz_path)
+            self._warm(new)
+        except Exception as e:
+            # 새 버전 로드 실패 시 기존 모델로 계속 서빙
+            print(f"[PREDICTOR ERROR] Failed to load model {version}: {e}", flush=True)
+            self._failed_version = version
+            return False
+
+        # 진행 중인 요청은 기존 참조로 끝나고, 이후 요청부터 새 모델 사용
+        self._active = new
+        self.swaps += 1
+        print(f"[PREDICTOR] Swapped model {current.version if current else None} -> {version}", flush=True)
+        return True
+
+    # 워밍업: 모델 로드 + 더미 배치 추론 (배포 직후 첫 요청이 로드/초기화 비용을 내지 않도록)
+    # keras 백엔드는 배치 크기별로 그래프를 만들므로 단건 / 최대 배치 크기를 모두 실행
+    def warmup(self, batch_sizes=None):
+        t0 = time.perf_counter()
+        self._warm(self.load(), batch_sizes)
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        print(f"[PREDICTOR] Warm-up done in {elapsed_ms:.1f} ms", flush=True)
+        return elapsed_ms
+
+    def _warm(self, loaded, batch_sizes=None):
+        for bs in batch_sizes or sorted({1, self.batcher.max_batch_size}):
+            X = np.zeros((bs, SEQ_LEN, len(FEATURE_COLS)), dtype=np.float32)
+            summarize_prediction(loaded.run(X)[0], {}, {})
+
+    # 3) run_prediction 과 동일한 JSON 계약
+    # timings 를 주면 단계별 시간(ms)을 기록: model_load, encode, queue_wait, inference, postprocess
+    # timeout(초)을 주면 그 안에 결과가 없을 때 TimeoutError (모델 로드 중이면 기다리지 않고 바로 TimeoutError)
+    # history(UserHistory)를 주고 모델의 입력 창이 하루보다 길면 사용자별 encoder 상태에서 이어서 추론
+    def predict(self, input_data, timings=None, timeout=None, history=None):
+        timings = {} if timings is None else timings
+        try:
+            if not self.is_loaded:
+                if timeout is not None:
+                    self._load_in_background()
+                    raise TimeoutError("Model is loading")
+                t0 = time.perf_counter()
+                self.load()
+                timings["model_load"] = (time.perf_counter() - t0) * 1000.0
+
+            if history is not None and self.context_days > 1:
+                return self._predict_with_state(input_data, history, timings)
+
+            t0 = time.perf_counter()
+            X_result = process_input_data(input_data)
+            timings["encode"] = (time.perf_counter() - t0) * 1000.0
+
+            if X_result is None:
+                return {"error": "Insufficient data"}
+
+            X, proc_meta = X_result
+            # (1, 24, 10) -> 배치에 합류 -> 자신의 (24, 3) 슬라이스
+            future = self.batcher.submit_async(X[0])
+            pred_matrix = future.result(timeout)
+            timings["queue_wait"] = getattr(future, "wait_ms", 0.0)
+            timings["inference"] = getattr(future, "infer_ms", 0.0)
+
+            t0 = time.perf_counter()
+            result = summarize_prediction(pred_matrix, input_data, proc_meta)
+            result["model_version"] = future.tag
+            timings["postprocess"] = (time.perf_counter() - t0) * 1000.0
+            return result
+
+        except TimeoutError:
+            raise
+        except FileNotFoundError:
+            return {"error": "Model not found"}
+        except Exception as e:
+            print(f"[PREDICTOR ERROR] {e}", flush=True)
+            return {"error": str(e), "risk_analysis": {"level": "ERROR", "score": 0}}
+
+    # 3-1) 긴 입력 창 추론: 창의 앞부분(이전 날짜) encoder 상태 + 어제 24 스텝 -> (24, 3)
+    # 사용자별 상태라서 batcher 를 거치지 않음 (NumPy 추론은 동시 호출 가능)
+    def _predict_with_state(self, input_data, history, timings):
+        active = self.load()
+        h0 = self._encoder_state(active, history, timings)
+
+        t0 = time.perf_counter()
+        X_result = process_input_data(input_data)
+        timings["encode"] = (time.perf_counter() - t0) * 1000.0
+        if X_result is None:
+            return {"error": "Insufficient data"}
+
+        X, proc_meta = X_result
+        t0 = time.perf_counter()
+        pred_matrix = active.model.decode(active.model.encode(X, h0))[0]
+        timings["inference"] = (time.perf_counter() - t0) * 1000.0
+
+        t0 = time.perf_counter()
+        result = summarize_prediction(pred_matrix, input_data, proc_meta)
+        result["model_version"] = active.version
+        timings["postprocess"] = (time.perf_counter() - t0) * 1000.0
+        return result
+
+    # 입력 창의 첫날 ~ history.through_date 의 encoder 상태 (1, 64)
+    # 캐시에 같은 창(모델 버전, 마지막 날짜)의 상태가 있으면 재사용, 없으면 창의 첫날부터 0 상태로 인코딩 (학습과 같은 창 길이)
+    def _encoder_state(self, active, history, timings):
+        t0 = time.perf_counter()
+        through = history.through_date
+        key = (history.user, active.version, through)
+
+        h0 = self.encoder_states.get(*key)
+        if h0 is None:
+            # 어제를 제외한 이전 날짜 수 = 입력 창 일 수 - 1 (진행 중 모델이 교체되어도 active 기준)
+            start = through - timedelta(days=active.model.input_steps // SEQ_LEN - 2)
+            dates = [start + timedelta(days=i) for i in range((through - start).days + 1)]
+            h0 = active.model.encode(encode_days(history.fetch(start, through), dates))
+            self.encoder_states.put(*key, h0)
+
+        timings["encoder_state"] = (time.perf_counter() - t0) * 1000.0
+        return h0
+
+    # 3-2) 여러 날 예측: 어제 입력 1개 -> 요일 피처만 다른 days 개 행을 한 번에 추론
+    # 반환: {"model_version", "days": [날짜별 run_prediction 형식 결과]} 또는 {"error": ...}
+    # history(UserHistory)는 predict 와 같음 (모든 행이 같은 encoder 상태에서 시작)
+    def predict_outlook(self, input_data, days=AI_OUTLOOK_MAX_DAYS, timings=None, history=None):
+        timings = {} if timings is None else timings
+        try:
+            if not self.is_loaded:
+                t0 = time.perf_counter()
+                self.load()
+                timings["model_load"] = (time.perf_counter() - t0) * 1000.0
+
+            t0 = time.perf_counter()
+            X_result = process_input_data(input_data)
+            if X_result is None:
+                return {"error": "Insufficient data"}
+            X, metas = outlook_batch(*X_result, days)
+            timings["encode"] = (time.perf_counter() - t0) * 1000.0
+
+            if history is not None and self.context_days > 1:
+                active = self.load()
+                h0 = self._encoder_state(active, history, timings)
+                t0 = time.perf_counter()
+                out = active.model.decode(active.model.encode(X, np.repeat(h0, days, axis=0)))
+                version = active.version
+            else:
+                # batcher 를 거치지 않고 days 행을 한 배치로 실행 (pool 모드는 워커 1개)
+                t0 = time.perf_counter()
+                out, version = self._run(X)
+            timings["inference"] = (time.perf_counter() - t0) * 1000.0
+
+            t0 = time.perf_counter()
+            results = []
+            for pred_matrix, meta in zip(out, metas):
+                result = summarize_prediction(pred_matrix, input_data, meta)
+                result["model_version"] = version
+                results.append(result)
+            timings["postprocess"] = (time.perf_counter() - t0) * 1000.0
+            return {"model_version": version, "days": results}
+
+        except FileNotFoundError:
+            return {"error": "Model not found"}
+        except Exception as e:
+            print(f"[PREDICTOR ERROR] {e}", flush=True)
+            return {"error": str(e)}
+
+    def _load_in_background(self):
+        with self._loader_lock:
+            if self._loader is not None and self._loader.is_alive():
+                return
+            self._loader = threading.Thread(target=self._try_load, name="predictor-load", daemon=True)
+            self._loader.start()
+
+    def _try_load(self):
+        try:
+            self.load()
+        except Exception as e:
+            print(f"[PREDICTOR ERROR] Background load failed: {e}", flush=True)
+
+    # 4) 다건 예측 (야간 배치): 입력 목록 -> 결과 목록 (순서 동일)
+    # batcher 를 거치지 않고 batch_size 단위로 인코딩 + 추론
+    # timings 를 주면 encode / inference / postprocess 시간(ms)을 누적
+    # histories(입력별 UserHistory)를 주고 모델의 입력 창이 하루보다 길면 사용자별 encoder 상태에서 이어서 추론
+    def predict_many(self, inputs, batch_size=AI_BULK_BATCH_SIZE, timings=None, histories=None):
+        timings = {} if timings is None else timings
+        for name in ("encode", "inference", "postprocess"):
+            timings.setdefault(name, 0.0)
+        results = [None] * len(inputs)
+
+        if histories is not None:
+            self.load()
+            if self.context_days > 1:
+                for i, (input_data, history) in enumerate(zip(inputs, histories)):
+                    t = {}
+                    results[i] = self.predict(input_data, timings=t, history=history)
+                    for name, ms in t.items():
+                        timings[name] = timings.get(name, 0.0) + ms
+                return results
+
+        for start in range(0, len(inputs), batch_size):
+            chunk = inputs[start:start + batch_size]
+            try:
+                out, metas, version = self._encode_and_run(chunk, timings)
+            except FileNotFoundError:
+                for i in range(start, start + len(chunk)):
+                    results[i] = {"error": "Model not found"}
+                continue
+            except Exception as e:
+                print(f"[PREDICTOR ERROR] {e}", flush=True)
+                for i in range(start, start + len(chunk)):
+                    results[i] = {"error": str(e), "risk_analysis": {"level": "ERROR", "score": 0}}
+                continue
+
+            t0 = time.perf_counter()
+            row = 0
+            for j, meta in enumerate(metas):
+                i = start + j
+                if meta is None:
+                    results[i] = {"error": "Insufficient data"}
+                    continue
+                results[i] = summarize_prediction(out[row], inputs[i], meta)
+                results[i]["model_version"] = version
+                row += 1
+            timings["postprocess"] += (time.perf_counter() - t0) * 1000.0
+
+        return results
+
+    # 입력 청크 인코딩 + 추론 -> (데이터가 있는 입력 순서대로의 출력, metas, model_version)
+    def _encode_and_run(self, chunk, timings):
+        t0 = time.perf_counter()
+        X, metas = encode_features_batch(chunk)
+        rows = [j for j, meta in enumerate(metas) if meta is not None]
+        t1 = time.perf_counter()
+        timings["encode"] += (t1 - t0) * 1000.0
+
+        if not rows:
+            return None, metas, None
+        out, version = self._run(X[rows])
+        timings["inference"] += (time.perf_counter() - t1) * 1000.0
+        return out, metas, version
+
+    def stats(self):
+        return {
+            "model_loaded": self.is_loaded,
+            "backend": self.backend,
+            "precision": self._active.precision if self._active is not None else None,
+            "model_version": self.model_version,
+            "load_ms": self.load_ms,
+            "model_swaps": self.swaps,
+            "context_days": self.context_days,
+            "encoder_states": self.encoder_states.stats(),
+            "batcher": self.batcher.stats(),
+        }
+
+
+class PoolPredictor(Predictor):
+    """AI_ENGINE_MODE=pool: 모델은 워커 프로세스에만 로드, 이 프로세스는 인코딩 / 배칭 / 후처리만 담당."""
+
+    def __init__(self, pool=None, window_ms=AI_BATCH_WINDOW_MS, max_batch_size=AI_MAX_BATCH_SIZE,
+                 poll_seconds=AI_MODEL_POLL_SECONDS):
+        from ai_module.worker_pool import PredictorPool
+
+        self.pool = pool or PredictorPool()
+        # 워커 수만큼 배치를 동시에 보냄, 모델 교체는 각 워커가 담당 (이 프로세스의 감시 스레드는 버전만 갱신)
+        super().__init__(window_ms=window_ms, max_batch_size=max_batch_size,
+                         poll_seconds=poll_seconds, max_in_flight=self.pool.size)
+        self._version = None
+
+    @property
+    def is_loaded(self):
+        return self.pool.stats()["alive"] > 0
+
+    # 단건 요청: batcher 가 모은 배치를 워커의 공유 메모리 슬롯에 바로 쌓음
+    def _batch_lease(self):
+        return self.pool.lease, self.pool.slot_rows
+
+    @property
+    def backend(self):
+        return "pool"
+
+    # 워커의 공유 메모리 슬롯은 (rows, 24, 10) 고정 -> encoder 상태를 이어서 추론하지 않음
+    @property
+    def context_days(self):
+        return 1
+
+    # 배포된 버전 (캐시 키 / PredictionLog): 요청마다 manifest 를 읽지 않고, 처음 한 번 + 감시 스레드가 바뀐 경우만 다시 읽음
+    @property
+    def model_version(self):
+        if self._version is None:
+            with self._load_lock:
+                if self._version is None:
+                    self._manifest_mtime = model_registry.manifest_mtime()
+                    self._version = self._resolve()[0]
+                    self._start_watcher()
+        return self._version
+
+    def check_for_update(self):
+        mtime = model_registry.manifest_mtime()
+        if mtime is None or mtime == self._manifest_mtime:
+            return False
+        self._manifest_mtime = mtime
+
+        version = self._resolve()[0]
+        if version == self._version:
+            return False
+        print(f"[PREDICTOR] Deployed model {self._version} -> {version}", flush=True)
+        self._version = version
+        return True
+
+    def load(self):
+        self.pool.start()
+        return None
+
+    def _run(self, X):
+        return self.pool.run(X)
+
+    # 야간 배치: 워커의 공유 메모리 슬롯에 바로 인코딩 (중간 배열 / pickle 없음)
+    def _encode_and_run(self, chunk, timings):
+        if len(chunk) > self.pool.slot_rows:
+            return super()._encode_and_run(chunk, timings)
+
+        with self.pool.lease() as lease:
+            t0 = time.perf_counter()
+            X, metas = encode_features_batch(chunk, out=lease.inputs)
+            rows = [j for j, meta in enumerate(metas) if meta is not None]
+            if len(rows) < len(chunk):
+                # 데이터가 있는 행만 앞으로 모음
+                X[:len(rows)] = X[rows]
+            t1 = time.perf_counter()
+            timings["encode"] += (t1 - t0) * 1000.0
+
+            if not rows:
+                return None, metas, None
+            out, version = lease.run(len(rows))
+            timings["inference"] += (time.perf_counter() - t1) * 1000.0
+        return out, metas, version
+
+    def warmup(self, batch_sizes=None):
+        # 각 워커는 기동 시 스스로 워밍업함
+        t0 = time.perf_counter()
+        self.pool.start()
+        if not self.is_loaded:
+            raise self.pool.last_error or RuntimeError("No predictor worker started")
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        print(f"[PREDICTOR] Worker pool ready in {elapsed_ms:.1f} ms", flush=True)
+        return elapsed_ms
+
+    def stats(self):
+        return {
+            "model_loaded": self.is_loaded,
+            "backend": self.backend,
+            "model_version": self.model_version,
+            "pool": self.pool.stats(),
+            "batcher": self.batcher.stats(),
+        }
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor():
+    # 워커 프로세스 당 하나의 Predictor 를 공유
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                _predictor = PoolPredictor() if AI_ENGINE_MODE == "pool" else Predictor()
+    return _predictor
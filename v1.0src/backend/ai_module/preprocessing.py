@@ -2,12 +2,33 @@
 import os
 import glob
 import json
+import hashlib
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime
 from app.database import SessionLocal
 from ai_module.utils import DATASET_ROOT, PAM_MAPPING, EMOTION_TO_INT, STATUS_TO_INT, CATEGORY_MAP
 
+FEATURE_COLS = ['SNS', 'GAME', 'OTHER', 'total_usage', 'emotion_val', 'status_val', 'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+TARGET_COLS = ['SNS', 'GAME', 'OTHER']
+
+# 사용자별 전처리 결과 캐시 (.npz)
+# from_generator 는 epoch 마다 제너레이터를 다시 실행하므로, 캐시가 없으면 매 epoch 마다 CSV/JSON 을 다시 읽고 병합함.
+# 키: 원본 파일(app_usage / EMA / calendar)의 mtime + 크기 + PREPROCESS_VERSION -> 원본이 바뀌면 자동으로 다시 생성
+# 전처리 로직(build_user_dataset / normalize_data)을 바꾸면 PREPROCESS_VERSION 을 올릴 것
+PREPROCESS_VERSION = "1"
+PREPROCESS_CACHE_ENABLED = os.getenv("PREPROCESS_CACHE", "true").lower() == "true"
+# 기본 위치 ai_module/cache/ 는 .gitignore 에 포함됨 (배포 환경에서는 PREPROCESS_CACHE_DIR 로 소스 트리 밖을 지정)
+PREPROCESS_CACHE_DIR = os.getenv(
+    "PREPROCESS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "preprocessed")
+)
+# 캐시에 없는 사용자를 전처리할 프로세스 수 (1 이면 현재 프로세스에서 순서대로, train.py --workers)
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "1"))
+
 def get_user_ids():
     # dataset/sensing/app_usage/running_app_uXX.csv -> uXX  , uxx는 마다 한 명의 데이터셋을 의미함. 
     # glob을 사용하여 파일 찾기
@@ -81,42 +102,47 @@ def fetch_db_data(uid_str):
         print(f"[WARN] DB Fetch Failed for {uid_str}: {e}")
         return pd.DataFrame()
 
+# 패키지 이름 -> 카테고리 (SNS / GAME / OTHER)
+def map_category(pkg):
+    if pd.isna(pkg): return "OTHER"
+    if pkg in CATEGORY_MAP:
+        return CATEGORY_MAP[pkg]
+    # 기본 키워드 휴리스틱
+    pkg_lower = pkg.lower()
+    if 'facebook' in pkg_lower or 'twitter' in pkg_lower or 'social' in pkg_lower or 'instagram' in pkg_lower:
+        return "SNS"
+    if 'game' in pkg_lower or 'angrybirds' in pkg_lower or 'candycrush' in pkg_lower:
+        return "GAME"
+    return "OTHER"
+
+def map_categories(packages):
+    # 고유 패키지마다 map_category 1회 -> 코드로 전체 행에 적용 (NaN 은 코드 -1 -> 마지막 칸 OTHER)
+    codes, uniques = pd.factorize(packages)
+    table = np.array([map_category(p) for p in uniques] + ["OTHER"], dtype=object)
+    return table[codes]
+
 def load_app_usage(user_id):
     path = os.path.join(DATASET_ROOT, "app_usage", f"running_app_{user_id}.csv")
     if not os.path.exists(path):
         return None
     
-    df = pd.read_csv(path)
     # 필수 컬럼: timestamp, RUNNING_TASKS_topActivity_mPackage
-    df = df[['timestamp', 'RUNNING_TASKS_topActivity_mPackage']]
+    df = pd.read_csv(path, usecols=['timestamp', 'RUNNING_TASKS_topActivity_mPackage'])
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
     df = df.sort_values('timestamp')
     
     # 지속 시간 계산
     # 다음 행의 타임스탬프를 얻기 위해 shift
-    df['next_ts'] = df['timestamp'].shift(-1)
-    df['duration'] = (df['next_ts'] - df['timestamp']).dt.total_seconds()
+    df['duration'] = (df['timestamp'].shift(-1) - df['timestamp']).dt.total_seconds()
     # 마지막 행을 0으로 채움 (또는 평균/삭제)
     df['duration'] = df['duration'].fillna(0)
     
     # 과도한 지속 시간 제한 (예: 1시간 이상 간격은 폰 꺼짐/대기로 간주)
     # Let's cap at 1 hour (3600s)
-    df.loc[df['duration'] > 3600, 'duration'] = 3600
+    df['duration'] = df['duration'].clip(upper=3600)
     
-    # 카테고리 매핑
-    def map_category(pkg):
-        if pd.isna(pkg): return "OTHER"
-        if pkg in CATEGORY_MAP:
-            return CATEGORY_MAP[pkg]
-        # 기본 키워드 휴리스틱
-        pkg_lower = pkg.lower()
-        if 'facebook' in pkg_lower or 'twitter' in pkg_lower or 'social' in pkg_lower or 'instagram' in pkg_lower:
-            return "SNS"
-        if 'game' in pkg_lower or 'angrybirds' in pkg_lower or 'candycrush' in pkg_lower:
-            return "GAME"
-        return "OTHER"
-
-    df['category'] = df['RUNNING_TASKS_topActivity_mPackage'].apply(map_category)
+    # 카테고리 매핑 (고유 패키지 단위)
+    df['category'] = map_categories(df['RUNNING_TASKS_topActivity_mPackage'])
     
     # 시간별 집계
     # FutureWarning fix: dt.floor('h')
@@ -140,24 +166,51 @@ def load_ema(user_id):
     with open(path, 'r') as f:
         data = json.load(f)
     
-    # 딕셔너리 리스트: picture_idx, resp_time
-    rows = []
-    for item in data:
-        pid = item.get('picture_idx')
-        ts = item.get('resp_time')
-        if pid and ts:
-            emotion_label = PAM_MAPPING.get(int(pid), 'NORMAL')
-            rows.append({'timestamp': pd.to_datetime(ts, unit='s'), 'emotion': emotion_label})
-            
-    df = pd.DataFrame(rows)
+    # 딕셔너리 리스트: picture_idx, resp_time -> 컬럼 단위로 변환
+    df = pd.DataFrame.from_records(data, columns=['picture_idx', 'resp_time'])
     if df.empty:
         return None
-        
+    pid = pd.to_numeric(df['picture_idx'], errors='coerce')
+    ts = pd.to_numeric(df['resp_time'], errors='coerce')
+    # 값이 없거나 0 인 응답 제외
+    valid = pid.notna() & ts.notna() & (pid != 0) & (ts != 0)
+    if not valid.any():
+        return None
+    
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(ts[valid], unit='s'),
+        'emotion': pid[valid].astype(int).map(PAM_MAPPING).fillna('NORMAL'),
+    })
     df['hour_idx'] = df['timestamp'].dt.floor('h')
     # 해당 시간대의 마지막 감정 사용
     hourly_ema = df.groupby('hour_idx').last()['emotion']
     return hourly_ema
 
+# 캘린더 날짜 형식 후보 (format='mixed' 의 기본 해석(월이 먼저)과 같은 것만)
+CALENDAR_FORMATS = ["%m/%d/%Y %H:%M", "%Y/%m/%d %H:%M", "%Y-%m-%d %H:%M", "%m/%d/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+def detect_datetime_format(values, formats=CALENDAR_FORMATS, sample_size=200):
+    # 표본이 모두 해석되는 첫 형식, 없으면 None (형식이 섞인 파일)
+    sample = values.dropna().head(sample_size)
+    if sample.empty:
+        return None
+    for fmt in formats:
+        if pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+            return fmt
+    return None
+
+def parse_datetimes(values):
+    # 컬럼 단위 파싱: 표본으로 찾은 형식으로 전체를 한 번에, 그 형식에 맞지 않는 행만 format='mixed'
+    fmt = detect_datetime_format(values)
+    if fmt is None:
+        return pd.to_datetime(values, format='mixed', errors='coerce')
+    
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    rest = parsed.isna() & values.notna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], format='mixed', errors='coerce')
+    return parsed
+
 def load_calendar(user_id):
     path = os.path.join(DATASET_ROOT, "calendar", f"calendar_{user_id}.csv")
     if not os.path.exists(path):
@@ -171,10 +224,8 @@ def load_calendar(user_id):
     # 2023/10/22 15:45 (YYYY/MM/DD)
     # 22/10/2023 15:45 (DD/MM/YYYY)
     
-    # 경고 없이 다양성을 처리하기 위해 format='mixed' 사용
-    df['start_time'] = df.apply(
-        lambda row: pd.to_datetime(f"{row['DATE']} {row['TIME']}", format='mixed', errors='coerce'), axis=1
-    )
+    # 컬럼 단위로 파싱 (대부분의 행은 한 형식, 나머지만 format='mixed')
+    df['start_time'] = parse_datetimes(df['DATE'].astype(str) + " " + df['TIME'].astype(str))
             
     df = df.dropna(subset=['start_time'])
     
@@ -246,61 +297,158 @@ def normalize_data(df):
     
     return df
 
+def source_files(user_id):
+    return [
+        os.path.join(DATASET_ROOT, "app_usage", f"running_app_{user_id}.csv"),
+        os.path.join(DATASET_ROOT, "EMA/response/PAM", f"PAM_{user_id}.json"),
+        os.path.join(DATASET_ROOT, "calendar", f"calendar_{user_id}.csv"),
+    ]
+
+def cache_key(user_id):
+    # 원본 파일 상태 + 전처리 버전 (없는 파일도 키에 포함 -> 나중에 생기면 다시 생성)
+    parts = [PREPROCESS_VERSION]
+    for path in source_files(user_id):
+        if os.path.exists(path):
+            st = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}")
+        else:
+            parts.append(f"{os.path.basename(path)}:-")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+def _read_cache(path, key):
+    # -> (적중 여부, (features, targets) 또는 데이터 없음 None)
+    if not os.path.exists(path):
+        return False, None
+    try:
+        with np.load(path) as data:
+            if str(data["key"]) != key:
+                return False, None
+            if data["features"].size == 0:
+                return True, None
+            return True, (data["features"], data["targets"])
+    except Exception as e:
+        print(f"[WARN] Preprocess cache unreadable for {os.path.basename(path)}: {e}")
+        return False, None
+
+def load_user_features(user_id, use_cache=PREPROCESS_CACHE_ENABLED, cache_dir=PREPROCESS_CACHE_DIR):
+    """
+    사용자 한 명의 정규화된 시간 단위 피처 -> (features (N, 10), targets (N, 3)) float32, 데이터가 없으면 None
+    use_cache=True 이면 cache_dir/{user_id}.npz 를 먼저 확인 (키가 다르면 다시 만들어 덮어씀)
+    """
+    path = os.path.join(cache_dir, f"{user_id}.npz")
+    key = cache_key(user_id) if use_cache else None
+
+    if use_cache:
+        hit, loaded = _read_cache(path, key)
+        if hit:
+            return loaded
+
+    df = build_user_dataset(user_id)
+    if df is None:
+        features = np.zeros((0, len(FEATURE_COLS)), dtype=np.float32)
+        targets = np.zeros((0, len(TARGET_COLS)), dtype=np.float32)
+    else:
+        df = normalize_data(df)
+        features = df[FEATURE_COLS].values.astype(np.float32)
+        targets = df[TARGET_COLS].values.astype(np.float32)
+
+    if use_cache:
+        # 데이터가 없는 사용자도 빈 배열로 저장 (다음 epoch 에서 원본을 다시 읽지 않음)
+        # 쓰는 도중 읽히지 않도록 임시 파일에 쓰고 교체
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + f".{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, key=np.array(key), features=features, targets=targets)
+        os.replace(tmp_path, path)
+
+    if features.size == 0:
+        return None
+    return features, targets
+
+def iter_user_features(user_ids, workers=PREPROCESS_WORKERS, use_cache=PREPROCESS_CACHE_ENABLED,
+                       cache_dir=PREPROCESS_CACHE_DIR):
+    """
+    user_ids 순서대로 (uid, load_user_features 결과) 를 반환 (workers 와 관계없이 순서 동일 -> 학습/검증 분할 재현 가능)
+    workers > 1 이면 캐시에 없는 사용자만 프로세스 풀에서 전처리 (CSV 파싱 / pandas 병합이 CPU 바운드)
+    - 캐시 적중은 현재 프로세스에서 바로 읽음 -> 모든 사용자가 캐시에 있으면 풀을 만들지 않음 (2번째 epoch 부터)
+    - 결과를 기다리는 사용자는 workers * 2 명까지만 (메모리 제한)
+    """
+    if workers <= 1:
+        for uid in user_ids:
+            yield uid, load_user_features(uid, use_cache=use_cache, cache_dir=cache_dir)
+        return
+
+    pool = None
+    pending = deque()  # (uid, 결과 또는 Future)
+    max_pending = workers * 2
+    try:
+        for uid in user_ids:
+            hit, loaded = False, None
+            if use_cache:
+                hit, loaded = _read_cache(os.path.join(cache_dir, f"{uid}.npz"), cache_key(uid))
+            if hit:
+                pending.append((uid, loaded))
+            else:
+                if pool is None:
+                    # TensorFlow 가 로드된 프로세스에서 fork 하지 않도록 spawn 사용
+                    pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+                pending.append((uid, pool.submit(load_user_features, uid, use_cache, cache_dir)))
+
+            # 앞쪽이 끝난 사용자부터 순서대로 반환
+            while pending and (not isinstance(pending[0][1], Future) or len(pending) > max_pending):
+                head_uid, head = pending.popleft()
+                yield head_uid, head.result() if isinstance(head, Future) else head
+
+        while pending:
+            head_uid, head = pending.popleft()
+            yield head_uid, head.result() if isinstance(head, Future) else head
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def make_windows(features, targets, seq_len=24, pred_len=24, stride=12):
+    """
+    시간 단위 피처 (N, 10) / 타겟 (N, 3) -> 슬라이딩 윈도우 (복사 없는 view)
+    X: (n, seq_len, 10) = 과거 seq_len 시간, y: (n, pred_len, 3) = 바로 다음 pred_len 시간, 시작 위치는 stride 간격
+    """
+    n = (len(features) - seq_len - pred_len) // stride + 1
+    if n <= 0:
+        return None, None
+    # sliding_window_view 는 윈도우 축을 마지막에 붙임: (N - w + 1, C, w) -> (.., w, C)
+    X = sliding_window_view(features, seq_len, axis=0)[::stride][:n].transpose(0, 2, 1)
+    y = sliding_window_view(targets[seq_len:], pred_len, axis=0)[::stride][:n].transpose(0, 2, 1)
+    return X, y
+
 # tf.data.Dataset을 위한 제너레이터
-def training_data_generator(user_ids, seq_len=24):
+# 사용자 한 명의 모든 윈도우를 한 블록으로 반환: (n, seq_len, 10), (n, 24, 3)
+# train.py 는 from_generator(...).unbatch() 로 샘플 단위로 풀어서 사용 (샘플마다 Python 을 거치지 않음)
+def training_block_generator(user_ids, seq_len=24, use_cache=PREPROCESS_CACHE_ENABLED, workers=PREPROCESS_WORKERS):
     PRED_LEN = 24
     
-    for uid in user_ids:
-        # 한 명의 사용자 데이터를 메모리에 로드
-        df = build_user_dataset(uid)
-        if df is None:
+    for uid, loaded in iter_user_features(user_ids, workers=workers, use_cache=use_cache):
+        # 한 명의 사용자 데이터 (전처리 캐시가 있으면 .npz 만 읽음, workers > 1 이면 프로세스 풀에서 전처리)
+        if loaded is None:
             continue
-            
-        # 충분한 길이 확인
-        if len(df) < seq_len + PRED_LEN:
-             continue
-            
-        df = normalize_data(df)
-        
-        # X, y 준비
-        X_seq = []
-        y_seq = []
-        
-        # X: (SEQ_LEN, FEATURE_DIM) 필요
-        # y: (OUTPUT_DIM, 3) 필요 (다음 24시간, 3개 카테고리)
         
         # Data columns: 'SNS', 'GAME', 'OTHER', 'total_usage', ...
         # Target columns: 'SNS', 'GAME', 'OTHER'
-        # X: Use all features including history
-        
-        feature_cols = ['SNS', 'GAME', 'OTHER', 'total_usage', 'emotion_val', 'status_val', 'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
-        features = df[feature_cols].values.astype(np.float32)
-        targets = df[['SNS', 'GAME', 'OTHER']].values.astype(np.float32) # Shape: (N, 3)
-        
-        # 슬라이딩 윈도우
-        # 과거 SEQ_LEN(예: 168 또는 24)을 기반으로 다음 24시간 예측
-        # Let's assume SEQ_LEN input -> Next 24 output
+        features, targets = loaded # Shape: (N, 10), (N, 3)
         
+        # 충분한 길이 확인
         if len(features) <= seq_len + PRED_LEN:
             continue
-            
-        for i in range(0, len(features) - seq_len - PRED_LEN + 1, 12): # Stride 12
-            X_window = features[i : i + seq_len]
-            y_window = targets[i + seq_len : i + seq_len + PRED_LEN] # (24, 3)
-            
-            X_seq.append(X_window)
-            y_seq.append(y_window)
-            
-        if not X_seq:
-            continue
-            
-        X_seq = np.array(X_seq)
-        y_seq = np.array(y_seq)
         
-        # Yield line by line or batch? 
-        # TF Generator expects samples. Let's yield samples.
-        for j in range(len(X_seq)):
-            yield X_seq[j], y_seq[j]
+        # 슬라이딩 윈도우 (Stride 12)
+        # 과거 SEQ_LEN(예: 168 또는 24)을 기반으로 다음 24시간 예측
+        X_block, y_block = make_windows(features, targets, seq_len, PRED_LEN, stride=12)
+        if X_block is None:
+            continue
+        yield X_block, y_block
+
+# 샘플 단위 제너레이터 (quant_eval 등): X (seq_len, 10), y (24, 3)
+def training_data_generator(user_ids, seq_len=24, use_cache=PREPROCESS_CACHE_ENABLED, workers=PREPROCESS_WORKERS):
+    for X_block, y_block in training_block_generator(user_ids, seq_len, use_cache=use_cache, workers=workers):
+        for j in range(len(X_block)):
+            yield X_block[j], y_block[j]
 
 def get_feature_dim():
     # 피처 차원을 반환하는 헬퍼
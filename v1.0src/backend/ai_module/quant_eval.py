@@ -0,0 +1,143 @@
+# 저정밀도(float16 / int8) 가중치 정확도 / 속도 비교
+# 검증 데이터: train.py 와 같은 분할(사용자 80:20)의 검증 사용자 -> preprocessing.training_data_generator
+# 기준: float32 NumPy 모델. 비교 항목: risk_score, risk_level, 피크 시간(usage_prediction.start_time), 출력 오차, 지연 시간
+# int8 / float16 은 저장 형식만 다르고 연산은 float32 (np_model.py) -> 지연 시간은 같아야 정상
+#
+# 사용법:
+#   python3 ai_module/quant_eval.py                        # 데이터셋(DATASET_ROOT) 검증 사용자
+#   python3 ai_module/quant_eval.py --max-samples 2000
+#   python3 ai_module/quant_eval.py --synthetic 1000       # 데이터셋이 없는 환경 (무작위 입력)
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.np_model import NumpyRiskModel, PRECISIONS, quantize_weights
+from ai_module.export_weights import read_keras_weights, sample_inputs
+from ai_module.model_registry import resolve_current
+from ai_module.predict import summarize_prediction
+
+SEQ_LEN = 24
+
+
+def load_validation_set(max_samples=5000, seq_len=SEQ_LEN):
+    # train.py 와 동일한 검증 사용자 분할 (고정 순서 -> 고정 검증 셋)
+    from ai_module.preprocessing import get_user_ids, training_block_generator
+
+    uids = get_user_ids()
+    val_uids = uids[int(len(uids) * 0.8):]
+
+    X, n = [], 0
+    for x, _ in training_block_generator(val_uids, seq_len=seq_len):
+        X.append(x[:max_samples - n])
+        n += len(X[-1])
+        if n >= max_samples:
+            break
+
+    if not X:
+        return None
+    return np.concatenate(X).astype(np.float32)
+
+
+def summarize(pred):
+    # summarize_prediction 결과에서 비교 항목만 추출
+    scores, levels, peaks = [], [], []
+    for p in pred:
+        r = summarize_prediction(p, {}, {})
+        scores.append(r["risk_analysis"]["score"])
+        levels.append(r["risk_analysis"]["level"])
+        peaks.append(r["usage_prediction"]["start_time"])
+    return np.array(scores), np.array(levels), np.array(peaks)
+
+
+def time_models(models, X, batch_sizes, warmup=5, rounds=30):
+    """
+    모델별 / 배치 크기별 지연 시간 중앙값 (ms)
+    워밍업 후 모델을 번갈아 한 번씩 실행하는 라운드를 반복 (라운드마다 순서를 뒤집음)
+    -> CPU 주파수 / 캐시 상태 변화가 모든 모델에 고르게 나뉨
+    """
+    times = {name: {bs: [] for bs in batch_sizes} for name in models}
+    for bs in batch_sizes:
+        Xb = X[:bs]
+        for model in models.values():
+            for _ in range(warmup):
+                model.predict(Xb)
+
+        names = list(models)
+        for r in range(rounds):
+            for name in (names if r % 2 == 0 else names[::-1]):
+                t0 = time.perf_counter()
+                models[name].predict(Xb)
+                times[name][bs].append((time.perf_counter() - t0) * 1000)
+
+    return {name: {bs: float(np.median(v)) for bs, v in per_bs.items()} for name, per_bs in times.items()}
+
+
+def evaluate(X, weights, batch_sizes=(1, 32, 512), rounds=30):
+    models = {p: NumpyRiskModel(quantize_weights(weights, p)) for p in PRECISIONS}
+
+    base_pred = models["float32"].predict(X)
+    base_scores, base_levels, base_peaks = summarize(base_pred)
+    # 속도 기준은 별도의 float32 인스턴스 -> float32 행의 speedup 이 측정 잡음 (1.00 에 가까워야 함)
+    times = time_models(
+        {"baseline": NumpyRiskModel(quantize_weights(weights, "float32")), **models}, X, batch_sizes, rounds=rounds
+    )
+
+    print(f">>> [QUANT] samples={len(X)} baseline=float32 (latency: median of {rounds} interleaved runs)", flush=True)
+    rows = []
+    for precision, model in models.items():
+        pred = model.predict(X)
+        scores, levels, peaks = summarize(pred)
+
+        score_diff = np.abs(scores - base_scores)
+        row = {
+            "precision": precision,
+            "weights_kb": sum(v.nbytes for v in quantize_weights(weights, precision).values()) / 1024,
+            "max_abs_output_diff": float(np.abs(pred - base_pred).max()),
+            "mean_abs_score_diff": float(score_diff.mean()),
+            "max_abs_score_diff": int(score_diff.max()),
+            "level_agreement": float((levels == base_levels).mean()),
+            "peak_hour_agreement": float((peaks == base_peaks).mean()),
+        }
+        for bs in batch_sizes:
+            row[f"ms_b{bs}"] = times[precision][bs]
+            row[f"speedup_b{bs}"] = times["baseline"][bs] / times[precision][bs]
+        rows.append(row)
+
+        print(f"    [{precision}] weights={row['weights_kb']:.1f} KB"
+              f" max|dy|={row['max_abs_output_diff']:.2e}"
+              f" score diff mean={row['mean_abs_score_diff']:.3f} max={row['max_abs_score_diff']}"
+              f" level={row['level_agreement'] * 100:.2f}%"
+              f" peak={row['peak_hour_agreement'] * 100:.2f}%", flush=True)
+        print("             " + " ".join(
+            f"b{bs}: {row[f'ms_b{bs}']:.2f} ms (x{row[f'speedup_b{bs}']:.2f})" for bs in batch_sizes
+        ), flush=True)
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare float16 / int8 weights against float32")
+    parser.add_argument("--model", default=resolve_current()[1], help="Default: currently promoted model")
+    parser.add_argument("--max-samples", type=int, default=5000)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random inputs instead of the dataset")
+    parser.add_argument("--rounds", type=int, default=30, help="Interleaved timing runs per model and batch size")
+    args = parser.parse_args()
+
+    weights = read_keras_weights(args.model)
+    # 모델의 입력 길이 (train.py --seq-len)
+    seq_len = int(weights.get("input_steps", SEQ_LEN))
+
+    if args.synthetic:
+        X = sample_inputs(args.synthetic, seq_len=seq_len)
+    else:
+        X = load_validation_set(args.max_samples, seq_len=seq_len)
+        if X is None:
+            print(">>> [Error] No validation samples found. Use --synthetic N.", flush=True)
+            sys.exit(1)
+
+    evaluate(X, weights, rounds=args.rounds)
@@ -0,0 +1,234 @@
+# 학습 윈도우 shard (.npy, memory-mapped)
+# 제너레이터 입력(from_generator)은 Python 에서 사용자 단위로 전처리/윈도우를 만들기 때문에 입력 병렬화 / .cache() 가 어려움.
+# 학습 전에 모든 윈도우를 고정 크기 shard 로 한 번 기록해두고, train.py --shards 로 읽음.
+#   {split}-{run}-{n:05d}-x.npy : float32 (rows, seq_len, 10)
+#   {split}-{run}-{n:05d}-y.npy : float32 (rows, 24, 3)
+#   index.json                  : seq_len, 분할별 shard 목록 / 행 수, 사용자 목록, 원본 키 (source_key)
+# 각 분할의 마지막 shard 를 제외하면 rows == shard_rows
+# run 은 기록할 때마다 새로 만드는 id -> 다시 기록해도 이전 index.json 이 가리키는 shard 는 덮어쓰지 않음
+#   (새 shard 를 모두 쓴 뒤 index.json 을 os.replace 로 교체하고, 그 다음에 이전 shard 를 삭제)
+# 분할은 train.py 와 동일 (get_user_ids() 순서의 앞 80% 학습, 나머지 검증)
+#
+# 사용법:
+#   python3 ai_module/shards.py --seq-len 24 --workers 4            # ai_module/cache/shards/seq24 에 기록
+#   python3 ai_module/train.py --shards ai_module/cache/shards/seq24
+import os
+import sys
+import json
+import time
+import hashlib
+import uuid
+import argparse
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.preprocessing import (
+    PREPROCESS_VERSION, PREPROCESS_WORKERS, cache_key, get_user_ids, get_feature_dim, training_block_generator
+)
+
+SHARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "shards")
+INDEX_NAME = "index.json"
+PRED_LEN = 24
+OUTPUT_DIM = 3
+# shard 당 윈도우 수 (seq_len 24 기준 약 60MB)
+SHARD_ROWS = int(os.getenv("SHARD_ROWS", "65536"))
+# tf.data 가 한 번에 읽는 행 수
+SHARD_READ_ROWS = int(os.getenv("SHARD_READ_ROWS", "1024"))
+
+
+def split_users(uids):
+    # train.py 와 동일한 분할
+    split_idx = int(len(uids) * 0.8)
+    return {"train": uids[:split_idx], "val": uids[split_idx:]}
+
+
+def source_key(uids):
+    # 원본 파일 / 전처리 버전이 바뀌었는지 확인용 (사용자별 전처리 캐시 키의 hash)
+    return hashlib.sha1("|".join(cache_key(uid) for uid in uids).encode()).hexdigest()
+
+
+class _ShardWriter:
+    """윈도우 블록을 받아 고정 크기 shard 에 memmap 으로 바로 기록"""
+
+    def __init__(self, out_dir, split, run, seq_len, shard_rows):
+        self.out_dir = out_dir
+        self.split = split
+        self.run = run
+        self.seq_len = seq_len
+        self.shard_rows = shard_rows
+        self.shards = []  # index.json 항목
+        self._x = self._y = None
+        self._filled = 0
+
+    def _open(self):
+        n = len(self.shards)
+        name = f"{self.split}-{self.run}-{n:05d}"
+        self._names = (f"{name}-x.npy", f"{name}-y.npy")
+        self._x = np.lib.format.open_memmap(
+            os.path.join(self.out_dir, self._names[0]), mode="w+", dtype=np.float32,
+            shape=(self.shard_rows, self.seq_len, get_feature_dim())
+        )
+        self._y = np.lib.format.open_memmap(
+            os.path.join(self.out_dir, self._names[1]), mode="w+", dtype=np.float32,
+            shape=(self.shard_rows, PRED_LEN, OUTPUT_DIM)
+        )
+        self._filled = 0
+
+    def write(self, X, y):
+        start = 0
+        while start < len(X):
+            if self._x is None:
+                self._open()
+            n = min(len(X) - start, self.shard_rows - self._filled)
+            self._x[self._filled:self._filled + n] = X[start:start + n]
+            self._y[self._filled:self._filled + n] = y[start:start + n]
+            self._filled += n
+            start += n
+            if self._filled == self.shard_rows:
+                self._close()
+
+    def _close(self):
+        rows = self._filled
+        x_path, y_path = (os.path.join(self.out_dir, name) for name in self._names)
+        self._x.flush()
+        self._y.flush()
+        if rows < self.shard_rows:
+            # 마지막 shard: 채운 행만 남김
+            x, y = np.array(self._x[:rows]), np.array(self._y[:rows])
+            del self._x, self._y
+            np.save(x_path, x)
+            np.save(y_path, y)
+        self._x = self._y = None
+        self.shards.append({"x": self._names[0], "y": self._names[1], "rows": rows})
+
+    def finish(self):
+        if self._x is not None:
+            if self._filled:
+                self._close()
+            else:
+                # 빈 shard 파일 정리
+                self._x = self._y = None
+                for name in self._names:
+                    os.remove(os.path.join(self.out_dir, name))
+        return self.shards
+
+
+def write_shards(out_dir=None, seq_len=24, shard_rows=SHARD_ROWS, workers=PREPROCESS_WORKERS, uids=None):
+    out_dir = out_dir or os.path.join(SHARD_DIR, f"seq{seq_len}")
+    os.makedirs(out_dir, exist_ok=True)
+    uids = get_user_ids() if uids is None else uids
+
+    t0 = time.perf_counter()
+    index = {
+        "seq_len": seq_len,
+        "pred_len": PRED_LEN,
+        "feature_dim": get_feature_dim(),
+        "shard_rows": shard_rows,
+        "preprocess_version": PREPROCESS_VERSION,
+        "source_key": source_key(uids),
+        "splits": {},
+    }
+    # 이번 기록의 shard 이름에만 붙는 id (이전 index.json 이 가리키는 파일과 겹치지 않음)
+    run = uuid.uuid4().hex[:8]
+    try:
+        for split, split_uids in split_users(uids).items():
+            writer = _ShardWriter(out_dir, split, run, seq_len, shard_rows)
+            for X, y in training_block_generator(split_uids, seq_len=seq_len, workers=workers):
+                writer.write(X, y)
+            shards = writer.finish()
+            index["splits"][split] = {
+                "users": split_uids,
+                "rows": sum(s["rows"] for s in shards),
+                "shards": shards,
+            }
+            print(f">>> [SHARDS] {split}: {len(split_uids)} users, {index['splits'][split]['rows']} windows, "
+                  f"{len(shards)} shard(s)", flush=True)
+
+        # index.json 은 모든 shard 를 기록한 뒤 교체 (그 전에 실패하면 이전 index 와 shard 가 그대로 남음)
+        tmp_path = os.path.join(out_dir, INDEX_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, os.path.join(out_dir, INDEX_NAME))
+    except BaseException:
+        # 실패한 기록의 shard 만 삭제
+        for name in os.listdir(out_dir):
+            if f"-{run}-" in name and name.endswith(".npy"):
+                os.remove(os.path.join(out_dir, name))
+        raise
+
+    # 새 index 로 교체한 뒤 이전 기록의 shard 파일 정리
+    current = {s[k] for part in index["splits"].values() for s in part["shards"] for k in ("x", "y")}
+    for name in os.listdir(out_dir):
+        if name.endswith(".npy") and name not in current:
+            os.remove(os.path.join(out_dir, name))
+
+    print(f">>> [SHARDS] Written to {out_dir} in {time.perf_counter() - t0:.1f}s", flush=True)
+    return index
+
+
+def load_index(shard_dir):
+    with open(os.path.join(shard_dir, INDEX_NAME)) as f:
+        return json.load(f)
+
+
+def open_split(shard_dir, split, index=None):
+    """NumPy memmap 로더: [(X (rows, seq_len, 10), y (rows, 24, 3)), ...] (읽기 전용, 필요한 부분만 디스크에서 읽음)"""
+    index = index or load_index(shard_dir)
+    return [
+        (np.load(os.path.join(shard_dir, s["x"]), mmap_mode="r"), np.load(os.path.join(shard_dir, s["y"]), mmap_mode="r"))
+        for s in index["splits"][split]["shards"]
+    ]
+
+
+def make_dataset(tf, shard_dir, split, shuffle=False, read_rows=SHARD_READ_ROWS, cycle_length=4, seed=None):
+    """
+    shard -> tf.data.Dataset (샘플 단위, X (seq_len, 10), y (24, 3))
+    shard 마다 read_rows 행씩 memmap 에서 읽고 (tf.numpy_function), cycle_length 개 shard 를 병렬로 interleave.
+    shuffle=True 이면 shard 순서를 섞고 여러 shard 의 청크를 섞어서 읽음 (이후 train.py 의 shuffle 버퍼가 샘플 단위로 섞음)
+    """
+    index = load_index(shard_dir)
+    seq_len, feature_dim = index["seq_len"], index["feature_dim"]
+    arrays = open_split(shard_dir, split, index)
+    if not arrays:
+        raise ValueError(f"No {split} shards in {shard_dir}")
+
+    def read(shard, start):
+        X, y = arrays[int(shard)]
+        start = int(start)
+        return np.asarray(X[start:start + read_rows]), np.asarray(y[start:start + read_rows])
+
+    def read_chunk(shard, start):
+        X, y = tf.numpy_function(read, [shard, start], [tf.float32, tf.float32])
+        X.set_shape((None, seq_len, feature_dim))
+        y.set_shape((None, PRED_LEN, OUTPUT_DIM))
+        return X, y
+
+    def chunks(shard, rows):
+        return tf.data.Dataset.range(0, rows, read_rows).map(lambda start: read_chunk(shard, start))
+
+    shard_ids = np.arange(len(arrays), dtype=np.int64)
+    rows = np.array([len(X) for X, _ in arrays], dtype=np.int64)
+    ds = tf.data.Dataset.from_tensor_slices((shard_ids, rows))
+    if shuffle:
+        ds = ds.shuffle(len(arrays), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.interleave(
+        chunks, cycle_length=min(cycle_length, len(arrays)), block_length=1,
+        num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle
+    )
+    return ds.unbatch()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write training windows into memory-mapped .npy shards")
+    parser.add_argument("--seq-len", type=int, default=24, help="Input window in hours (multiple of 24)")
+    parser.add_argument("--out", default=None, help="Default: ai_module/cache/shards/seq{seq_len}")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    parser.add_argument("--workers", type=int, default=PREPROCESS_WORKERS, help="Processes for preprocessing uncached users")
+    args = parser.parse_args()
+    if args.seq_len <= 0 or args.seq_len % 24:
+        parser.error("--seq-len must be a positive multiple of 24")
+
+    write_shards(args.out, args.seq_len, args.shard_rows, args.workers)
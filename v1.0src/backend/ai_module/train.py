@@ -12,10 +12,11 @@ import gc
 # 부모 디렉토리를 경로에 추가
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_module.preprocessing import get_user_ids, training_data_generator, get_feature_dim
+from ai_module.preprocessing import PREPROCESS_WORKERS, get_user_ids, training_block_generator, get_feature_dim
 # TF를 import하므로 아직 build_model을 import하지 마세요
 
-MODEL_SAVE_PATH = os.path.join(os.path.dirname(__file__), "saved_models", "risk_gru.keras")
+# 학습 결과는 model_registry 의 새 버전 디렉토리에 저장 (서빙 중인 모델을 덮어쓰지 않음), 완료 후 promote
+from ai_module import model_registry
 
 def find_free_gpu():
     """
@@ -102,36 +103,60 @@ def train_model(args): # 각 Step 을 print 하도록 하여 진행상황 확인
             print(">>> [Error] No users found. Exiting.", flush=True)
             return
 
-        SEQ_LEN = 24
+        # 입력 길이 (시간): 24 = 어제 하루, 168 = 최근 7일
+        # API 는 하루 단위로 encoder 상태를 이어서 계산하므로 24 의 배수 (export 시 .npz 의 input_steps 로 기록)
+        SEQ_LEN = args.seq_len
         FEATURE_DIM = get_feature_dim()
+        # 전처리 캐시: 첫 epoch 에 사용자별 .npz 생성, 이후 epoch 은 .npz 만 읽음
+        USE_CACHE = not args.no_preprocess_cache
         # 출력 차원 = 24 * 3 (모델에서 24, 3으로 재구조화)
         # 제너레이터의 타겟 형태는 (24, 3)
         
         print(">>> [Step 3] Building Data Pipeline...", flush=True)
         
+        # 제너레이터는 사용자 단위 블록 (n, SEQ_LEN, FEATURE_DIM) / (n, 24, 3) 을 반환 -> unbatch 로 샘플 단위로 풀어줌
         output_signature = (
-            tf.TensorSpec(shape=(SEQ_LEN, FEATURE_DIM), dtype=tf.float32),
-            tf.TensorSpec(shape=(24, 3), dtype=tf.float32)
+            tf.TensorSpec(shape=(None, SEQ_LEN, FEATURE_DIM), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, 24, 3), dtype=tf.float32)
         )
         
         split_idx = int(len(uids) * 0.8)
         train_uids = uids[:split_idx]
         val_uids = uids[split_idx:]
         
-        print(f"    Train Users: {len(train_uids)}, Valid Users: {len(val_uids)}", flush=True)
+        print(f"    Train Users: {len(train_uids)}, Valid Users: {len(val_uids)}, SEQ_LEN: {SEQ_LEN}, Workers: {args.workers}", flush=True)
         
         BATCH_SIZE = 64
         BUFFER_SIZE = 5000 
         
-        train_ds = tf.data.Dataset.from_generator(
-            lambda: training_data_generator(train_uids, seq_len=SEQ_LEN),
-            output_signature=output_signature
-        ).shuffle(BUFFER_SIZE).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
-        
-        val_ds = tf.data.Dataset.from_generator(
-            lambda: training_data_generator(val_uids, seq_len=SEQ_LEN),
-            output_signature=output_signature
-        ).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+        if args.shards:
+            # 미리 기록한 memmap shard (shards.py) 에서 읽음: shard 단위 interleave + prefetch
+            from ai_module.shards import load_index, make_dataset, source_key
+            index = load_index(args.shards)
+            if index["seq_len"] != SEQ_LEN:
+                raise ValueError(f"Shards were written with seq_len={index['seq_len']}, expected {SEQ_LEN}")
+            if index["splits"]["train"]["users"] != train_uids or index["source_key"] != source_key(uids):
+                print(">>> [WARN] Shards are older than the dataset. Re-run ai_module/shards.py", flush=True)
+            print(f"    Shards: {args.shards} (train {index['splits']['train']['rows']}, "
+                  f"val {index['splits']['val']['rows']} windows)", flush=True)
+
+            train_ds = make_dataset(tf, args.shards, "train", shuffle=True) \
+                .shuffle(BUFFER_SIZE).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+            val_ds = make_dataset(tf, args.shards, "val").batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+        else:
+            train_ds = tf.data.Dataset.from_generator(
+                lambda: training_block_generator(train_uids, seq_len=SEQ_LEN, use_cache=USE_CACHE, workers=args.workers),
+                output_signature=output_signature
+            ).unbatch().shuffle(BUFFER_SIZE).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+            
+            val_ds = tf.data.Dataset.from_generator(
+                lambda: training_block_generator(val_uids, seq_len=SEQ_LEN, use_cache=USE_CACHE, workers=args.workers),
+                output_signature=output_signature
+            ).unbatch().batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+
+        MODEL_VERSION, MODEL_DIR = model_registry.create_version()
+        MODEL_SAVE_PATH = os.path.join(MODEL_DIR, model_registry.KERAS_NAME)
+        print(f"    Model version: {MODEL_VERSION} ({MODEL_DIR})", flush=True)
 
         print(">>> [Step 4] Building Model...", flush=True)
         model = build_model((SEQ_LEN, FEATURE_DIM))
@@ -157,11 +182,14 @@ def train_model(args): # 각 Step 을 print 하도록 하여 진행상황 확인
         )
         
         print(">>> [Step 6] Saving Model...", flush=True)
-        if not os.path.exists(os.path.dirname(MODEL_SAVE_PATH)):
-            os.makedirs(os.path.dirname(MODEL_SAVE_PATH), exist_ok=True)
-            
         model.save(MODEL_SAVE_PATH)
         print(f"    Saved to: {MODEL_SAVE_PATH}", flush=True)
+
+        # API 워커의 NumPy 추론용 가중치 (.npz) 생성 (AI_NPZ_NAME 의 정밀도 포함)
+        model_registry.export_npz(MODEL_DIR)
+
+        # manifest 교체 -> API 워커가 새 버전을 백그라운드 로드 후 교체
+        model_registry.promote(MODEL_VERSION)
         print(">>> [Success] Training Complete.", flush=True)
         
     except Exception as e:
@@ -181,6 +209,12 @@ def train_model(args): # 각 Step 을 print 하도록 하여 진행상황 확인
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Auto-Scalable AI Training with Lazy Loading")
     parser.add_argument("--gpu", type=int, default=None, help="Manually specify GPU ID (optional)")
+    parser.add_argument("--shards", default=None, help="Read training windows from shards written by ai_module/shards.py")
+    parser.add_argument("--workers", type=int, default=PREPROCESS_WORKERS, help="Processes for preprocessing uncached users")
+    parser.add_argument("--no-preprocess-cache", action="store_true", help="Rebuild user datasets from CSV/JSON every epoch")
+    parser.add_argument("--seq-len", type=int, default=24, help="Input window in hours (multiple of 24, e.g. 168 = 7 days)")
     args = parser.parse_args()
+    if args.seq_len <= 0 or args.seq_len % 24:
+        parser.error("--seq-len must be a positive multiple of 24")
     
     train_model(args)
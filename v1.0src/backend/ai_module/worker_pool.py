@@ -0,0 +1,416 @@
+# 상주 추론 워커 프로세스 풀 (AI_ENGINE_MODE=pool)
+# in-process 추론은 API 프로세스의 GIL 을 공유하고, subprocess 모드는 요청마다 프로세스를 띄우고 전역 Lock 으로 직렬화함.
+# 풀 모드는 모델을 로드해 둔 워커 프로세스 N 개를 유지하고, 부모의 batcher 가 만든 배치를 놀고 있는 워커에 Pipe 로 전달함.
+# - 헬스 체크: 주기적으로 프로세스 생존 확인 + 놀고 있는 워커에 ping
+# - 비정상 종료 / 응답 시간 초과 시 워커 교체
+# - max_requests 처리 후 워커 재시작 (메모리 증가 제한)
+# - 각 워커는 Predictor 를 사용하므로 model_registry 의 새 버전 감시/교체도 워커별로 동작
+#
+# 텐서 전달: 워커마다 공유 메모리 슬롯(입력 (rows, 24, 10) + 출력 (rows, 24, 3), float32)을 하나씩 둠.
+# Pipe 로는 ("predict", B) 같은 짧은 메시지만 오가고, 텐서는 pickle / 복사 없이 슬롯에서 바로 읽고 씀.
+# 호출자는 lease() 로 슬롯을 빌려 encode_features_batch(out=slot.inputs) 처럼 입력을 직접 기록할 수 있음.
+# - 야간 배치 (PoolPredictor.predict_many): encode_features_batch(out=lease.inputs) 로 슬롯에 바로 인코딩
+# - 단건 요청: batcher 가 모은 요청 행을 np.stack(out=lease.inputs) 으로 슬롯에 바로 쌓음 (MicroBatcher(lease=...))
+import os
+import sys
+import time
+import queue
+import threading
+import multiprocessing as mp
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Add path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_module.features import SEQ_LEN, FEATURE_COLS
+
+AI_POOL_SIZE = int(os.getenv("AI_POOL_SIZE", str(os.cpu_count() or 1)))
+# 워커 재시작 주기 (처리한 배치 수, 0 이면 재시작 안 함)
+AI_POOL_MAX_REQUESTS = int(os.getenv("AI_POOL_MAX_REQUESTS", "10000"))
+# 배치 하나의 최대 처리 시간 / 놀고 있는 워커를 기다리는 시간 (초)
+AI_POOL_TIMEOUT = float(os.getenv("AI_POOL_TIMEOUT", "10"))
+AI_POOL_STARTUP_TIMEOUT = float(os.getenv("AI_POOL_STARTUP_TIMEOUT", "120"))
+AI_POOL_HEALTH_SECONDS = float(os.getenv("AI_POOL_HEALTH_SECONDS", "5"))
+# 워커당 BLAS 스레드 수 (워커 수 x 스레드 수가 코어 수를 넘지 않도록)
+AI_POOL_WORKER_THREADS = os.getenv("AI_POOL_WORKER_THREADS", "1")
+# 워커 슬롯 크기 (배치 최대 행 수, 야간 배치 크기 AI_BULK_BATCH_SIZE 이상 권장)
+AI_POOL_SLOT_ROWS = int(os.getenv("AI_POOL_SLOT_ROWS", "512"))
+
+OUTPUT_DIM = 3
+
+
+class TensorSlot:
+    """워커 하나의 공유 메모리 버퍼: inputs (rows, 24, 10), outputs (rows, 24, 3) float32"""
+
+    def __init__(self, rows, name=None):
+        in_bytes = rows * SEQ_LEN * len(FEATURE_COLS) * 4
+        out_bytes = rows * SEQ_LEN * OUTPUT_DIM * 4
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=in_bytes + out_bytes)
+        else:
+            # spawn 워커는 부모의 resource_tracker 를 공유하므로 unlink 는 부모(_Worker.stop)가 담당
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.name = self.shm.name
+        self.rows = rows
+        self.inputs = np.ndarray((rows, SEQ_LEN, len(FEATURE_COLS)), dtype=np.float32, buffer=self.shm.buf)
+        self.outputs = np.ndarray((rows, SEQ_LEN, OUTPUT_DIM), dtype=np.float32, buffer=self.shm.buf, offset=in_bytes)
+
+    def close(self, unlink=False):
+        # 버퍼를 참조하는 배열을 먼저 해제해야 close 가능
+        self.inputs = self.outputs = None
+        try:
+            self.shm.close()
+            if unlink:
+                self.shm.unlink()
+        except (BufferError, FileNotFoundError) as e:
+            print(f"[POOL ERROR] Failed to release slot {self.name}: {e}", flush=True)
+
+
+def _worker_main(conn, slot_name, slot_rows):
+    # 자식 프로세스: 모델 로드 + 워밍업 후 요청 처리 (배칭은 부모 프로세스의 batcher 가 담당)
+    from ai_module.predictor import Predictor
+
+    slot = TensorSlot(slot_rows, name=slot_name)
+    predictor = Predictor(window_ms=0, max_batch_size=1)
+    try:
+        predictor.warmup()
+        conn.send(("ready", os.getpid(), predictor.model_version))
+    except Exception as e:
+        conn.send(("error", type(e).__name__, str(e)))
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return  # 부모 프로세스 종료
+
+        kind = msg[0]
+        if kind == "predict":
+            # 입력은 슬롯의 앞 B 행, 결과도 슬롯에 기록
+            B = msg[1]
+            try:
+                out, version = predictor._run(slot.inputs[:B])
+                slot.outputs[:B] = out
+                conn.send(("ok", B, version))
+            except Exception as e:
+                conn.send(("error", type(e).__name__, str(e)))
+        elif kind == "ping":
+            conn.send(("pong", predictor.model_version))
+        elif kind == "stop":
+            slot.close()
+            return
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class _Worker:
+
+    def __init__(self, ctx, worker_id, slot_rows):
+        self.id = worker_id
+        self.slot = TensorSlot(slot_rows)
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, self.slot.name, slot_rows), name=f"ai-worker-{worker_id}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.requests = 0
+        self.model_version = None
+        self.started_at = time.time()
+        self.dead = False
+
+    def wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Worker {self.id} did not start in {timeout}s")
+        msg = self.conn.recv()
+        if msg[0] != "ready":
+            raise WorkerError(f"Worker {self.id} failed to start: {msg[1]}: {msg[2]}")
+        self.model_version = msg[2]
+
+    def call(self, msg, timeout):
+        self.conn.send(msg)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Worker {self.id} did not respond in {timeout}s")
+        return self.conn.recv()
+
+    def stop(self, timeout=2.0):
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+        self.slot.close(unlink=True)
+
+
+class _Lease:
+    """놀고 있는 워커 하나를 빌린 상태. inputs 에 입력을 쓰고 run(B) 로 추론."""
+
+    def __init__(self, pool, worker):
+        self.pool = pool
+        self.worker = worker
+
+    @property
+    def rows(self):
+        return self.worker.slot.rows
+
+    @property
+    def inputs(self):
+        return self.worker.slot.inputs
+
+    # 슬롯 앞 B 행 추론 -> ((B, 24, 3) 복사본, model_version)
+    # 워커가 처리 중 죽으면 입력을 다른 워커 슬롯으로 옮겨 1회 재시도
+    def run(self, B):
+        pool = self.pool
+        for _ in range(2):
+            w = self.worker
+            try:
+                msg = w.call(("predict", B), pool.timeout)
+            except TimeoutError:
+                pool._count("timeouts")
+                self.worker = None
+                pool._replace(w, "timeout")
+                raise
+            except (EOFError, OSError):
+                pool._count("crashes")
+                X = w.slot.inputs[:B].copy()
+                self.worker = None
+                pool._replace(w, "crashed")
+                self.worker = pool._acquire(pool.timeout)
+                self.worker.slot.inputs[:B] = X
+                continue
+
+            w.requests += 1
+            if msg[0] == "ok":
+                w.model_version = msg[2]
+                return w.slot.outputs[:B].copy(), msg[2]
+
+            pool._count("errors")
+            if msg[1] == "FileNotFoundError":
+                raise FileNotFoundError(msg[2])
+            raise WorkerError(f"{msg[1]}: {msg[2]}")
+
+        raise WorkerError("Predictor worker crashed")
+
+
+class PredictorPool:
+
+    def __init__(self, size=AI_POOL_SIZE, max_requests=AI_POOL_MAX_REQUESTS, timeout=AI_POOL_TIMEOUT,
+                 health_seconds=AI_POOL_HEALTH_SECONDS, slot_rows=AI_POOL_SLOT_ROWS):
+        self.size = max(1, size)
+        self.slot_rows = slot_rows
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.health_seconds = health_seconds
+
+        # fork 는 부모의 스레드(batcher 등) 상태를 복사하므로 spawn 사용
+        self._ctx = mp.get_context("spawn")
+        self._idle = queue.Queue()
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._started = False
+        self._closed = False
+        self.last_error = None
+        self._stats = {"requests": 0, "crashes": 0, "timeouts": 0, "recycled": 0, "restarts": 0, "errors": 0}
+
+    # 1) 워커 기동 (모두 병렬로 띄운 뒤 준비될 때까지 대기)
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(name, AI_POOL_WORKER_THREADS)
+
+        workers = [self._spawn() for _ in range(self.size)]
+        for w in workers:
+            self._ready(w)
+
+        threading.Thread(target=self._health_loop, name="ai-pool-health", daemon=True).start()
+        print(f"[POOL] {self._idle.qsize()}/{self.size} predictor workers ready", flush=True)
+
+    def _spawn(self):
+        with self._lock:
+            return self._spawn_locked()
+
+    def _spawn_locked(self):
+        self._next_id += 1
+        w = _Worker(self._ctx, self._next_id, self.slot_rows)
+        self._workers[w.id] = w
+        return w
+
+    def _ready(self, w):
+        try:
+            w.wait_ready(AI_POOL_STARTUP_TIMEOUT)
+        except Exception as e:
+            if self._closed:
+                w.stop()
+                return
+            # 기동 실패 (예: 모델 파일 없음) -> 헬스 체크가 주기적으로 다시 시도
+            print(f"[POOL ERROR] Worker {w.id} failed to start: {e!r}", flush=True)
+            self.last_error = e
+            self._remove(w)
+            return
+        if self._closed:
+            w.stop()
+            return
+        self._idle.put(w)
+
+    def _remove(self, w):
+        w.dead = True
+        with self._lock:
+            self._workers.pop(w.id, None)
+        threading.Thread(target=w.stop, daemon=True).start()
+
+    # 2) 워커 교체: 기존 워커는 종료, 새 워커는 백그라운드에서 준비 후 idle 에 합류
+    # 제거와 생성을 한 번에 처리해 헬스 체크가 빈 자리를 중복으로 채우지 않도록 함
+    def _replace(self, w, reason):
+        with self._lock:
+            if w.dead:
+                return  # 이미 다른 경로에서 교체됨
+            w.dead = True
+            self._workers.pop(w.id, None)
+            new = None if self._closed else self._spawn_locked()
+            if new is not None:
+                self._stats["restarts"] += 1
+        threading.Thread(target=w.stop, daemon=True).start()
+        if new is None:
+            return
+        print(f"[POOL] Replacing worker {w.id} (pid {w.process.pid}): {reason}", flush=True)
+        threading.Thread(target=self._ready, args=(new,), daemon=True).start()
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                w = self._idle.get(timeout=max(remaining, 0.001))
+            except queue.Empty:
+                if isinstance(self.last_error, WorkerError) and not self._workers:
+                    raise self.last_error
+                raise TimeoutError("No idle predictor worker")
+
+            if w.dead:
+                continue
+            if not w.process.is_alive():
+                self._count("crashes")
+                self._replace(w, "not alive")
+                continue
+            return w
+
+    def _release(self, w):
+        if self.max_requests and w.requests >= self.max_requests:
+            self._count("recycled")
+            self._replace(w, f"recycled after {w.requests} requests")
+        else:
+            self._idle.put(w)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # 3) 워커 슬롯 대여: with pool.lease() as lease: lease.inputs[:B] = ...; out, version = lease.run(B)
+    @contextmanager
+    def lease(self):
+        self.start()
+        self._count("requests")
+        lease = _Lease(self, self._acquire(self.timeout))
+        try:
+            yield lease
+        finally:
+            if lease.worker is not None:
+                self._release(lease.worker)
+
+    # 배치 추론: (B, 24, 10) -> ((B, 24, 3), model_version), 슬롯보다 크면 나눠서 실행
+    def run(self, X):
+        with self.lease() as lease:
+            outs = []
+            version = None
+            for start in range(0, len(X), lease.rows):
+                chunk = X[start:start + lease.rows]
+                lease.inputs[:len(chunk)] = chunk
+                out, version = lease.run(len(chunk))
+                outs.append(out)
+
+        if len(outs) == 1:
+            return outs[0], version
+        return np.concatenate(outs), version
+
+    # 4) 헬스 체크: 죽은 워커 교체, 부족한 워커 보충, 놀고 있는 워커 ping
+    def _health_loop(self):
+        while not self._closed:
+            time.sleep(self.health_seconds)
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"[POOL ERROR] Health check failed: {e}", flush=True)
+
+    def check_health(self):
+        with self._lock:
+            workers = list(self._workers.values())
+
+        for w in workers:
+            if not w.process.is_alive() and not w.dead:
+                self._count("crashes")
+                # idle 큐에 남아 있는 경우 _acquire 에서 건너뜀
+                self._replace(w, "not alive")
+
+        with self._lock:
+            missing = self.size - len(self._workers)
+        for _ in range(max(missing, 0)):
+            threading.Thread(target=self._ready, args=(self._spawn(),), daemon=True).start()
+
+        for _ in range(self._idle.qsize()):
+            try:
+                w = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if w.dead:
+                continue
+            try:
+                reply = w.call(("ping",), self.timeout)
+                w.model_version = reply[1]
+            except Exception as e:
+                self._replace(w, f"ping failed: {e}")
+                continue
+            self._idle.put(w)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for w in workers:
+            w.dead = True
+            w.stop()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            workers = list(self._workers.values())
+
+        s["size"] = self.size
+        s["alive"] = sum(1 for w in workers if w.process.is_alive())
+        s["idle"] = self._idle.qsize()
+        s["max_requests"] = self.max_requests
+        s["slot_rows"] = self.slot_rows
+        s["last_error"] = str(self.last_error) if self.last_error else None
+        s["workers"] = [
+            {"id": w.id, "pid": w.process.pid, "requests": w.requests, "model_version": w.model_version}
+            for w in workers
+        ]
+        return s
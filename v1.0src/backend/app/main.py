@@ -1,13 +1,25 @@
 from dotenv import load_dotenv 
 load_dotenv()
 
+import os
+import threading
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect, text
 
 from app.database import Base, engine
 from app.models import *  # 모든 모델 import 후 테이블 생성
 from app.routers import auth, moods, usage, prediction, analysis, notifications, daily_summary
 from app.services.message_manager import SchedulerService
+from app.services.precompute_service import PrecomputeService
+from app.services.prediction_engine import AI_ENGINE_MODE, prediction_flights, prediction_admission, prediction_executor
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_log_writer import prediction_log_writer
+from app.utils.metrics import latency_metrics
+from ai_module.predictor import get_predictor
 
 
 # FastAPI APP
@@ -29,21 +41,123 @@ app.add_middleware(
 )
 
 
+# create_all 은 기존 테이블에 컬럼을 추가하지 않으므로, 나중에 추가된 컬럼은 여기서 보강
+# (table, column, DDL)
+ADDED_COLUMNS = [
+    ("prediction_logs", "model_version", "VARCHAR(64) NULL"),
+]
+
+
+def ensure_columns():
+    inspector = inspect(engine)
+    for table, column, ddl in ADDED_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        if column in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        print(f"Added column {table}.{column}")
+
+
 # DB 초기화
 def init_db():
     print("Creating DB tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_columns()
     print("DB table creation completed.")
 
 
+# 워밍업을 백그라운드 스레드에서 실행할지 여부 (true 면 서버는 바로 기동, /ready 는 완료 후 200)
+STARTUP_WARMUP_BACKGROUND = os.getenv("STARTUP_WARMUP_BACKGROUND", "false").lower() == "true"
+# 시작 시 미리 열어둘 DB 연결 수 (pool_size 이하)
+DB_POOL_PRIME_SIZE = int(os.getenv("DB_POOL_PRIME_SIZE", "4"))
+
+# /ready 상태 (로드밸런서는 모두 True 인 워커에만 트래픽 전달)
+readiness = {"model": False, "db": False, "errors": {}}
+_readiness_lock = threading.Lock()
+
+
+def _set_ready(name, ok, error=None):
+    with _readiness_lock:
+        readiness[name] = ok
+        if error:
+            readiness["errors"][name] = error
+        else:
+            readiness["errors"].pop(name, None)
+
+
+# AI 모델 상주 로드 + 워밍업 (워커 시작 시 1회)
+def load_predictor():
+    if AI_ENGINE_MODE == "subprocess":
+        _set_ready("model", True)
+        return
+    try:
+        get_predictor().warmup()
+        _set_ready("model", True)
+    except Exception as e:
+        # 모델 로드 실패 시에도 서버는 기동 (첫 요청에서 재시도), /ready 는 503 유지
+        print(f"[AI] Predictor load failed: {e}")
+        _set_ready("model", False, str(e))
+
+
+# DB 커넥션 풀 준비: 연결을 동시에 열어 SELECT 1 후 풀에 반납
+def prime_db_pool():
+    conns = []
+    try:
+        for _ in range(DB_POOL_PRIME_SIZE):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+        _set_ready("db", True)
+    except Exception as e:
+        print(f"[DB] Pool priming failed: {e}")
+        _set_ready("db", False, str(e))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def warmup():
+    prime_db_pool()
+    load_predictor()
+
+
+# sync 엔드포인트 스레드 풀 크기 (anyio 기본값 40 을 명시적으로 설정)
+# 예측 입장 제어(PREDICTION_MAX_CONCURRENCY + PREDICTION_MAX_QUEUE)는 이 중 절반 이하만 사용해야 함 (app/utils/admission.py)
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+
+
+# 스레드 풀 제한은 이벤트 루프 안에서만 설정 가능하므로 async 핸들러
+@app.on_event("startup")
+async def configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+
+    prediction_threads = prediction_admission.max_concurrency + prediction_admission.max_queue
+    if prediction_threads > API_THREADPOOL_SIZE // 2:
+        print(f"[WARN] Prediction admission allows {prediction_threads} of {API_THREADPOOL_SIZE} API threads; "
+              f"other endpoints may be starved under load")
+
+
 @app.on_event("startup")
 def on_startup():
     init_db()
+    if STARTUP_WARMUP_BACKGROUND:
+        threading.Thread(target=warmup, name="startup-warmup", daemon=True).start()
+    else:
+        warmup()
+    PrecomputeService.start()
     SchedulerService.start()
 
 @app.on_event("shutdown")
 def on_shutdown():
     SchedulerService.stop()
+    # 예산 초과 후 백그라운드에서 진행 중인 예측 계산이 결과를 저장할 때까지 대기
+    prediction_executor.shutdown(wait=True)
+    # 아직 저장되지 않은 PredictionLog 기록 저장
+    prediction_log_writer.close()
+    if AI_ENGINE_MODE == "pool":
+        get_predictor().pool.close()
 
 
 # Router 등록
@@ -61,3 +175,34 @@ app.include_router(notifications.router, prefix="/api/notifications", tags=["Not
 @app.get("/")
 def root():
     return {"status": "ok", "message": "Backend is running."}
+
+
+# 준비 상태 확인 (모델 워밍업 + DB 풀 준비 완료 전에는 503)
+@app.get("/ready")
+def ready():
+    # 이전 DB 준비가 실패했다면 (DB 가 늦게 뜬 경우) 폴링 시 재시도
+    if not readiness["db"] and "db" in readiness["errors"]:
+        prime_db_pool()
+
+    with _readiness_lock:
+        body = {
+            "status": "ready" if readiness["model"] and readiness["db"] else "not_ready",
+            "model": readiness["model"],
+            "db": readiness["db"],
+            "errors": dict(readiness["errors"]),
+        }
+    return JSONResponse(status_code=200 if body["status"] == "ready" else 503, content=body)
+
+
+# AI 추론 상태 (마이크로 배칭 queue depth / batch size / wait time 튜닝용)
+@app.get("/metrics")
+def metrics():
+    stats = get_predictor().stats()
+    stats["prediction_cache"] = prediction_cache.stats()
+    stats["prediction_log_writer"] = prediction_log_writer.stats()
+    stats["prediction_flights"] = prediction_flights.stats()
+    # 예측 입장 대기열 깊이 (자리를 기다리는 /today, /outlook 요청 수) / 거절 수
+    stats["prediction_admission"] = prediction_admission.stats()
+    # 단계별 지연 시간 히스토그램 (api.* / nightly.*)
+    stats["latency_ms"] = latency_metrics.snapshot()
+    return stats
@@ -4,4 +4,5 @@ from app.models.emotion_status_logs import EmotionStatusLog
 from app.models.app_usage_raw import AppUsageRaw
 from app.models.daily_summary import DailySummary
 from app.models.prediction_logs import PredictionLog
+from app.models.daily_predictions import DailyPrediction
 from app.models.notification_logs import NotificationLog
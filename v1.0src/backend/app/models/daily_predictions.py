@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, JSON, ForeignKey, UniqueConstraint, func
+from app.database import Base
+
+class DailyPrediction(Base):
+    # 하루 한 번 계산한 예측 결과 (user, 날짜, 기분, 상태, 모델 버전) 당 1행
+    # /api/prediction/today, 야간 알림이 모두 이 행을 읽음 -> 입력이 바뀔 때만 다시 계산
+    __tablename__ = "daily_predictions"
+    __table_args__ = (
+        UniqueConstraint("user_id", "prediction_date", "input_emotion", "input_status", "model_version",
+                         name="uq_daily_prediction"),
+    )
+
+    prediction_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+
+    prediction_date = Column(Date, nullable=False)       # 예측 대상 날짜 (오늘)
+    input_emotion = Column(String(20), nullable=False)
+    input_status = Column(String(20), nullable=False)
+    model_version = Column(String(64), nullable=False)
+
+    input_digest = Column(String(40), nullable=False)    # 어제 사용 기록 digest (바뀌면 다시 계산)
+    payload = Column(JSON, nullable=False)               # build_response 결과 (recommendations 제외)
+
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
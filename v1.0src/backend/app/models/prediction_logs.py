@@ -20,5 +20,7 @@ class PredictionLog(Base):
     risk_start_time = Column(Time, nullable=True) # 예측된 앱 사용 위험 시간대 시작 시간
     risk_end_time = Column(Time, nullable=True)   # 예측된 앱 사용 위험 시간대 종료 시간
 
+    model_version = Column(String(64), nullable=True)  # 예측을 만든 모델 버전 (model_registry)
+
     created_at = Column(DateTime, server_default=func.now())
 
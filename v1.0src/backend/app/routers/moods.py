@@ -5,6 +5,10 @@ from app.database import get_db
 from app.schemas.moods import MoodCreateRequest, MoodCreateResponse
 from app.models.emotion_status_logs import EmotionStatusLog
 from app.utils.security import get_current_user  # ← JWT 적용!
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_engine import PredictionEngine
+from app.services.precompute_service import PrecomputeService
+from datetime import date
 
 router = APIRouter()
 
@@ -22,9 +26,15 @@ def create_mood(
     )
 
     db.add(mood)
+    # 기분/상태 변경 -> 오늘 이후의 예측(daily_predictions) 삭제 (기분 기록과 같은 트랜잭션)
+    PredictionEngine.invalidate_materialized_from(db, user.user_id, date.today())
     db.commit()
     db.refresh(mood)
 
+    # 해당 사용자의 예측 캐시 무효화 + 새 기분으로 오늘 예측을 백그라운드에서 다시 계산
+    prediction_cache.invalidate_user(user.user_id)
+    PrecomputeService.schedule_for_mood(user.user_id)
+
     return MoodCreateResponse(
         emotion_id=mood.emotion_id,
         emotion=mood.emotion,
@@ -1,47 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.database import get_db
 from app.utils.security import get_current_user
-from app.schemas.prediction import PredictionResponse, MoodDescriptionResponse
-from app.services.prediction_engine import PredictionEngine
+from app.schemas.prediction import PredictionResponse, OutlookResponse, MoodDescriptionResponse
+from app.services.prediction_engine import PredictionEngine, PREDICTION_LATENCY_BUDGET_MS, AI_OUTLOOK_MAX_DAYS
+from app.utils.metrics import StageTimer, PREDICTION_TIMING_HEADER
+from app.utils.admission import AdmissionRejected
 from app.models.users import User
-from app.models.emotion_status_logs import EmotionStatusLog
 
 router = APIRouter()
 
 
 @router.get("/today", response_model=PredictionResponse)
 def predict_today(
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    
+    # 단계별 시간 측정 (/metrics 히스토그램, 디버그 시 Server-Timing 헤더)
+    timer = StageTimer("api")
+
     # [NEW] Fetch latest Emotion/Status from DB
-    latest_log = (
-        db.query(EmotionStatusLog)
-        .filter(EmotionStatusLog.user_id == current_user.user_id)
-        .order_by(EmotionStatusLog.created_at.desc())
-        .first()
-    )
-    
-    if latest_log:
-        emotion = latest_log.emotion
-        status = latest_log.status
-    else:
-        # Fallback default
-        emotion = "NORMAL"
-        status = "FREE"
+    # 기록이 없으면 사전 계산과 같은 기본값 (저장된 예측의 키와 일치)
+    with timer.stage("mood_query"):
+        emotion, status = PredictionEngine.get_latest_mood(current_user.user_id, db)
 
     # Prediction Engine 실행 (DB 로깅은 Engine 내부에서 처리됨)
-    result = PredictionEngine.predict(
-        user=current_user,
-        emotion=emotion,
-        status=status,
-        db=db
-    )
-    
+    # 미리 계산된 오늘의 예측 (사용 기록 업로드 후 사전 계산 / 이전 요청) 은 predict 가 캐시 -> daily_predictions 순서로 조회
+    # (어제 사용 기록 digest 가 같은 행만 사용)
+    # 과부하로 입장이 거절되고 간이 예측도 불가능하면 바로 503 (클라이언트는 Retry-After 후 재시도)
+    try:
+        result = PredictionEngine.predict(
+            user=current_user,
+            emotion=emotion,
+            status=status,
+            db=db,
+            timer=timer,
+            budget_ms=PREDICTION_LATENCY_BUDGET_MS,
+            admission=True
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    if PREDICTION_TIMING_HEADER:
+        response.headers["Server-Timing"] = timer.header_value()
+
+    return result
+
+@router.get("/outlook", response_model=OutlookResponse)
+def predict_outlook(
+    response: Response,
+    days: int = Query(AI_OUTLOOK_MAX_DAYS, ge=1, le=AI_OUTLOOK_MAX_DAYS),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    오늘부터 days 일 동안의 날짜별 위험도와 시간대별 예측을 한 번의 추론으로 반환합니다.
+    """
+    timer = StageTimer("outlook")
+    try:
+        result = PredictionEngine.predict_outlook(current_user, db, days=days, timer=timer, admission=True)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    if PREDICTION_TIMING_HEADER:
+        response.headers["Server-Timing"] = timer.header_value()
+
     return result
 
 @router.get("/description", response_model=MoodDescriptionResponse)
@@ -53,18 +87,6 @@ def get_mood_description(
     기분과 상태를 DB에서 조회하여
     제목(아이콘 포함)과 친절한 설명 멘트를 반환합니다.
     """
-    latest_log = (
-        db.query(EmotionStatusLog)
-        .filter(EmotionStatusLog.user_id == current_user.user_id)
-        .order_by(EmotionStatusLog.created_at.desc())
-        .first()
-    )
-    
-    if latest_log:
-        emotion = latest_log.emotion
-        status = latest_log.status
-    else:
-        emotion = "NORMAL"
-        status = "FREE"
+    emotion, status = PredictionEngine.get_latest_mood(current_user.user_id, db)
 
     return PredictionEngine.get_mood_details(emotion, status)
@@ -9,6 +9,9 @@ from app.models.app_usage_raw import AppUsageRaw
 from typing import List
 from app.utils.security import get_current_user
 from app.utils.constants import CATEGORY_MAP
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_engine import PredictionEngine
+from app.services.precompute_service import PrecomputeService
 
 router = APIRouter()
 
@@ -82,9 +85,20 @@ def upload_usage_batch(
     # 3. Bulk Insert
     if new_records:
         db.bulk_save_objects(new_records)
+
+    # 4. 바뀐 날짜를 입력으로 쓰는 예측(daily_predictions) 삭제 (사용 기록과 같은 트랜잭션)
+    usage_dates = {d_obj for (d_obj, _) in slots_to_delete}
+    PredictionEngine.invalidate_materialized(db, user_id, usage_dates)
         
     db.commit()
 
+    # 새 사용 기록 -> 해당 사용자의 예측 캐시 무효화
+    prediction_cache.invalidate_user(user_id)
+    PredictionEngine.invalidate_encoder_state(user_id, usage_dates)
+
+    # 5. 다음 날 예측을 백그라운드에서 미리 계산
+    PrecomputeService.schedule_for_usage(user_id, usage_dates)
+
     return UsageBatchResponse(
         saved_count=len(new_records),
         message="Batch upload successful"
@@ -41,6 +41,19 @@ class PredictionResponse(BaseModel):
     hourly_forecast: list[float]
     recommendations: list[Recommendation]
 
+    model_version: Optional[str] = None  # 예측을 만든 모델 버전
+    degraded: bool = False  # 지연 시간 예산 초과 / 추론 실패로 간이 예측(daily_summary EWMA)을 반환한 경우
+
+class OutlookDay(BaseModel):
+    analysis_date: str
+    risk_analysis: RiskAnalysis
+    hourly_forecast: list[float]
+
+class OutlookResponse(BaseModel):
+    user_id: int
+    days: list[OutlookDay]  # 오늘부터 날짜 순, 예측할 수 없으면 빈 목록
+    model_version: Optional[str] = None
+
 class MoodDescriptionResponse(BaseModel):
     title: str
     description: str
@@ -0,0 +1,87 @@
+# app/services/baseline_predictor.py
+# 지연 시간 예산 초과 / 추론 실패 시 사용하는 간이 예측 (degraded)
+# 사용자의 최근 N 일 daily_summary 슬롯(30분, 카테고리별 ms)을 시간 단위 (24, 3) 로 모은 뒤
+# 최근 날짜에 더 큰 가중치를 주는 EWMA 로 평균 -> GRU 출력과 같은 형식이므로 summarize_prediction 으로 같은 JSON 생성
+
+import os
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.daily_summary import DailySummary
+from ai_module.predict import summarize_prediction
+
+BASELINE_DAYS = int(os.getenv("BASELINE_DAYS", "14"))
+# EWMA 가중치: 하루 전 1, 이틀 전 (1 - alpha), ...
+BASELINE_EWMA_ALPHA = float(os.getenv("BASELINE_EWMA_ALPHA", "0.3"))
+
+BASELINE_MODEL_VERSION = "baseline-ewma"
+
+
+class BaselinePredictor:
+
+    # 1) 최근 N 일 슬롯 -> (일 수, 24, 3) 시간 단위 사용 비율 (모델 출력 단위: 1 = 1시간 내내 사용)
+    @staticmethod
+    def fetch_hourly_usage(user_id: int, db: Session, prediction_date: date = None, days: int = BASELINE_DAYS):
+        prediction_date = prediction_date or date.today()
+        rows = (
+            db.query(
+                DailySummary.date,
+                DailySummary.slot_index,
+                DailySummary.sns_ms,
+                DailySummary.game_ms,
+                DailySummary.other_ms,
+            )
+            .filter(
+                DailySummary.user_id == user_id,
+                DailySummary.date >= prediction_date - timedelta(days=days),
+                DailySummary.date < prediction_date,
+            )
+            .all()
+        )
+        if not rows:
+            return None, None
+
+        data = np.array(
+            [((prediction_date - r.date).days - 1, r.slot_index, r.sns_ms or 0, r.game_ms or 0, r.other_ms or 0)
+             for r in rows],
+            dtype=np.int64,
+        )
+        age, slot = data[:, 0], data[:, 1]
+        valid = (slot >= 0) & (slot < 48)
+
+        hourly = np.zeros((days, 24, 3), dtype=np.float64)
+        np.add.at(hourly, (age[valid], slot[valid] // 2), data[valid, 2:5])
+        return hourly / 3_600_000.0, np.unique(age[valid])
+
+    # 2) EWMA: 데이터가 있는 날만 가중 평균 (age 0 = 예측 전날)
+    @staticmethod
+    def ewma(hourly, ages, alpha: float = BASELINE_EWMA_ALPHA):
+        weights = (1.0 - alpha) ** ages
+        matrix = np.tensordot(weights, hourly[ages], axes=1) / weights.sum()
+        # 여러 앱 동시 기록 등으로 한 시간 합이 1 을 넘으면 비율 유지하며 1 로 맞춤
+        totals = matrix.sum(axis=1, keepdims=True)
+        return (matrix / np.maximum(totals, 1.0)).astype(np.float32)
+
+    # 3) (24, 3) -> AI 엔진과 같은 결과 형식, 데이터가 없으면 None
+    @staticmethod
+    def predict(user_id: int, emotion: str, status: str, db: Session, prediction_date: date = None):
+        prediction_date = prediction_date or date.today()
+        try:
+            hourly, ages = BaselinePredictor.fetch_hourly_usage(user_id, db, prediction_date)
+        except Exception as e:
+            print(f"[BASELINE ERROR] {e}")
+            db.rollback()
+            return None
+        if hourly is None or len(ages) == 0:
+            return None
+
+        matrix = BaselinePredictor.ewma(hourly, ages)
+        result = summarize_prediction(
+            matrix,
+            {"user_id": user_id, "emotion": emotion, "status": status},
+            {"analysis_date": str(prediction_date), "input_type": "baseline"},
+        )
+        result["model_version"] = BASELINE_MODEL_VERSION
+        return result
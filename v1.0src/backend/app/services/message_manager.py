@@ -6,6 +6,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.users import User
+from app.utils.job_lock import single_runner
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 
@@ -13,42 +14,75 @@ from google.auth.transport.requests import Request
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 야간 배치에서 한 번에 처리할 사용자 수 (쿼리 IN 절 / 추론 배치 크기 제한)
+NIGHTLY_CHUNK_SIZE = int(os.getenv("NIGHTLY_CHUNK_SIZE", "500"))
+
 def send_nightly_notifications():
+    # uvicorn 워커마다 같은 cron 이 실행됨 -> Lock 을 잡은 한 워커만 알림 전송 (중복 푸시 방지)
+    db: Session = SessionLocal()
+    try:
+        bind = db.get_bind()
+    finally:
+        db.close()
+
+    with single_runner("nightly_notification", bind) as acquired:
+        if not acquired:
+            logger.info("Nightly notification job is running in another worker, skipped")
+            return
+        run_nightly_notifications()
+
+def run_nightly_notifications():
     
     # 매일 실행되는 배치 작업
-    # 모든 유저(혹은 대상 유저)에 대해 알림 메시지를 생성하고 전송
+    # FCM 토큰이 있는 유저에 대해 알림 메시지를 생성하고 전송
+    # 예측은 사용자별로 실행하지 않고, 청크 단위로 묶어서 한 번에 실행 (PredictionEngine.predict_batch)
     
     logger.info("Starting nightly notification job...")
     
     # Deferred Import to avoid Circular Import
     from app.services.notification_service import get_nightly_notification_message
+    from app.services.prediction_engine import PredictionEngine
     
     db: Session = SessionLocal()
     try:
-        users = db.query(User).all()
+        users = (
+            db.query(User)
+            .filter(User.fcm_token.isnot(None), User.fcm_token != "")
+            .order_by(User.user_id.asc())
+            .all()
+        )
+        logger.info(f"Nightly targets: {len(users)} users")
+
+        for start in range(0, len(users), NIGHTLY_CHUNK_SIZE):
+            chunk = users[start:start + NIGHTLY_CHUNK_SIZE]
 
-        for user in users:
             try:
-                if not user.fcm_token:
-                    continue
-                
-                logger.info(f"Processing notification for user {user.user_id}")
-                
-                msg_data = get_nightly_notification_message(db, user)
-                
-                title = msg_data.get("title")
-                body = msg_data.get("body")
-                
-                if title and body:
-                    success = MessageManager.send_push_notification(user.fcm_token, title, body)
-                    if success:
-                        logger.info(f"Notification sent to user {user.user_id}")
-                    else:
-                        logger.warning(f"Failed to send notification to user {user.user_id}")
-            
+                predictions = PredictionEngine.predict_batch(chunk, db)
             except Exception as e:
-                logger.error(f"Error processing user {user.user_id}: {e}")
-                continue
+                logger.error(f"Batch prediction failed for users {chunk[0].user_id}~{chunk[-1].user_id}: {e}")
+                db.rollback()
+                predictions = {}
+
+            for user in chunk:
+                try:
+                    logger.info(f"Processing notification for user {user.user_id}")
+                    
+                    # 배치 예측 결과가 없으면 get_nightly_notification_message 가 단건 예측으로 대체
+                    msg_data = get_nightly_notification_message(db, user, prediction=predictions.get(user.user_id))
+                    
+                    title = msg_data.get("title")
+                    body = msg_data.get("body")
+                    
+                    if title and body:
+                        success = MessageManager.send_push_notification(user.fcm_token, title, body)
+                        if success:
+                            logger.info(f"Notification sent to user {user.user_id}")
+                        else:
+                            logger.warning(f"Failed to send notification to user {user.user_id}")
+                
+                except Exception as e:
+                    logger.error(f"Error processing user {user.user_id}: {e}")
+                    continue
 
     except Exception as e:
         logger.error(f"Error in nightly notification job: {e}")
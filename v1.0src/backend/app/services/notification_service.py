@@ -65,13 +65,15 @@ def get_recent_notifications(db: Session, user_id: int):
     }
 
 
-def get_nightly_notification_message(db: Session, user):
+def get_nightly_notification_message(db: Session, user, prediction: dict = None):
     from app.services.prediction_engine import PredictionEngine
     from app.services.message_manager import MessageManager
 
     # 1. Get Prediction (Risk Level)
+    # 야간 배치에서는 PredictionEngine.predict_batch 결과를 전달받음
     # predict() : 감정 상태 로그가 없으면 최근 로그를 가져옴
-    prediction = PredictionEngine.predict(user=user, db=db)
+    if prediction is None:
+        prediction = PredictionEngine.predict(user=user, db=db)
     
     risk_data = prediction.get("risk_analysis", {})
     level = risk_data.get("level", "SAFE")
@@ -0,0 +1,160 @@
+# app/services/precompute_service.py
+# 사용 기록 업로드 후 예측 사전 계산
+# D 일 사용 기록이 들어오면 그 기록을 입력으로 쓰는 예측(D+1 일 ~)을 백그라운드(SchedulerService 의 APScheduler)에서
+# 미리 계산하여 daily_predictions 에 저장. 업로드마다 실제로 응답할 날짜의 작업을 예약:
+# - 어제 기록 (끝난 날) -> 오늘 예측을 PRECOMPUTE_DELAY_SECONDS 뒤에 계산
+# - 오늘 기록 (진행 중) -> 내일 예측을 자정 이후 사용자별 시각(night_slot)에 계산
+#   하루 종일 올라오는 부분 기록으로 반복 추론하지 않고, 사용자마다 다른 시각이라 자정에 한꺼번에 몰리지 않음
+#   (00:PRECOMPUTE_ROLLOVER_MINUTE 부터 PRECOMPUTE_SPREAD_MINUTES 동안 분산)
+# - 같은 (사용자, 날짜) 작업은 replace_existing 으로 덮어써서, 연속 업로드가 끝난 뒤 한 번만 실행 (디바운스)
+# - 분산 구간이 끝나면 precompute_rollover 가 놓친 사용자만 보충 (재시작으로 사라진 예약 등, 저장된 예측은 건너뜀)
+#   워커마다 같은 cron 이 실행되므로 single_runner Lock 을 잡은 한 워커만 실행
+# - 아침에 앱을 열면 /api/prediction/today 는 저장된 행만 읽음 -> 추론 부하가 하루 동안 분산됨
+
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from app.database import SessionLocal
+from app.models.app_usage_raw import AppUsageRaw
+from app.models.users import User
+from app.services.message_manager import NIGHTLY_CHUNK_SIZE, SchedulerService
+from app.utils.job_lock import single_runner
+from app.utils.metrics import StageTimer
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true"
+# 마지막 업로드 후 계산까지 대기 시간 (초)
+PRECOMPUTE_DELAY_SECONDS = int(os.getenv("PRECOMPUTE_DELAY_SECONDS", "120"))
+# 오늘 기록으로 계산하는 내일 예측의 시작 시각 (00:MM)
+PRECOMPUTE_ROLLOVER_MINUTE = int(os.getenv("PRECOMPUTE_ROLLOVER_MINUTE", "10"))
+# 내일 예측을 사용자별로 나누어 계산하는 구간 (분), 구간이 끝나면 precompute_rollover 가 보충
+PRECOMPUTE_SPREAD_MINUTES = int(os.getenv("PRECOMPUTE_SPREAD_MINUTES", "240"))
+
+
+def precompute_prediction(user_id: int, prediction_date: str):
+    from app.services.prediction_engine import PredictionEngine
+
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        if user is None:
+            return
+        # 입력 날짜의 사용 기록이 없으면 간이 예측만 나오므로 요청 시점에 처리
+        target = date.fromisoformat(prediction_date)
+        if not PredictionEngine.fetch_recent_usage(user_id, db, target):
+            return
+        result = PredictionEngine.predict(
+            user=user, db=db, timer=StageTimer("precompute"), prediction_date=target
+        )
+        level = result.get("risk_analysis", {}).get("level")
+        logger.info(f"[Precompute] user {user_id} {prediction_date}: {level}")
+    except Exception as e:
+        logger.error(f"[Precompute] Failed for user {user_id} {prediction_date}: {e}")
+    finally:
+        db.close()
+
+
+# 분산 구간이 끝난 뒤: 어제 사용 기록이 있는데 오늘 예측이 없는 사용자를 청크 단위 배치로 계산
+# (이미 저장된 예측은 predict_batch 가 건너뜀 -> 다시 실행되어도 안전)
+def precompute_rollover():
+    from app.services.prediction_engine import PredictionEngine
+
+    db = SessionLocal()
+    try:
+        with single_runner("precompute_rollover", db.get_bind()) as acquired:
+            if not acquired:
+                logger.info("[Precompute] Rollover is running in another worker, skipped")
+                return
+
+            today = date.today()
+            yesterday = today - timedelta(days=1)
+            active = db.query(AppUsageRaw.user_id).filter(AppUsageRaw.usage_date == yesterday).distinct()
+            users = db.query(User).filter(User.user_id.in_(active)).order_by(User.user_id.asc()).all()
+
+            for start in range(0, len(users), NIGHTLY_CHUNK_SIZE):
+                chunk = users[start:start + NIGHTLY_CHUNK_SIZE]
+                try:
+                    PredictionEngine.predict_batch(chunk, db, timer=StageTimer("precompute"), prediction_date=today)
+                except Exception as e:
+                    logger.error(f"[Precompute] Rollover failed for users {chunk[0].user_id}~{chunk[-1].user_id}: {e}")
+                    db.rollback()
+            logger.info(f"[Precompute] Rollover done for {len(users)} users")
+    except Exception as e:
+        logger.error(f"[Precompute] Rollover failed: {e}")
+    finally:
+        db.close()
+
+
+class PrecomputeService:
+
+    # 분산 구간이 끝나는 시각에 보충 작업 등록 (SchedulerService.start 전에 호출)
+    @staticmethod
+    def start():
+        if not PRECOMPUTE_ENABLED:
+            return
+        hour, minute = divmod(PRECOMPUTE_ROLLOVER_MINUTE + PRECOMPUTE_SPREAD_MINUTES, 60)
+        SchedulerService.scheduler.add_job(
+            precompute_rollover,
+            'cron',
+            hour=hour % 24,
+            minute=minute,
+            id='precompute_rollover',
+            replace_existing=True,
+        )
+
+    # 업로드된 사용 기록 날짜 -> 그 기록을 입력으로 쓰는 예측 중 응답할 날짜(오늘 / 내일)의 작업 예약
+    # 오늘 예측: 입력이 확정된 기록이므로 바로 (디바운스), 내일 예측: 오늘 기록이 끝난 뒤 사용자별 시각
+    # 지난 날짜의 예측은 다시 요청되지 않으므로 예약하지 않음
+    @staticmethod
+    def schedule_for_usage(user_id: int, usage_dates):
+        if not PRECOMPUTE_ENABLED:
+            return []
+        from app.services.prediction_engine import PredictionEngine
+
+        today = date.today()
+        tomorrow = today + timedelta(days=1)
+        affected = PredictionEngine.affected_prediction_dates(usage_dates)
+        scheduled = []
+        if today in affected:
+            PrecomputeService.schedule(user_id, today)
+            scheduled.append(today)
+        if tomorrow in affected:
+            PrecomputeService.schedule(user_id, tomorrow, run_date=PrecomputeService.night_slot(user_id, tomorrow))
+            scheduled.append(tomorrow)
+        return scheduled
+
+    # 기분/상태 입력 -> 오늘 예측 다시 계산 (같은 작업 id 로 디바운스)
+    @staticmethod
+    def schedule_for_mood(user_id: int):
+        if not PRECOMPUTE_ENABLED:
+            return None
+        today = date.today()
+        PrecomputeService.schedule(user_id, today)
+        return today
+
+    # prediction_date 예측을 계산할 사용자별 시각: 00:PRECOMPUTE_ROLLOVER_MINUTE + 사용자별 오프셋 (분산 구간 안)
+    # 사용자마다 고정된 값이라 같은 날의 반복 업로드는 같은 시각의 작업을 덮어씀
+    @staticmethod
+    def night_slot(user_id: int, prediction_date: date):
+        offset = (user_id * 2654435761) % max(PRECOMPUTE_SPREAD_MINUTES * 60, 1)
+        return (
+            datetime.combine(prediction_date, datetime.min.time())
+            + timedelta(minutes=PRECOMPUTE_ROLLOVER_MINUTE, seconds=offset)
+        )
+
+    # run_date 가 없거나 지났으면 delay_seconds 뒤에 실행
+    @staticmethod
+    def schedule(user_id: int, prediction_date: date, delay_seconds: int = PRECOMPUTE_DELAY_SECONDS,
+                 run_date: datetime = None):
+        earliest = datetime.now() + timedelta(seconds=delay_seconds)
+        SchedulerService.scheduler.add_job(
+            precompute_prediction,
+            'date',
+            run_date=max(run_date, earliest) if run_date else earliest,
+            args=[user_id, prediction_date.isoformat()],
+            id=f"precompute:{user_id}:{prediction_date.isoformat()}",
+            replace_existing=True,
+            misfire_grace_time=3600,
+        )
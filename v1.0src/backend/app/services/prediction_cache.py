@@ -0,0 +1,95 @@
+# app/services/prediction_cache.py
+# 예측 결과 캐시 (TTL + LRU)
+# /api/prediction/today 는 앱을 열 때마다 호출되지만 입력(최신 기분/상태, 어제 사용 기록, 모델)은 하루 중 거의 바뀌지 않음.
+# 키: (user_id, emotion, status, usage_date, 사용 기록 digest, model_version)
+# - 키에 입력값이 모두 포함되므로 입력이 바뀌면 자동으로 miss
+# - 추가로 /api/usage/batch, /api/moods 쓰기 시 해당 사용자 항목을 즉시 무효화 (메모리 회수)
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PREDICTION_CACHE_TTL_SECONDS = int(os.getenv("PREDICTION_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+PREDICTION_CACHE_MAX_SIZE = int(os.getenv("PREDICTION_CACHE_MAX_SIZE", "10000"))
+
+
+class PredictionCache:
+
+    def __init__(self, max_size=PREDICTION_CACHE_MAX_SIZE, ttl_seconds=PREDICTION_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # 1) 캐시 키 생성
+    @staticmethod
+    def make_key(user_id, emotion, status, usage_date, seq, model_version):
+        digest = PredictionCache.input_digest(seq)
+        return (user_id, emotion, status, str(usage_date), digest, model_version)
+
+    # 사용 기록 digest (daily_predictions.input_digest 와 동일)
+    @staticmethod
+    def input_digest(seq):
+        return hashlib.sha1(
+            json.dumps(seq, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    # 2) 조회 (만료 항목은 제거, 적중 시 LRU 갱신)
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = item
+            if expires_at < now:
+                del self._data[key]
+                self._misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._hits += 1
+
+        # 호출자가 결과를 수정해도 캐시 원본은 유지되도록 복사본 반환
+        return copy.deepcopy(value)
+
+    # 3) 저장 (용량 초과 시 가장 오래 사용되지 않은 항목부터 제거)
+    # ttl(초)을 주면 해당 항목만 다른 만료 시간 사용 (degraded 결과 등)
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    # 4) 사용자 단위 무효화 (새 사용 기록 / 기분 입력 시)
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# 워커 프로세스 당 하나의 캐시 공유
+prediction_cache = PredictionCache()
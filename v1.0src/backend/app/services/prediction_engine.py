@@ -1,12 +1,20 @@
+import copy
 import json
 import os
 import subprocess
 import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from sqlalchemy import and_, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.orm import Session
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
+from app.database import SessionLocal
 from app.models.app_usage_raw import AppUsageRaw
 from app.models.prediction_logs import PredictionLog
+from app.models.daily_predictions import DailyPrediction
 from app.models.emotion_status_logs import EmotionStatusLog
 from app.services.message_manager import MessageManager
 from app.services.notification_service import (
@@ -14,41 +22,64 @@ from app.services.notification_service import (
     save_notification_log,
 )
 
-# 현재 파일 위치: v0.6src/backend/app/services/prediction_engine.py
-CURRENT_FILE = os.path.abspath(__file__)
-
-# backend/app/services → backend/app → backend → v0.7src
-BASE_DIR = os.path.dirname(
-    os.path.dirname(
-        os.path.dirname(
-            os.path.dirname(CURRENT_FILE)
-        )
-    )
-)
-
-# v0.7src/backend/ai_module/predict.py
-AI_SCRIPT = os.path.join(BASE_DIR, "backend", "ai_module", "predict.py")
-AI_SCRIPT = "/home/t25335/v0.7src/backend/ai_module/predict.py"
-
-print("[DEBUG] USING prediction_engine.py AT:", __file__)
-print("[DEBUG] BASE_DIR:", BASE_DIR)
-print("[DEBUG] AI_SCRIPT:", AI_SCRIPT)
+# backend/app/services/prediction_engine.py -> backend
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# backend/ai_module/predict.py (AI_ENGINE_MODE=subprocess 전용)
+AI_SCRIPT = os.path.join(BACKEND_DIR, "ai_module", "predict.py")
 
 from app.utils.pattern_analyzer import analyze_patterns
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_log_writer import prediction_log_writer
+from app.services.baseline_predictor import BaselinePredictor
+from app.utils.metrics import StageTimer
+from app.utils.single_flight import SingleFlight
+from app.utils.admission import AdmissionGate, AdmissionRejected
+from app.utils.constants import DEFAULT_EMOTION, DEFAULT_STATUS
+from ai_module.encoder_state import UserHistory
+from ai_module.predictor import AI_ENGINE_MODE, AI_OUTLOOK_MAX_DAYS, get_predictor
 import random
 
-# Global Lock to prevent concurrent GPU access
+# AI 엔진 실행 방식 (AI_ENGINE_MODE): "inprocess" (기본, 상주 Predictor) | "pool" (상주 워커 프로세스 풀)
+# | "subprocess" (기존 predict.py 실행)
+
+# Global Lock to prevent concurrent GPU access (subprocess 경로 전용)
 _ai_execution_lock = threading.Lock()
 
+# 동일 입력(cache_key) 동시 예측 합치기
+prediction_flights = SingleFlight()
+# API 요청의 예측 계산 동시 실행 / 대기열 제한 (야간 배치 / 사전 계산은 제외)
+prediction_admission = AdmissionGate()
+# 예산이 있는 API 예측의 계산 스레드 (요청 스레드는 예산만큼만 기다림)
+# 입장은 요청 스레드에서 submit 전에 결정되므로 (predict_within_budget) 실행 중인 작업은 최대 max_concurrency 개
+# -> executor 내부 대기열에 작업이 쌓이지 않음
+prediction_executor = ThreadPoolExecutor(
+    max_workers=prediction_admission.max_concurrency,
+    thread_name_prefix="prediction"
+)
+
+# /api/prediction/today 의 AI 응답 대기 한도 (ms), 0 이면 제한 없음
+# 초과 시 daily_summary EWMA 로 응답 (degraded), 계산은 백그라운드에서 끝까지 진행되어 저장됨
+PREDICTION_LATENCY_BUDGET_MS = float(os.getenv("PREDICTION_LATENCY_BUDGET_MS", "800"))
+# AI_ENGINE_MODE=subprocess 의 predict.py 실행 한도 (초, Lock 대기 포함), 요청 예산과 별개
+AI_SUBPROCESS_TIMEOUT_SECONDS = float(os.getenv("AI_SUBPROCESS_TIMEOUT_SECONDS", "20"))
+# 추론 실패 / 입력 부족으로 만든 degraded 결과의 캐시 시간 (초): 같은 입력의 반복 요청이 다시 계산 / 기록하지 않도록
+PREDICTION_DEGRADED_TTL_SECONDS = int(os.getenv("PREDICTION_DEGRADED_TTL_SECONDS", "300"))
+
+# degraded 결과의 PredictionLog 기록 여부: (user_id, 예측 날짜) 당 한 번 (워커 프로세스 단위)
+_degraded_logged = OrderedDict()
+_degraded_logged_lock = threading.Lock()
+DEGRADED_LOGGED_MAX = 100000
+
 class PredictionEngine:
 
     # 1) 최근 사용 기록 조회
+    # prediction_date: 예측 대상 날짜 (기본 오늘, 사전 계산 시 내일)
     @staticmethod
-    def fetch_recent_usage(user_id: int, db: Session):
+    def fetch_recent_usage(user_id: int, db: Session, prediction_date: date = None):
         # Enforce Standard Window: Provide data for "Yesterday" (00:00~23:59)
         # to predict "Today".
-        today = date.today()
+        today = prediction_date or date.today()
         target_date = today - timedelta(days=1)
 
         rows = (
@@ -61,41 +92,208 @@ class PredictionEngine:
             .all()
         )
 
-        return [
-            {
-                "usage_date": str(r.usage_date),
-                "category": r.category,
-                "package_name": r.package_name,
-                "duration_ms": r.duration_ms,
-                "start_time": str(r.start_time) if r.start_time else None,
-            }
-            for r in rows
-        ]
+        return [PredictionEngine.usage_row_to_dict(r) for r in rows]
 
-    # ... (call_ai_engine, determine_level, get_mood_description, get_recommendations omitted - no changes needed)
+    # 1-1) 여러 사용자의 어제 사용 기록을 한 번의 쿼리로 조회 (야간 배치 / 자정 사전 계산용)
+    @staticmethod
+    def fetch_recent_usage_batch(user_ids: list, db: Session, prediction_date: date = None):
+        target_date = (prediction_date or date.today()) - timedelta(days=1)
 
+        rows = (
+            db.query(AppUsageRaw)
+            .filter(
+                AppUsageRaw.user_id.in_(user_ids),
+                AppUsageRaw.usage_date == target_date
+            )
+            .order_by(AppUsageRaw.user_id.asc(), AppUsageRaw.start_time.asc())
+            .all()
+        )
 
-    # 2) AI 엔진 subprocess 호출 (Existing logic kept for Risk Score)
+        seq_by_user = {uid: [] for uid in user_ids}
+        for r in rows:
+            seq_by_user[r.user_id].append(PredictionEngine.usage_row_to_dict(r))
+        return seq_by_user
+
+    # 1-2) 기간 사용 기록 -> 날짜별 입력 목록 (입력 창이 하루보다 긴 모델의 이전 날짜 인코딩용)
     @staticmethod
-    def call_ai_engine(emotion: str, status: str, seq_data: list):
-        # predict_risk.py 에 JSON을 stdin으로 보내고 stdout에서 결과 받기
-        
-        input_json = json.dumps({
+    def fetch_usage_range(user_id: int, db: Session, start: date, end: date):
+        rows = (
+            db.query(AppUsageRaw)
+            .filter(
+                AppUsageRaw.user_id == user_id,
+                AppUsageRaw.usage_date >= start,
+                AppUsageRaw.usage_date <= end
+            )
+            .order_by(AppUsageRaw.usage_date.asc(), AppUsageRaw.start_time.asc())
+            .all()
+        )
+
+        seq_by_date = {}
+        for r in rows:
+            seq_by_date.setdefault(r.usage_date, []).append(PredictionEngine.usage_row_to_dict(r))
+        return [seq_by_date.get(start + timedelta(days=i), []) for i in range((end - start).days + 1)]
+
+    # 1-3) Predictor 의 사용자별 encoder 상태 캐시에 넘길 이전 날짜 정보 (캐시에 상태가 없을 때만 조회됨)
+    # 이전 날짜는 그날 기록된 기분/상태로 인코딩 (학습 데이터와 같이 현재 기분과 무관)
+    @staticmethod
+    def user_history(user_id: int, db: Session, prediction_date: date = None):
+        def fetch(start, end):
+            moods = PredictionEngine.fetch_moods_by_day(user_id, db, start, end)
+            return [
+                {"emotion": emotion, "status": status, "seq_data": seq}
+                for (emotion, status), seq in zip(moods, PredictionEngine.fetch_usage_range(user_id, db, start, end))
+            ]
+
+        usage_date = (prediction_date or date.today()) - timedelta(days=1)
+        return UserHistory(user_id, usage_date - timedelta(days=1), fetch)
+
+    # 1-4) start~end 날짜별 기분/상태: 그날의 마지막 기록, 없으면 이전 기록을 이어서 사용 (처음 기록 전은 기본값)
+    @staticmethod
+    def fetch_moods_by_day(user_id: int, db: Session, start: date, end: date):
+        start_at = datetime.combine(start, datetime.min.time())
+        end_at = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        order = (EmotionStatusLog.created_at.desc(), EmotionStatusLog.emotion_id.desc())
+
+        before = (
+            db.query(EmotionStatusLog)
+            .filter(EmotionStatusLog.user_id == user_id, EmotionStatusLog.created_at < start_at)
+            .order_by(*order)
+            .first()
+        )
+        rows = (
+            db.query(EmotionStatusLog)
+            .filter(
+                EmotionStatusLog.user_id == user_id,
+                EmotionStatusLog.created_at >= start_at,
+                EmotionStatusLog.created_at < end_at
+            )
+            .order_by(*order)
+            .all()
+        )
+
+        last_by_date = {}
+        for r in rows:
+            # 최신 순이므로 날짜별 첫 행이 그날의 마지막 기록
+            last_by_date.setdefault(r.created_at.date(), (r.emotion, r.status))
+
+        mood = (before.emotion, before.status) if before else (DEFAULT_EMOTION, DEFAULT_STATUS)
+        moods = []
+        for i in range((end - start).days + 1):
+            mood = last_by_date.get(start + timedelta(days=i), mood)
+            moods.append(mood)
+        return moods
+
+    @staticmethod
+    def usage_row_to_dict(r):
+        return {
+            "usage_date": str(r.usage_date),
+            "category": r.category,
+            "package_name": r.package_name,
+            "duration_ms": r.duration_ms,
+            "start_time": str(r.start_time) if r.start_time else None,
+        }
+
+    # 2) AI 엔진 호출
+    # 기본: 워커에 상주하는 Predictor 로 in-process 추론 (모델은 프로세스당 1회 로드)
+    # AI_ENGINE_MODE=pool 이면 같은 Predictor 인터페이스로 워커 프로세스 풀에서 추론
+    # AI_ENGINE_MODE=subprocess 인 경우에만 기존 predict.py subprocess 경로 사용
+    # timer(StageTimer) 를 주면 단계별 시간 기록
+    # history(UserHistory): 입력 창이 하루보다 긴 모델이면 이전 날짜의 encoder 상태에서 이어서 추론
+    # 요청의 지연 시간 예산은 여기서 적용하지 않음 (predict_within_budget 이 대기 시간만 제한)
+    @staticmethod
+    def call_ai_engine(emotion: str, status: str, seq_data: list, timer: StageTimer = None,
+                       history: UserHistory = None):
+        input_data = {
+            "emotion": emotion,
+            "status": status,
+            "seq_data": seq_data,
+        }
+
+        if AI_ENGINE_MODE == "subprocess":
+            return PredictionEngine.call_ai_subprocess(input_data, timer)
+
+        timings = {}
+        try:
+            return get_predictor().predict(input_data, timings=timings, history=history)
+        except Exception as e:
+            print(f"[AI ERROR] {e}")
+            return {"risk_score": 50.0}
+        finally:
+            if timer is not None:
+                timer.merge(timings)
+
+    # 2-2) AI 엔진 배치 호출: 입력 목록 -> 결과 목록 (순서 동일)
+    @staticmethod
+    def call_ai_engine_batch(inputs: list, timer: StageTimer = None, histories: list = None):
+        if AI_ENGINE_MODE == "subprocess":
+            return [PredictionEngine.call_ai_subprocess(d, timer) for d in inputs]
+
+        timings = {}
+        try:
+            return get_predictor().predict_many(inputs, timings=timings, histories=histories)
+        except Exception as e:
+            print(f"[AI ERROR] {e}")
+            return [{"risk_score": 50.0} for _ in inputs]
+        finally:
+            if timer is not None:
+                timer.merge(timings)
+
+    # 2-3) 여러 날 예측 AI 호출: 요일만 다른 days 개 입력을 한 번에 추론
+    # subprocess 경로의 predict.py 는 하루 예측만 지원
+    @staticmethod
+    def call_ai_engine_outlook(emotion: str, status: str, seq_data: list, days: int, timer: StageTimer = None,
+                               history: UserHistory = None):
+        if AI_ENGINE_MODE == "subprocess":
+            return {"error": "Outlook is not supported in subprocess mode"}
+
+        input_data = {
             "emotion": emotion,
             "status": status,
             "seq_data": seq_data,
-        })
+        }
+        timings = {}
+        try:
+            return get_predictor().predict_outlook(input_data, days, timings=timings, history=history)
+        except Exception as e:
+            print(f"[AI ERROR] {e}")
+            return {"error": str(e)}
+        finally:
+            if timer is not None:
+                timer.merge(timings)
+
+    # 2-1) AI 엔진 subprocess 호출 (Fallback, opt-in)
+    # timeout: Lock 대기 + 실행 시간 한도 (초, 기본 AI_SUBPROCESS_TIMEOUT_SECONDS)
+    # TF import + 모델 로드가 매번 반복되므로 요청 예산(수백 ms)으로 제한하면 항상 실패함
+    @staticmethod
+    def call_ai_subprocess(input_data: dict, timer: StageTimer = None, timeout: float = None):
+        # predict_risk.py 에 JSON을 stdin으로 보내고 stdout에서 결과 받기
+        deadline = time.monotonic() + (timeout or AI_SUBPROCESS_TIMEOUT_SECONDS)
+
+        t0 = time.perf_counter()
+        input_json = json.dumps(input_data)
+        if timer is not None:
+            timer.add("encode", (time.perf_counter() - t0) * 1000.0)
 
         try:
             # Acquire Lock before running subprocess
             # This serializes execution: User B waits until User A finishes.
-            with _ai_execution_lock:
+            t0 = time.perf_counter()
+            if not _ai_execution_lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                print("[AI TIMEOUT] AI engine is busy")
+                return {"risk_score": 50.0}
+            t1 = time.perf_counter()
+            try:
                 result = subprocess.run(
                     ["python3", AI_SCRIPT],
                     input=input_json.encode(),
                     capture_output=True,
-                    timeout=20
+                    timeout=max(deadline - time.monotonic(), 0.001)
                 )
+            finally:
+                _ai_execution_lock.release()
+                if timer is not None:
+                    timer.add("lock_wait", (t1 - t0) * 1000.0)
+                    timer.add("subprocess", (time.perf_counter() - t1) * 1000.0)
         except Exception as e:
             print(f"[AI ERROR] {e}")
             return {"risk_score": 50.0}
@@ -202,37 +400,578 @@ class PredictionEngine:
         # Randomly pick 2 distinct items
         return random.sample(pool, 2)
 
-    # 6) 최종 Prediction 로직 (Updated)
+    # 7) 최신 기분/상태 조회
+    @staticmethod
+    def get_latest_mood(user_id: int, db: Session):
+        latest_log = (
+            db.query(EmotionStatusLog)
+            .filter(EmotionStatusLog.user_id == user_id)
+            .order_by(EmotionStatusLog.created_at.desc())
+            .first()
+        )
+        
+        if latest_log:
+            return latest_log.emotion, latest_log.status
+
+        # Fallback: 데이터가 없으면 기본값 사용 (라우터 / 사전 계산 / 야간 배치 공통)
+        return DEFAULT_EMOTION, DEFAULT_STATUS
+
+    # 7-1) 여러 사용자의 최신 기분/상태를 한 번의 쿼리로 조회 (야간 배치용)
     @staticmethod
-    def predict(user, db: Session, emotion: str = None, status: str = None):
+    def get_latest_moods(user_ids: list, db: Session):
+        latest = (
+            db.query(
+                EmotionStatusLog.user_id,
+                func.max(EmotionStatusLog.created_at).label("max_created_at")
+            )
+            .filter(EmotionStatusLog.user_id.in_(user_ids))
+            .group_by(EmotionStatusLog.user_id)
+            .subquery()
+        )
+
+        rows = (
+            db.query(EmotionStatusLog)
+            .join(
+                latest,
+                and_(
+                    EmotionStatusLog.user_id == latest.c.user_id,
+                    EmotionStatusLog.created_at == latest.c.max_created_at
+                )
+            )
+            .order_by(EmotionStatusLog.emotion_id.asc())
+            .all()
+        )
+
+        # Fallback: 데이터가 없으면 기본값 사용 (predict() 와 동일)
+        moods = {uid: (DEFAULT_EMOTION, DEFAULT_STATUS) for uid in user_ids}
+        for r in rows:
+            moods[r.user_id] = (r.emotion, r.status)
+        return moods
+
+    # 8) 최종 Prediction 로직 (Updated)
+    # timer: 단계별 시간 측정 (라우터가 넘기면 Server-Timing 헤더로도 사용), 없으면 "api" 경로로 기록만
+    # prediction_date: 예측 대상 날짜 (기본 오늘, 사용 기록 업로드 후 사전 계산 시 내일)
+    # budget_ms: 응답 대기 한도 -> 초과 시 BaselinePredictor 결과 (degraded=True), 계산은 백그라운드에서 계속 (predict_within_budget)
+    # admission: True 이면 prediction_admission 을 거쳐 계산, 거절되면 간이 예측 (없으면 AdmissionRejected)
+    @staticmethod
+    def predict(user, db: Session, emotion: str = None, status: str = None, timer: StageTimer = None,
+                prediction_date: date = None, budget_ms: float = None, admission: bool = False):
         user_id = user.user_id
+        timer = timer or StageTimer("api")
 
         # 0) Fetch emotion/status from DB if not provided
         if emotion is None or status is None:
-            latest_log = (
-                db.query(EmotionStatusLog)
-                .filter(EmotionStatusLog.user_id == user_id)
-                .order_by(EmotionStatusLog.created_at.desc())
+            with timer.stage("mood_query"):
+                emotion, status = PredictionEngine.get_latest_mood(user_id, db)
+
+        # 1) 최근 사용 기록
+        with timer.stage("fetch_usage"):
+            seq = PredictionEngine.fetch_recent_usage(user_id, db, prediction_date)
+
+        # 2) 캐시 조회 (입력/모델이 같으면 추론 생략, 추천 행동만 새로 생성)
+        # 메모리 캐시 -> 오늘의 예측(daily_predictions) 순서로 조회
+        with timer.stage("cache_lookup"):
+            cache_key = PredictionEngine.cache_key(user_id, emotion, status, seq, prediction_date)
+            result = PredictionEngine.get_cached(cache_key, emotion)
+            if result is None:
+                result = PredictionEngine.get_materialized(db, cache_key)
+
+        if result is not None:
+            # 이미 계산/기록된 예측 -> PredictionLog 를 다시 쓰지 않음
+            timer.finish()
+            return result
+
+        # 3~5) 같은 입력의 동시 요청(앱의 재시도 등)은 한 번만 계산하고 결과 공유 (single-flight)
+        # 먼저 온 요청이 계산 / 기록, 나머지는 기다렸다가 결과만 받음 (PredictionLog 도 한 번만 기록)
+        if budget_ms:
+            return PredictionEngine.predict_within_budget(
+                user_id, emotion, status, seq, cache_key, db, timer, prediction_date, budget_ms, admission
+            )
+
+        def compute():
+            if not admission:
+                return PredictionEngine.compute_prediction(
+                    user_id, emotion, status, seq, cache_key, db, timer, prediction_date
+                )
+            t_wait = time.perf_counter()
+            with prediction_admission.admit():
+                timer.add("admission_wait", (time.perf_counter() - t_wait) * 1000.0)
+                return PredictionEngine.compute_prediction(
+                    user_id, emotion, status, seq, cache_key, db, timer, prediction_date
+                )
+
+        t0 = time.perf_counter()
+        try:
+            result, shared = prediction_flights.do(cache_key, compute)
+        except AdmissionRejected:
+            # 과부하: 간이 예측이 가능하면 그 결과, 아니면 호출자가 503 응답
+            result = PredictionEngine.degraded_response(
+                user_id, emotion, status, seq, db, timer, prediction_date, require_baseline=True
+            )
+            if result is None:
+                timer.finish()
+                raise
+            shared = True
+
+        if shared:
+            timer.add("coalesced_wait", (time.perf_counter() - t0) * 1000.0)
+            level = result["risk_analysis"].get("level", "SAFE")
+            result["recommendations"] = PredictionEngine.get_recommendations(level, emotion)
+
+        timer.finish()
+        return result
+
+    # 8-0) 예산이 있는 예측 (API): 계산은 prediction_executor 에서 별도 DB 세션으로 실행, 요청은 budget_ms 까지만 대기
+    # 예산을 넘기면 간이 예측으로 바로 응답 (캐시 / 기록 안 함), 계산은 끝까지 진행되어 캐시 / daily_predictions /
+    # PredictionLog 에 기록됨 -> 다음 요청은 저장된 결과를 받고 같은 느린 추론을 반복하지 않음
+    # admission: 같은 입력의 계산이 없을 때만 요청 스레드에서 자리를 확보한 뒤 submit (대기 시간도 예산에 포함)
+    # -> 대기열이 가득 차면 executor 에 넘기지 않고 바로 AdmissionRejected, 자리는 계산이 끝날 때 반납
+    # 계산 단계별 시간은 "compute" 경로에 기록 (예산 안에 끝나면 요청의 timer 에도 합침)
+    @staticmethod
+    def predict_within_budget(user_id: int, emotion: str, status: str, seq: list, cache_key, db: Session,
+                              timer: StageTimer, prediction_date: date, budget_ms: float, admission: bool):
+        compute_timer = StageTimer("compute")
+
+        def compute():
+            compute_db = SessionLocal()
+            try:
+                return PredictionEngine.compute_prediction(
+                    user_id, emotion, status, seq, cache_key, compute_db, compute_timer, prediction_date
+                )
+            except Exception as e:
+                # 요청이 먼저 응답했으면 결과를 받을 곳이 없으므로 여기서 기록
+                print(f"[PREDICTION ERROR] Background prediction failed for user {user_id}: {e}")
+                raise
+            finally:
+                compute_db.close()
+                compute_timer.finish()
+
+        t0 = time.perf_counter()
+        admitted = False
+        if admission and not prediction_flights.running(cache_key):
+            try:
+                wait_ms = prediction_admission.acquire(max_wait_ms=budget_ms)
+            except AdmissionRejected:
+                # 과부하: 간이 예측이 가능하면 그 결과, 아니면 호출자가 503 응답
+                result = PredictionEngine.degraded_response(
+                    user_id, emotion, status, seq, db, timer, prediction_date, require_baseline=True
+                )
+                timer.finish()
+                if result is None:
+                    raise
+                return result
+            timer.add("admission_wait", wait_ms)
+            admitted = True
+
+        try:
+            future, shared = prediction_flights.submit(cache_key, compute, prediction_executor)
+        except BaseException:
+            if admitted:
+                prediction_admission.release()
+            raise
+        if admitted:
+            if shared:
+                # 확인 직후 다른 요청이 같은 계산을 시작함 -> 그 결과를 받고 자리는 바로 반납
+                prediction_admission.release()
+            else:
+                future.add_done_callback(lambda f: prediction_admission.release())
+
+        remaining = budget_ms / 1000.0 - (time.perf_counter() - t0)
+        try:
+            # 같은 Future 를 여러 요청이 받으므로 복사본 사용
+            result = copy.deepcopy(future.result(max(remaining, 0)))
+        except FutureTimeoutError:
+            print(f"[AI TIMEOUT] No result within {budget_ms:.0f} ms, answering from baseline")
+            result = PredictionEngine.degraded_response(user_id, emotion, status, seq, db, timer, prediction_date)
+            timer.finish()
+            return result
+
+        if shared:
+            timer.add("coalesced_wait", (time.perf_counter() - t0) * 1000.0)
+        else:
+            # 계산이 끝났으므로 compute_timer 는 더 바뀌지 않음
+            timer.merge({name: ms for name, ms in compute_timer.stages.items() if name != "total"})
+        level = result["risk_analysis"].get("level", "SAFE")
+        result["recommendations"] = PredictionEngine.get_recommendations(level, emotion)
+        timer.finish()
+        return result
+
+
+    # 8-10) 예측 계산: AI 엔진 -> 응답 구성 -> 캐시 / daily_predictions / PredictionLog 기록
+    @staticmethod
+    def compute_prediction(user_id: int, emotion: str, status: str, seq: list, cache_key, db: Session,
+                           timer: StageTimer, prediction_date: date = None):
+        # 3) AI 엔진 실행
+        history = PredictionEngine.user_history(user_id, db, prediction_date)
+        ai_result = PredictionEngine.call_ai_engine(emotion, status, seq, timer, history)
+
+        # 3-1) 실패 / 입력 부족 (어제 사용 기록 없음 등) -> 최근 daily_summary 기반 간이 예측
+        # 같은 입력이면 다시 계산해도 같으므로 잠시 캐시, PredictionLog 는 (사용자, 날짜) 당 한 번만
+        if not PredictionEngine.is_valid_ai_result(ai_result):
+            result = PredictionEngine.degraded_response(user_id, emotion, status, seq, db, timer, prediction_date)
+            prediction_cache.set(cache_key, result, ttl=PREDICTION_DEGRADED_TTL_SECONDS)
+            if PredictionEngine.mark_degraded_logged(user_id, prediction_date):
+                with timer.stage("log_commit"):
+                    PredictionEngine.save_prediction_log(db, user_id, emotion, status, result)
+            return result
+
+        # 4) 응답 구성 (정상 결과만 캐시 + daily_predictions 에 저장)
+        with timer.stage("postprocess"):
+            result = PredictionEngine.build_response(user_id, emotion, status, seq, ai_result)
+            prediction_cache.set(cache_key, result)
+
+        # 5) DB 로깅 (새로 계산한 경우만)
+        with timer.stage("log_commit"):
+            PredictionEngine.save_materialized(db, [(cache_key, result)])
+            PredictionEngine.save_prediction_log(db, user_id, emotion, status, result)
+
+        return result
+
+    # (user_id, 예측 날짜) 의 첫 degraded 결과이면 True (이후 호출은 False)
+    @staticmethod
+    def mark_degraded_logged(user_id: int, prediction_date: date = None):
+        key = (user_id, prediction_date or date.today())
+        with _degraded_logged_lock:
+            if key in _degraded_logged:
+                return False
+            _degraded_logged[key] = True
+            while len(_degraded_logged) > DEGRADED_LOGGED_MAX:
+                _degraded_logged.popitem(last=False)
+        return True
+
+    # 8-9) degraded 응답: BaselinePredictor (daily_summary EWMA), 기록이 없으면 기본 Fallback 구조
+    # require_baseline=True 이면 기록이 없을 때 None
+    @staticmethod
+    def degraded_response(user_id: int, emotion: str, status: str, seq: list, db: Session,
+                          timer: StageTimer, prediction_date: date = None, require_baseline: bool = False):
+        with timer.stage("baseline"):
+            ai_result = BaselinePredictor.predict(user_id, emotion, status, db, prediction_date)
+        if ai_result is None:
+            if require_baseline:
+                return None
+            ai_result = {}
+
+        with timer.stage("postprocess"):
+            result = PredictionEngine.build_response(user_id, emotion, status, seq, ai_result)
+            result["degraded"] = True
+        return result
+
+    # 8-2) 예측 캐시 키: (user_id, emotion, status, 사용 기록 날짜, 사용 기록 digest, model_version)
+    # 새 모델이 배포되면 model_version 이 바뀌어 이전 버전의 결과는 자동으로 miss
+    @staticmethod
+    def cache_key(user_id: int, emotion: str, status: str, seq: list, prediction_date: date = None):
+        usage_date = (prediction_date or date.today()) - timedelta(days=1)
+        return prediction_cache.make_key(
+            user_id, emotion, status, usage_date, seq, get_predictor().model_version
+        )
+
+    # 8-3) 캐시 적중 시 추천 행동(랜덤)만 요청마다 새로 생성
+    @staticmethod
+    def get_cached(cache_key, emotion: str):
+        result = prediction_cache.get(cache_key)
+        if result is None:
+            return None
+
+        level = result["risk_analysis"].get("level", "SAFE")
+        result["recommendations"] = PredictionEngine.get_recommendations(level, emotion)
+        return result
+
+    # 8-4) 오늘의 예측 조회 (daily_predictions): 같은 (user, 날짜, 기분, 상태, 모델 버전) 행이 있고
+    # 사용 기록 digest 도 같으면 저장된 결과 사용, 메모리 캐시에도 채움
+    # (업로드 전에 사용 기록을 읽은 계산이 invalidate_materialized 뒤에 행을 저장해도 digest 가 달라 사용되지 않음)
+    @staticmethod
+    def get_materialized(db: Session, cache_key):
+        user_id, emotion, status, usage_date, digest, model_version = cache_key
+        try:
+            row = (
+                db.query(DailyPrediction)
+                .filter(
+                    DailyPrediction.user_id == user_id,
+                    DailyPrediction.prediction_date == PredictionEngine.prediction_date_of(usage_date),
+                    DailyPrediction.input_emotion == emotion,
+                    DailyPrediction.input_status == status,
+                    DailyPrediction.model_version == (model_version or ""),
+                )
                 .first()
             )
-            
-            if latest_log:
-                emotion = latest_log.emotion
-                status = latest_log.status
+        except Exception as e:
+            print(f"[MATERIALIZED ERROR] {e}")
+            db.rollback()
+            return None
+
+        if row is None or row.input_digest != digest:
+            return None
+        return PredictionEngine.load_materialized(cache_key, row.payload)
+
+    # 8-5) 여러 사용자의 예측을 한 번에 조회 (야간 배치용): cache_key -> 결과
+    # 예측 날짜는 각 키의 사용 기록 날짜 + 1 (get_materialized 와 같음)
+    @staticmethod
+    def get_materialized_batch(db: Session, cache_keys: list):
+        if not cache_keys:
+            return {}
+        prediction_dates = {PredictionEngine.prediction_date_of(k[3]) for k in cache_keys}
+        try:
+            rows = (
+                db.query(DailyPrediction)
+                .filter(
+                    DailyPrediction.user_id.in_([k[0] for k in cache_keys]),
+                    DailyPrediction.prediction_date.in_(prediction_dates),
+                )
+                .all()
+            )
+        except Exception as e:
+            print(f"[MATERIALIZED ERROR] {e}")
+            db.rollback()
+            return {}
+
+        by_input = {
+            (r.user_id, r.prediction_date, r.input_emotion, r.input_status, r.model_version): r for r in rows
+        }
+        found = {}
+        for key in cache_keys:
+            user_id, emotion, status, usage_date, digest, model_version = key
+            row = by_input.get((user_id, PredictionEngine.prediction_date_of(usage_date), emotion, status,
+                                model_version or ""))
+            if row is not None and row.input_digest == digest:
+                found[key] = PredictionEngine.load_materialized(key, row.payload)
+        return found
+
+    # 8-8) 사용 기록이 바뀐 날짜를 입력으로 쓰는 예측 삭제 (호출자가 사용 기록과 함께 commit)
+    @staticmethod
+    def invalidate_materialized(db: Session, user_id: int, usage_dates):
+        prediction_dates = PredictionEngine.affected_prediction_dates(usage_dates)
+        if not prediction_dates:
+            return
+        db.query(DailyPrediction).filter(
+            DailyPrediction.user_id == user_id,
+            DailyPrediction.prediction_date.in_(prediction_dates),
+        ).delete(synchronize_session=False)
+
+    # 사용 기록 날짜 -> 그 기록을 입력으로 쓰는 예측 날짜 목록
+    # 입력 창이 N 일인 모델이면 D 일 기록은 D+1 ~ D+N 일 예측의 입력
+    @staticmethod
+    def affected_prediction_dates(usage_dates):
+        context_days = get_predictor().context_days
+        return sorted({d + timedelta(days=i) for d in usage_dates for i in range(1, context_days + 1)})
+
+    # 8-8-1) 기분/상태 입력 -> 사용자의 오늘 이후 예측 삭제 (호출자가 기분 기록과 함께 commit)
+    # 새 기분의 예측은 사전 계산 (PrecomputeService.schedule_for_mood) 또는 다음 요청에서 다시 계산
+    @staticmethod
+    def invalidate_materialized_from(db: Session, user_id: int, since: date):
+        db.query(DailyPrediction).filter(
+            DailyPrediction.user_id == user_id,
+            DailyPrediction.prediction_date >= since,
+        ).delete(synchronize_session=False)
+
+    # 과거 날짜의 사용 기록이 바뀜 -> 그 날짜를 포함하는 encoder 상태 제거 (다음 예측에서 다시 인코딩)
+    @staticmethod
+    def invalidate_encoder_state(user_id: int, usage_dates):
+        if usage_dates:
+            get_predictor().encoder_states.invalidate(user_id, since=min(usage_dates))
+
+    # 캐시 키의 사용 기록 날짜 -> 예측 대상 날짜
+    @staticmethod
+    def prediction_date_of(usage_date):
+        return date.fromisoformat(str(usage_date)) + timedelta(days=1)
+
+    @staticmethod
+    def load_materialized(cache_key, payload: dict):
+        prediction_cache.set(cache_key, payload)
+        result = dict(payload)
+        level = result["risk_analysis"].get("level", "SAFE")
+        result["recommendations"] = PredictionEngine.get_recommendations(level, cache_key[1])
+        return result
+
+    # 8-6) 오늘의 예측 저장 (여러 행을 한 번에 upsert, 입력 digest / 결과만 갱신)
+    # items: [(cache_key, result)]
+    @staticmethod
+    def save_materialized(db: Session, items: list):
+        if not items:
+            return
+        rows = []
+        for (user_id, emotion, status, usage_date, digest, model_version), result in items:
+            payload = {k: v for k, v in result.items() if k != "recommendations"}
+            rows.append(dict(
+                user_id=user_id,
+                prediction_date=PredictionEngine.prediction_date_of(usage_date),
+                input_emotion=emotion,
+                input_status=status,
+                model_version=model_version or "",
+                input_digest=digest,
+                payload=payload,
+            ))
+
+        try:
+            if db.get_bind().dialect.name == "mysql":
+                stmt = mysql_insert(DailyPrediction).values(rows)
+                stmt = stmt.on_duplicate_key_update(
+                    input_digest=stmt.inserted.input_digest,
+                    payload=stmt.inserted.payload,
+                    updated_at=func.now(),
+                )
+                db.execute(stmt)
             else:
-                # Fallback: 데이터가 없으면 기본값 사용 (안전한 기본값)
-                emotion = "GOOD"
-                status = "FREE"
+                # MySQL 이 아닌 DB: 행 단위 조회 후 갱신 / 추가
+                for row in rows:
+                    existing = (
+                        db.query(DailyPrediction)
+                        .filter_by(**{k: row[k] for k in ("user_id", "prediction_date", "input_emotion",
+                                                          "input_status", "model_version")})
+                        .first()
+                    )
+                    if existing is None:
+                        db.add(DailyPrediction(**row))
+                    else:
+                        existing.input_digest = row["input_digest"]
+                        existing.payload = row["payload"]
+            db.commit()
+        except Exception as e:
+            print(f"[MATERIALIZED ERROR] {e}")
+            db.rollback()
 
-        # 1) 최근 사용 기록
-        seq = PredictionEngine.fetch_recent_usage(user_id, db)
+    @staticmethod
+    def is_valid_ai_result(ai_result: dict):
+        required_keys = ["risk_analysis", "usage_prediction", "pattern_detection"]
+        return all(k in ai_result for k in required_keys)
 
-        # 2) AI 엔진 실행
-        ai_result = PredictionEngine.call_ai_engine(emotion, status, seq)
-        
+    # 8-11) 여러 날 예측 (오늘부터 days 일): 날짜별 risk_analysis / hourly_forecast
+    # 입력(기분, 어제 사용 기록, 모델)이 같으면 prediction_cache 에서 반환 -> 사용 기록 업로드 / 기분 입력 시 무효화
+    # PredictionLog / daily_predictions 에는 기록하지 않음 (오늘의 예측은 predict 담당)
+    @staticmethod
+    def predict_outlook(user, db: Session, days: int = AI_OUTLOOK_MAX_DAYS, emotion: str = None, status: str = None,
+                        timer: StageTimer = None, admission: bool = False):
+        user_id = user.user_id
+        timer = timer or StageTimer("outlook")
+
+        if emotion is None or status is None:
+            with timer.stage("mood_query"):
+                emotion, status = PredictionEngine.get_latest_mood(user_id, db)
+
+        with timer.stage("fetch_usage"):
+            seq = PredictionEngine.fetch_recent_usage(user_id, db)
+
+        with timer.stage("cache_lookup"):
+            cache_key = PredictionEngine.cache_key(user_id, emotion, status, seq) + ("outlook", days)
+            result = prediction_cache.get(cache_key)
+
+        if result is not None:
+            timer.finish()
+            return result
+
+        def run():
+            history = PredictionEngine.user_history(user_id, db)
+            ai_result = PredictionEngine.call_ai_engine_outlook(emotion, status, seq, days, timer, history)
+
+            with timer.stage("postprocess"):
+                outlook = []
+                for day in ai_result.get("days", []):
+                    response = PredictionEngine.build_response(user_id, emotion, status, seq, day)
+                    outlook.append({
+                        "analysis_date": response["analysis_date"],
+                        "risk_analysis": response["risk_analysis"],
+                        "hourly_forecast": response["hourly_forecast"],
+                    })
+                result = {"user_id": user_id, "days": outlook, "model_version": ai_result.get("model_version")}
+                # 실패 결과는 캐시하지 않음
+                if outlook:
+                    prediction_cache.set(cache_key, result)
+            return result
+
+        def compute():
+            if not admission:
+                return run()
+            t_wait = time.perf_counter()
+            with prediction_admission.admit():
+                timer.add("admission_wait", (time.perf_counter() - t_wait) * 1000.0)
+                return run()
+
+        try:
+            result, _ = prediction_flights.do(cache_key, compute)
+        finally:
+            timer.finish()
+        return result
+
+    # 8-1) 배치 Prediction (야간 알림 작업 / 자정 사전 계산용)
+    # 사용자별 쿼리/추론 대신: 기분/사용 기록을 각각 1회 조회 -> 피처를 한 번에 구성 -> 큰 배치로 GRU 실행
+    # 단계별 시간은 청크 단위로 "nightly" 경로에 기록
+    # prediction_date: 예측 대상 날짜 (기본 오늘)
+    @staticmethod
+    def predict_batch(users: list, db: Session, timer: StageTimer = None, prediction_date: date = None):
+        user_ids = [u.user_id for u in users]
+        if not user_ids:
+            return {}
+        timer = timer or StageTimer("nightly")
+
+        with timer.stage("mood_query"):
+            moods = PredictionEngine.get_latest_moods(user_ids, db)
+        with timer.stage("fetch_usage"):
+            seq_by_user = PredictionEngine.fetch_recent_usage_batch(user_ids, db, prediction_date)
+
+        results = {}
+        pending = []  # 캐시 / 오늘의 예측에 없는 사용자만 추론: (uid, cache_key, input_data)
+        with timer.stage("cache_lookup"):
+            missed = []
+            for uid in user_ids:
+                emotion, status = moods[uid]
+                seq = seq_by_user[uid]
+                cache_key = PredictionEngine.cache_key(uid, emotion, status, seq, prediction_date)
+
+                cached = PredictionEngine.get_cached(cache_key, emotion)
+                if cached is not None:
+                    results[uid] = cached
+                else:
+                    missed.append((uid, cache_key, {"emotion": emotion, "status": status, "seq_data": seq}))
+
+            materialized = PredictionEngine.get_materialized_batch(db, [key for _, key, _ in missed])
+            for uid, cache_key, input_data in missed:
+                if cache_key in materialized:
+                    results[uid] = materialized[cache_key]
+                else:
+                    pending.append((uid, cache_key, input_data))
+
+        histories = [
+            PredictionEngine.user_history(uid, db, prediction_date)
+            for uid, _, _ in pending
+        ]
+        ai_results = PredictionEngine.call_ai_engine_batch(
+            [input_data for _, _, input_data in pending], timer, histories
+        )
+
+        computed = []  # daily_predictions 에 저장할 정상 결과: (cache_key, result)
+        with timer.stage("postprocess"):
+            for (uid, cache_key, input_data), ai_result in zip(pending, ai_results):
+                result = PredictionEngine.build_response(
+                    uid, input_data["emotion"], input_data["status"], input_data["seq_data"], ai_result
+                )
+                if PredictionEngine.is_valid_ai_result(ai_result):
+                    prediction_cache.set(cache_key, result)
+                    computed.append((cache_key, result))
+                results[uid] = result
+
+        # 새로 계산한 사용자만 기록 (이미 오늘 예측이 있는 사용자는 PredictionLog 를 다시 쓰지 않음)
+        with timer.stage("log_commit"):
+            PredictionEngine.save_materialized(db, computed)
+            for uid, _, input_data in pending:
+                PredictionEngine.save_prediction_log(
+                    db, uid, input_data["emotion"], input_data["status"], results[uid], commit=False
+                )
+
+            # 동기 모드: PredictionLog 는 배치 단위로 한 번에 commit
+            if not prediction_log_writer.enabled:
+                try:
+                    db.commit()
+                except Exception as e:
+                    print(f"[LOGGING ERROR] {e}")
+                    db.rollback()
+
+        timer.finish()
+        return results
+
+    # 9) AI 결과 -> API 응답 구성 (단건/배치 공통)
+    @staticmethod
+    def build_response(user_id: int, emotion: str, status: str, seq: list, ai_result: dict):
         # Validate AI Result Structure
-        required_keys = ["risk_analysis", "usage_prediction", "pattern_detection"]
-        is_valid = all(k in ai_result for k in required_keys)
+        is_valid = PredictionEngine.is_valid_ai_result(ai_result)
 
         if not is_valid:
             # Fallback Structure
@@ -361,7 +1100,27 @@ class PredictionEngine:
         
         recs = PredictionEngine.get_recommendations(current_level, emotion)
         
-        # 5) Log to Database (New Request)
+        # 4) Construct Final Response
+        return {
+            "user_id": user_id,
+            "analysis_date": ai_result.get("analysis_date", str(date.today() + timedelta(days=1))),
+            "risk_analysis": risk_analysis,
+            "usage_prediction": usage_prediction,
+            "pattern_detection": pattern_detection,
+            "hourly_forecast": hourly_forecast, # For Graph
+            "recommendations": recs, # Value add
+            "model_version": ai_result.get("model_version"),
+            "degraded": False,
+        }
+
+    # 10) Log to Database (New Request)
+    # PREDICTION_LOG_ASYNC=true (기본) 이면 prediction_log_writer 에 넘기고 바로 반환
+    # 동기 모드에서 commit=False 이면 세션에 추가만 하고, 호출자가 한 번에 commit (야간 배치)
+    @staticmethod
+    def save_prediction_log(db: Session, user_id: int, emotion: str, status: str, result: dict, commit: bool = True):
+        risk_analysis = result.get("risk_analysis", {})
+        usage_prediction = result.get("usage_prediction", {})
+
         try:
             # Risk Score/Level Handling
             r_score = float(risk_analysis.get("score", 0))
@@ -394,7 +1153,7 @@ class PredictionEngine:
             # [NEW] Vulnerable App
             r_app = risk_analysis.get("vulnerable_category", "NONE")
 
-            new_log = PredictionLog(
+            row = dict(
                 user_id=user_id,
                 input_emotion=emotion,
                 input_status=status,
@@ -402,23 +1161,18 @@ class PredictionEngine:
                 risk_level=r_level,
                 risk_app=r_app,
                 risk_start_time=r_start_time,
-                risk_end_time=r_end_time
+                risk_end_time=r_end_time,
+                model_version=result.get("model_version")
             )
-            db.add(new_log)
-            db.commit()
+
+            # 비동기 기록: 백그라운드 writer 가 모아서 저장 (요청은 commit 을 기다리지 않음)
+            if prediction_log_writer.enabled:
+                prediction_log_writer.submit(row)
+                return
+
+            db.add(PredictionLog(**row))
+            if commit:
+                db.commit()
         except Exception as e:
             print(f"[LOGGING ERROR] {e}")
             db.rollback()
-
-
-
-        # 4) Construct Final Response
-        return {
-            "user_id": user_id,
-            "analysis_date": ai_result.get("analysis_date", str(date.today() + timedelta(days=1))),
-            "risk_analysis": risk_analysis,
-            "usage_prediction": usage_prediction,
-            "pattern_detection": pattern_detection,
-            "hourly_forecast": hourly_forecast, # For Graph
-            "recommendations": recs, # Value add
-        }
@@ -0,0 +1,149 @@
+# app/services/prediction_log_writer.py
+# PredictionLog 비동기 기록 (write-behind)
+# 예측 요청마다 INSERT + COMMIT 을 동기로 기다리지 않도록, 기록을 메모리 큐에 넣고 백그라운드 스레드가 모아서 저장.
+# - N 건(PREDICTION_LOG_BATCH_SIZE)이 모이거나 T ms(PREDICTION_LOG_FLUSH_MS)가 지나면 다중 행 INSERT 1회 + COMMIT
+# - DB 장애 시 배치를 버리지 않고 재시도 (지수 백오프), 그동안 들어온 기록은 큐(최대 PREDICTION_LOG_QUEUE_SIZE)에 보관
+# - 큐가 가득 차면 새 기록은 버리고 dropped 로 집계 (요청은 막지 않음)
+# - 종료 시 close() 로 남은 기록을 모두 저장
+# - created_at 은 저장 시각이 아닌 예측 시각으로 기록
+# PREDICTION_LOG_ASYNC=false 이면 기존처럼 요청 안에서 동기 commit
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models.prediction_logs import PredictionLog
+
+PREDICTION_LOG_ASYNC = os.getenv("PREDICTION_LOG_ASYNC", "true").lower() == "true"
+PREDICTION_LOG_BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", "200"))
+PREDICTION_LOG_FLUSH_MS = float(os.getenv("PREDICTION_LOG_FLUSH_MS", "500"))
+PREDICTION_LOG_QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE_SIZE", "50000"))
+# 재시도 대기 시간 상한 (초)
+PREDICTION_LOG_MAX_BACKOFF = float(os.getenv("PREDICTION_LOG_MAX_BACKOFF", "30"))
+
+
+class PredictionLogWriter:
+
+    def __init__(self, session_factory=SessionLocal, batch_size=PREDICTION_LOG_BATCH_SIZE,
+                 flush_ms=PREDICTION_LOG_FLUSH_MS, max_queue=PREDICTION_LOG_QUEUE_SIZE,
+                 enabled=PREDICTION_LOG_ASYNC):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_ms = flush_ms
+        self.enabled = enabled
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "retries": 0, "dropped": 0}
+        self.last_error = None
+
+    # 1) 기록 추가 (PredictionLog 컬럼 dict), 큐가 가득 차면 False
+    def submit(self, row):
+        row.setdefault("created_at", datetime.now())
+        self._start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="prediction-log-writer", daemon=True)
+                self._thread.start()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    # 2) 배치 수집: 첫 기록 이후 flush_ms 까지 또는 batch_size 건까지
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_ms / 1000.0
+        while len(batch) < self.batch_size:
+            # 종료 중에는 기다리지 않고 큐에 남은 것만 모음
+            remaining = 0 if self._stop.is_set() else deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write_with_retry(batch)
+
+    # 3) 저장 실패 시 같은 배치를 재시도 (종료 중에는 1회만 시도)
+    def _write_with_retry(self, batch):
+        backoff = 0.5
+        while True:
+            try:
+                self.write(batch)
+                return True
+            except Exception as e:
+                self.last_error = e
+                print(f"[LOGGING ERROR] Failed to write {len(batch)} prediction logs: {e}")
+                if self._stop.is_set():
+                    self._count("dropped", len(batch))
+                    return False
+                self._count("retries")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, PREDICTION_LOG_MAX_BACKOFF)
+
+    # 다중 행 INSERT 1회 + COMMIT
+    def write(self, rows):
+        db = self.session_factory()
+        try:
+            db.execute(insert(PredictionLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.last_error = None
+        self._count("written", len(rows))
+        self._count("batches")
+
+    # 4) 종료: 남은 기록 저장 후 스레드 종료
+    def close(self, timeout=10.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print(f"[LOGGING ERROR] Prediction log writer did not finish in {timeout}s ({self._queue.qsize()} pending)")
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        s["enabled"] = self.enabled
+        s["pending"] = self._queue.qsize()
+        s["batch_size"] = self.batch_size
+        s["flush_ms"] = self.flush_ms
+        s["last_error"] = str(self.last_error) if self.last_error else None
+        return s
+
+
+# 워커 프로세스 당 하나
+prediction_log_writer = PredictionLogWriter()
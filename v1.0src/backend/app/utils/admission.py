@@ -0,0 +1,94 @@
+# app/utils/admission.py
+# 예측 작업 입장 제어 (load shedding)
+# 동시에 실행되는 예측 계산 수를 max_concurrency 로 제한하고, 나머지는 최대 max_queue 개까지 max_wait_ms 동안만 대기.
+# 대기열이 가득 찼거나 대기 시간을 넘기면 바로 AdmissionRejected -> 라우터는 간이 예측 또는 503 + Retry-After 로 응답
+# (요청이 FastAPI 스레드 풀을 오래 점유하여 /api/usage/batch 같은 다른 API 까지 막히는 것을 방지)
+#
+# FastAPI 스레드 풀과의 관계
+# - sync 엔드포인트는 anyio 스레드 풀(main.py 의 API_THREADPOOL_SIZE, 기본 40)에서 실행됨
+# - 대기는 항상 요청 스레드에서 (executor 에 넘기기 전) -> queue_depth 가 실제 대기 요청 수이고, 넘쳐서 거절되면 바로 503
+# - 예측 요청이 동시에 붙잡는 스레드 수 ~= max_concurrency + max_queue (그 이상은 바로 거절되어 스레드를 곧 반납)
+# - 이 합이 스레드 풀의 절반을 넘지 않아야 나머지 API 가 항상 스레드를 받음 (main.py 가 기동 시 확인)
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREDICTION_MAX_CONCURRENCY = int(os.getenv("PREDICTION_MAX_CONCURRENCY", "8"))
+PREDICTION_MAX_QUEUE = int(os.getenv("PREDICTION_MAX_QUEUE", "8"))
+PREDICTION_MAX_QUEUE_WAIT_MS = float(os.getenv("PREDICTION_MAX_QUEUE_WAIT_MS", "1000"))
+PREDICTION_RETRY_AFTER_SECONDS = int(os.getenv("PREDICTION_RETRY_AFTER_SECONDS", "2"))
+
+
+class AdmissionRejected(Exception):
+
+    def __init__(self, reason, retry_after=PREDICTION_RETRY_AFTER_SECONDS):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+
+    def __init__(self, max_concurrency=PREDICTION_MAX_CONCURRENCY, max_queue=PREDICTION_MAX_QUEUE,
+                 max_wait_ms=PREDICTION_MAX_QUEUE_WAIT_MS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait_ms / 1000.0
+        self.in_flight = 0
+        self.waiting = 0  # 대기열 깊이
+        self._cond = threading.Condition()
+        self._stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "max_waiting": 0}
+
+    @contextmanager
+    def admit(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # 실행 자리 확보 (호출 스레드에서 대기), 대기한 시간(ms) 반환 -> 작업이 끝나면 반드시 release()
+    # 다른 스레드(executor)에 작업을 넘길 때 사용: 넘기기 전에 요청 스레드에서 입장 / 거절이 결정됨
+    # max_wait_ms: 이번 호출의 대기 한도 (기본 self.max_wait, 응답 예산이 더 짧으면 그 값)
+    def acquire(self, max_wait_ms=None):
+        max_wait = self.max_wait if max_wait_ms is None else min(self.max_wait, max_wait_ms / 1000.0)
+        t0 = time.monotonic()
+        with self._cond:
+            if self.in_flight >= self.max_concurrency:
+                if self.waiting >= self.max_queue:
+                    self._stats["rejected_queue_full"] += 1
+                    raise AdmissionRejected("Prediction queue is full")
+
+                self.waiting += 1
+                self._stats["max_waiting"] = max(self._stats["max_waiting"], self.waiting)
+                deadline = t0 + max_wait
+                try:
+                    while self.in_flight >= self.max_concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["rejected_timeout"] += 1
+                            raise AdmissionRejected("Prediction queue wait timed out")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+        return (time.monotonic() - t0) * 1000.0
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                in_flight=self.in_flight,
+                queue_depth=self.waiting,
+                max_concurrency=self.max_concurrency,
+                max_queue=self.max_queue,
+                max_wait_ms=self.max_wait * 1000.0,
+            )
@@ -53,3 +53,8 @@ CATEGORY_MAP = {
     "com.burockgames.timclocker": "OTHER",
     "com.nhn.android.nbooks": "OTHER"
 }
+
+# 기분 기록이 없는 사용자의 기본 기분/상태
+# /today, 사전 계산, 야간 배치가 모두 같은 값을 써야 daily_predictions 의 (기분, 상태) 키가 일치함
+DEFAULT_EMOTION = "NORMAL"
+DEFAULT_STATUS = "FREE"
@@ -0,0 +1,57 @@
+# app/utils/job_lock.py
+# 예약 작업(APScheduler cron) 단일 실행 Lock
+# SchedulerService 는 uvicorn 워커마다 시작되므로 같은 cron 작업이 워커 수만큼 동시에 실행됨.
+# 작업 시작 시 Lock 을 잡은 한 프로세스만 실행하고 나머지는 기다리지 않고 건너뜀.
+# - MySQL: GET_LOCK(name, 0) -> 여러 서버의 워커 사이에서도 하나만 실행
+#   연결 단위 Lock 이므로 작업 세션과 별개의 전용 연결을 작업이 끝날 때까지 유지 (세션 commit 으로 연결이 바뀌어도 유지)
+# - 그 외 DB (개발용 SQLite 등): 같은 호스트의 워커 사이에서만 fcntl 파일 Lock (JOB_LOCK_DIR)
+# - 작업이 빨리 끝나도 JOB_LOCK_MIN_HOLD_SECONDS 동안은 Lock 유지 -> 조금 늦게 깨어난 워커가 같은 작업을 다시 실행하지 않음
+
+import fcntl
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+JOB_LOCK_DIR = os.getenv("JOB_LOCK_DIR", tempfile.gettempdir())
+JOB_LOCK_MIN_HOLD_SECONDS = float(os.getenv("JOB_LOCK_MIN_HOLD_SECONDS", "60"))
+
+
+# with single_runner("precompute_rollover", db.get_bind()) as acquired:
+#     if not acquired: return  (다른 워커가 실행 중)
+@contextmanager
+def single_runner(name, bind, min_hold_seconds=None):
+    if min_hold_seconds is None:
+        min_hold_seconds = JOB_LOCK_MIN_HOLD_SECONDS
+    t0 = time.monotonic()
+
+    def hold():
+        remaining = min_hold_seconds - (time.monotonic() - t0)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    if bind.dialect.name == "mysql":
+        with bind.connect() as conn:
+            acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": name}).scalar() == 1
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    hold()
+                    conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+        return
+
+    with open(os.path.join(JOB_LOCK_DIR, f"{name}.lock"), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except BlockingIOError:
+            acquired = False
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                hold()
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,132 @@
+# app/utils/metrics.py
+# 예측 파이프라인 단계별 지연 시간 측정
+# - StageTimer: 요청(또는 야간 배치 청크, 사전 계산 작업, 여러 날 예측 "outlook") 하나의 단계별 시간 기록 -> 끝나면 히스토그램에 반영
+#   예산이 있는 요청의 예측 계산은 "compute" 경로에 따로 기록 (요청이 예산 초과로 먼저 응답해도 끝까지 기록됨)
+# - LatencyHistogram: 고정 버킷 히스토그램 (p50/p95/p99 는 버킷 경계로 근사)
+# - /metrics 의 "latency_ms" 로 노출, PREDICTION_TIMING_HEADER=true 이면 응답에 Server-Timing 헤더 추가
+#
+# 단계 이름
+#   mood_query, fetch_usage, cache_lookup, model_load,
+#   encoder_state (입력 창이 하루보다 긴 모델의 이전 날짜 인코딩 / 캐시 조회), encode, queue_wait, inference,
+#   lock_wait, subprocess (AI_ENGINE_MODE=subprocess), baseline (degraded 응답),
+#   coalesced_wait (같은 입력의 다른 요청 결과 대기), admission_wait (입장 대기열), postprocess, log_commit, total
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+PREDICTION_TIMING_HEADER = os.getenv("PREDICTION_TIMING_HEADER", "false").lower() == "true"
+
+# 버킷 상한 (ms)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+
+class LatencyHistogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        for i, upper in enumerate(self.buckets):
+            if ms <= upper:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        # q 분위가 속한 버킷의 상한 (마지막 버킷은 관측 최댓값)
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for upper, c in zip(self.buckets, self.counts):
+            seen += c
+            if seen >= rank:
+                return round(min(upper, self.max), 3)
+        return round(self.max, 3)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {("+Inf" if b == float("inf") else str(b)): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+class LatencyMetrics:
+
+    def __init__(self):
+        self._hists = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, ms):
+        with self._lock:
+            hist = self._hists.get(name)
+            if hist is None:
+                hist = self._hists[name] = LatencyHistogram()
+            hist.observe(ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.snapshot() for name, h in sorted(self._hists.items())}
+
+
+# 워커 프로세스 당 하나
+latency_metrics = LatencyMetrics()
+
+
+class StageTimer:
+    """
+    사용 예:
+        timer = StageTimer("api")
+        with timer.stage("fetch_usage"):
+            ...
+        timer.add("inference", 3.2)  # 다른 곳에서 잰 값
+        timer.finish()               # 히스토그램 기록 (api.fetch_usage, api.inference, api.total)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stages = OrderedDict()
+        self._started = time.perf_counter()
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    # 같은 단계가 여러 번 실행되면 합산
+    def add(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def merge(self, timings):
+        for name, ms in (timings or {}).items():
+            self.add(name, ms)
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.stages["total"] = (time.perf_counter() - self._started) * 1000.0
+        for name, ms in self.stages.items():
+            latency_metrics.observe(f"{self.path}.{name}", ms)
+
+    # Server-Timing 헤더 형식: "fetch_usage;dur=1.20, inference;dur=3.40, ..."
+    def header_value(self):
+        return ", ".join(f"{name};dur={ms:.2f}" for name, ms in self.stages.items())
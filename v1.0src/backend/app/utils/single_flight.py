@@ -0,0 +1,74 @@
+# app/utils/single_flight.py
+# 동일 키 요청 합치기 (single-flight)
+# 같은 키로 동시에 들어온 호출 중 첫 호출(leader)만 실제로 실행하고, 나머지는 그 결과를 기다려서 함께 받음.
+# 키는 실행이 끝나면 바로 제거되므로 결과를 저장하지 않음 (캐시는 prediction_cache / daily_predictions 담당)
+# - do: 첫 호출의 스레드에서 실행
+# - submit: executor 에서 실행하고 Future 반환 (호출자는 원하는 시간만큼만 기다리고, 실행은 끝까지 진행)
+
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "shared": 0}
+
+    # fn() 실행 결과 반환 -> (result, shared), shared=True 이면 다른 요청의 결과를 받은 것
+    # timeout(초): 다른 요청의 결과를 기다리는 시간 한도 (초과 시 TimeoutError)
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            # 호출자가 결과를 수정해도 다른 요청에 영향이 없도록 복사본 반환
+            return copy.deepcopy(future.result(timeout)), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(copy.deepcopy(result))
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    # fn 을 executor 에서 실행 -> (Future, shared)
+    # 같은 키가 실행 중이면 그 Future 를 함께 받음. 결과 객체는 공유되므로 호출자가 복사해서 사용
+    def submit(self, key, fn, executor):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, True
+            future = self._calls[key] = executor.submit(fn)
+            self._stats["leaders"] += 1
+
+        future.add_done_callback(lambda f: self._release(key, f))
+        return future, False
+
+    # key 의 실행 중 여부 (다음 submit 이 leader 가 될지 미리 확인, 확인 직후 바뀔 수 있음)
+    def running(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
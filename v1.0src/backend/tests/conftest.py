@@ -0,0 +1,62 @@
+# pytest 공통 설정
+# 실행: backend 디렉토리에서 python3 -m pytest -q tests
+# DB 가 필요한 테스트는 MySQL 대신 메모리 SQLite 를 사용 (app.database.SessionLocal 도 같은 엔진으로 교체)
+import os
+import sys
+
+import pytest
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# SQLite 는 INTEGER PRIMARY KEY 만 자동 증가
+@compiles(BigInteger, "sqlite")
+def _compile_big_integer(type_, compiler, **kw):
+    return "INTEGER"
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    import app.models  # noqa: F401 (모든 모델 등록)
+    import app.services.prediction_engine  # noqa: F401
+    import app.services.precompute_service  # noqa: F401
+    from app import database
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    database.Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    # 백그라운드 계산 / 사전 계산이 여는 세션도 같은 DB 사용 (from app.database import SessionLocal 한 모듈 전부)
+    # app.database 도 순회 중에 교체되므로 원래 값을 먼저 보관
+    original = database.SessionLocal
+    for module in list(sys.modules.values()):
+        if getattr(module, "__name__", "").startswith("app.") and getattr(module, "SessionLocal", None) is original:
+            monkeypatch.setattr(module, "SessionLocal", factory)
+    # PredictionLog 는 요청 세션에서 동기 기록 (테스트가 바로 확인)
+    from app.services.prediction_log_writer import prediction_log_writer
+    monkeypatch.setattr(prediction_log_writer, "enabled", False)
+
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    from app.services.prediction_cache import prediction_cache
+    prediction_cache.clear()
+    yield
+    prediction_cache.clear()
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.admission import AdmissionGate, AdmissionRejected
+
+
+def hold(gate, entered, release):
+    with gate.admit():
+        entered.release()
+        release.wait(2)
+
+
+def test_rejects_when_queue_is_full():
+    gate = AdmissionGate(max_concurrency=2, max_queue=1, max_wait_ms=2000)
+    entered = threading.Semaphore(0)
+    release = threading.Event()
+
+    running = [threading.Thread(target=hold, args=(gate, entered, release)) for _ in range(2)]
+    for t in running:
+        t.start()
+    for _ in running:
+        entered.acquire(timeout=1)
+
+    # 대기열 1 자리
+    waiter = threading.Thread(target=hold, args=(gate, entered, release))
+    waiter.start()
+    deadline = time.monotonic() + 1
+    while gate.stats()["queue_depth"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert gate.stats()["queue_depth"] == 1
+
+    t0 = time.perf_counter()
+    with pytest.raises(AdmissionRejected) as e:
+        with gate.admit():
+            pass
+    # 대기 없이 바로 거절
+    assert time.perf_counter() - t0 < 0.1
+    assert e.value.retry_after > 0
+
+    release.set()
+    for t in running + [waiter]:
+        t.join()
+
+    stats = gate.stats()
+    assert stats["rejected_queue_full"] == 1
+    assert stats["admitted"] == 3
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_rejects_after_max_wait():
+    gate = AdmissionGate(max_concurrency=1, max_queue=4, max_wait_ms=100)
+    entered = threading.Semaphore(0)
+    release = threading.Event()
+    t = threading.Thread(target=hold, args=(gate, entered, release))
+    t.start()
+    entered.acquire(timeout=1)
+
+    t0 = time.perf_counter()
+    with pytest.raises(AdmissionRejected):
+        with gate.admit():
+            pass
+    assert 0.09 < time.perf_counter() - t0 < 1
+
+    release.set()
+    t.join()
+    assert gate.stats()["rejected_timeout"] == 1
+
+
+def test_waiter_is_admitted_when_slot_frees():
+    gate = AdmissionGate(max_concurrency=1, max_queue=1, max_wait_ms=2000)
+    entered = threading.Semaphore(0)
+    release = threading.Event()
+    t = threading.Thread(target=hold, args=(gate, entered, release))
+    t.start()
+    entered.acquire(timeout=1)
+
+    threading.Timer(0.1, release.set).start()
+    with gate.admit():
+        assert gate.stats()["in_flight"] == 1
+    t.join()
@@ -0,0 +1,93 @@
+# 긴 입력 창 모델의 encoder 상태 캐시와 이전 날짜의 기분/상태
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from ai_module.encoder_state import EncoderStateCache, UserHistory
+from ai_module.export_weights import MODEL_PATH
+from ai_module.predictor import Predictor
+from app.models import EmotionStatusLog, User
+from app.services.prediction_engine import PredictionEngine
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    predictor = Predictor(model_path=MODEL_PATH, backend="numpy", poll_seconds=0)
+    active = predictor.load()
+    # 저장된 모델은 24 스텝이지만 GRU 는 길이와 무관 -> 3일 창 모델처럼 사용
+    steps = active.model.input_steps
+    active.model.input_steps = 72
+    yield predictor
+    active.model.input_steps = steps
+
+
+def usage_input(usage_date, emotion):
+    start = datetime.combine(usage_date, datetime.min.time()) + timedelta(hours=21)
+    return {
+        "emotion": emotion,
+        "status": "FREE",
+        "seq_data": [{
+            "usage_date": str(usage_date), "category": "SNS", "package_name": "com.instagram.android",
+            "duration_ms": 1500000, "start_time": str(start),
+        }],
+    }
+
+
+def test_state_is_reused_when_mood_changes(predictor):
+    yesterday = date.today() - timedelta(days=1)
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        return [usage_input(start + timedelta(days=i), "NORMAL") for i in range((end - start).days + 1)]
+
+    history = UserHistory(1, yesterday - timedelta(days=1), fetch)
+    assert predictor.context_days == 3
+
+    first = predictor.predict(usage_input(yesterday, "BAD"), history=history)
+    second = predictor.predict(usage_input(yesterday, "GOOD"), history=history)
+    assert "error" not in first and "error" not in second
+    # 이전 날짜 상태는 오늘 기분과 무관 -> 창의 앞부분(2일)은 한 번만 인코딩
+    assert calls == [(yesterday - timedelta(days=2), yesterday - timedelta(days=1))]
+    assert predictor.encoder_states.stats()["hits"] == 1
+
+
+def test_cache_invalidates_states_from_changed_date():
+    cache = EncoderStateCache(per_user=4)
+    today = date.today()
+    cache.put(1, "v1", today - timedelta(days=2), "h2")
+    cache.put(1, "v1", today - timedelta(days=1), "h1")
+
+    cache.invalidate(1, since=today - timedelta(days=1))
+    assert cache.get(1, "v1", today - timedelta(days=2)) == "h2"
+    assert cache.get(1, "v1", today - timedelta(days=1)) is None
+
+
+def test_history_days_use_recorded_moods(db):
+    today = date.today()
+    db.add(User(user_id=1, google_id="g1"))
+
+    def mood_at(days_ago, hour, emotion, status):
+        created_at = datetime.combine(today - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=hour)
+        db.add(EmotionStatusLog(user_id=1, emotion=emotion, status=status, created_at=created_at))
+
+    mood_at(6, 9, "GOOD", "FREE")
+    mood_at(4, 9, "BAD", "BUSY")
+    mood_at(4, 20, "NORMAL", "BUSY")  # 그날의 마지막 기록
+    mood_at(0, 9, "GOOD", "BUSY")     # 오늘 기록은 이전 날짜에 영향 없음
+    db.commit()
+
+    moods = PredictionEngine.fetch_moods_by_day(1, db, today - timedelta(days=7), today - timedelta(days=2))
+    assert moods == [
+        ("NORMAL", "FREE"),  # 첫 기록 전: 기본값
+        ("GOOD", "FREE"),
+        ("GOOD", "FREE"),
+        ("NORMAL", "BUSY"),
+        ("NORMAL", "BUSY"),
+        ("NORMAL", "BUSY"),
+    ]
+
+    history = PredictionEngine.user_history(1, db)
+    assert history.through_date == today - timedelta(days=2)
+    days = history.fetch(today - timedelta(days=5), today - timedelta(days=4))
+    assert [(d["emotion"], d["status"]) for d in days] == [("GOOD", "FREE"), ("NORMAL", "BUSY")]
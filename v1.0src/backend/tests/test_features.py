@@ -0,0 +1,44 @@
+# NumPy 피처 인코더(ai_module/features.py) 와 기존 pandas 구현(check_features.py) 의 결과 비교
+import random
+
+import numpy as np
+import pytest
+
+from ai_module.check_features import make_case, process_input_data_pandas
+from ai_module.features import encode_features, encode_features_batch
+
+
+@pytest.fixture(scope="module")
+def cases():
+    rng = random.Random(0)
+    return [make_case(rng) for _ in range(200)]
+
+
+def test_encode_features_matches_pandas(cases):
+    for i, data in enumerate(cases):
+        expected = process_input_data_pandas(data)
+        got = encode_features(data)
+        if expected is None:
+            assert got is None, i
+            continue
+        X_exp, meta_exp = expected
+        X_got, meta_got = got
+        assert X_got.shape == X_exp.shape, i
+        np.testing.assert_allclose(X_got, X_exp, atol=1e-6, err_msg=f"case {i}")
+        assert meta_got == meta_exp, i
+
+
+def test_encode_features_batch_matches_single(cases):
+    X_batch, metas = encode_features_batch(cases)
+    for i, data in enumerate(cases):
+        single = encode_features(data)
+        if single is None:
+            continue
+        X, meta = single
+        np.testing.assert_array_equal(X_batch[i], X[0])
+        assert metas[i] == meta
+
+
+def test_empty_input():
+    assert process_input_data_pandas({"seq_data": []}) is None
+    assert encode_features({"seq_data": []}) is None
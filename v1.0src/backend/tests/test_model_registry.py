@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from ai_module import model_registry
+from ai_module.export_weights import MODEL_PATH
+from ai_module.predictor import resolve_backend
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "REGISTRY_DIR", str(tmp_path))
+    monkeypatch.setattr(model_registry, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(model_registry, "VERSIONS_DIR", str(tmp_path / "versions"))
+    return model_registry
+
+
+def test_npz_precision_from_name():
+    assert model_registry.npz_precision("risk_gru.npz") == "float32"
+    assert model_registry.npz_precision("risk_gru_int8.npz") == "int8"
+    assert model_registry.npz_precision("risk_gru_float16.npz") == "float16"
+
+
+def test_import_exports_configured_npz(registry, monkeypatch):
+    monkeypatch.setattr(registry, "NPZ_NAME", "risk_gru_int8.npz")
+    monkeypatch.setattr(registry, "NPZ_PRECISION", "int8")
+
+    version = registry.import_model(MODEL_PATH)
+    assert sorted(os.listdir(registry.version_dir(version))) == ["risk_gru.keras", "risk_gru.npz", "risk_gru_int8.npz"]
+
+    current, keras_path, npz_path = registry.resolve_current()
+    assert current == version and npz_path.endswith("risk_gru_int8.npz")
+    with np.load(npz_path) as data:
+        assert str(data["precision"]) == "int8"
+    assert resolve_backend("auto", keras_path, npz_path) == "numpy"
+
+
+def test_promote_exports_missing_npz(registry, monkeypatch):
+    version = registry.import_model(MODEL_PATH, promote_now=False)
+
+    # 다른 AI_NPZ_NAME 으로 서빙하는 서버에서 배포 (롤백 등)
+    monkeypatch.setattr(registry, "NPZ_NAME", "risk_gru_float16.npz")
+    monkeypatch.setattr(registry, "NPZ_PRECISION", "float16")
+    registry.promote(version)
+
+    _, keras_path, npz_path = registry.resolve_current()
+    assert os.path.exists(npz_path)
+    assert resolve_backend("auto", keras_path, npz_path) == "numpy"
@@ -0,0 +1,73 @@
+# NumPy 추론 엔진(np_model.py) 과 Keras 모델의 결과 비교
+import numpy as np
+import pytest
+
+from ai_module.export_weights import MODEL_PATH, export, sample_inputs
+from ai_module.np_model import NumpyRiskModel
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    tf = pytest.importorskip("tensorflow")
+    return tf.keras.models.load_model(MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def npz_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("npz")
+
+
+def load(npz_dir, precision):
+    path = str(npz_dir / f"risk_gru_{precision}.npz")
+    export(MODEL_PATH, path, precision)
+    return NumpyRiskModel.load(path)
+
+
+def test_float32_matches_keras(keras_model, npz_dir):
+    model = load(npz_dir, "float32")
+    X = sample_inputs(64, seq_len=model.input_steps)
+    expected = keras_model.predict(X, verbose=0)
+    np.testing.assert_allclose(model.predict(X), expected, atol=1e-4)
+    # 단건 경로도 동일
+    np.testing.assert_allclose(model.predict_on_batch(X[:1]), expected[:1], atol=1e-4)
+
+
+@pytest.mark.parametrize("precision, atol", [("float16", 5e-3), ("int8", 5e-2)])
+def test_low_precision_close_to_keras(keras_model, npz_dir, precision, atol):
+    model = load(npz_dir, precision)
+    assert model.precision == precision
+    X = sample_inputs(64, seq_len=model.input_steps)
+    np.testing.assert_allclose(model.predict(X), keras_model.predict(X, verbose=0), atol=atol)
+
+
+def test_encode_continues_from_state(npz_dir):
+    # encoder 상태에서 이어서 실행한 결과 == 전체 입력을 한 번에 실행한 결과 (encoder_state.py 전제)
+    model = load(npz_dir, "float32")
+    X = sample_inputs(4, seq_len=72)
+    h = model.encode(X[:, :48])
+    np.testing.assert_allclose(model.encode(X[:, 48:], h), model.encode(X), atol=1e-6)
+
+
+def test_resolve_backend_compares_source_digest(tmp_path):
+    import os
+    import shutil
+
+    from ai_module.predictor import resolve_backend
+
+    keras_path = str(tmp_path / "risk_gru.keras")
+    npz_path = str(tmp_path / "risk_gru.npz")
+    shutil.copy(MODEL_PATH, keras_path)
+    assert resolve_backend("auto", keras_path, npz_path) == "keras"
+
+    export(keras_path, npz_path)
+    assert resolve_backend("auto", keras_path, npz_path) == "numpy"
+
+    # checkout / 복사로 .keras 가 더 최신이 되어도 같은 모델이면 numpy
+    os.utime(npz_path, (0, 0))
+    assert resolve_backend("auto", keras_path, npz_path) == "numpy"
+
+    # 다른 모델로 교체되면 keras
+    with open(keras_path, "ab") as f:
+        f.write(b"\0")
+    assert resolve_backend("auto", keras_path, npz_path) == "keras"
+    assert resolve_backend("numpy", keras_path, npz_path) == "numpy"
@@ -0,0 +1,90 @@
+# 업로드별 사전 계산 예약 시각과 cron 단일 실행 Lock
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import app.services.precompute_service as precompute_service
+import app.utils.job_lock as job_lock
+from app.models import AppUsageRaw, DailyPrediction, User
+from app.services.precompute_service import (
+    PRECOMPUTE_ROLLOVER_MINUTE, PRECOMPUTE_SPREAD_MINUTES, PrecomputeService, precompute_rollover,
+)
+from app.utils.job_lock import single_runner
+
+
+class FakeScheduler:
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, func, trigger, **kwargs):
+        self.jobs[kwargs["id"]] = kwargs
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    fake = FakeScheduler()
+    monkeypatch.setattr(precompute_service, "PRECOMPUTE_ENABLED", True)
+    monkeypatch.setattr(precompute_service.SchedulerService, "scheduler", fake)
+    return fake
+
+
+@pytest.fixture
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_lock, "JOB_LOCK_DIR", str(tmp_path))
+    monkeypatch.setattr(job_lock, "JOB_LOCK_MIN_HOLD_SECONDS", 0)
+    return tmp_path
+
+
+def test_todays_upload_schedules_tomorrow_in_night_window(scheduler):
+    today = date.today()
+    tomorrow = today + timedelta(days=1)
+
+    assert PrecomputeService.schedule_for_usage(7, {today}) == [tomorrow]
+    job = scheduler.jobs[f"precompute:7:{tomorrow.isoformat()}"]
+    window_start = datetime.combine(tomorrow, datetime.min.time()) + timedelta(minutes=PRECOMPUTE_ROLLOVER_MINUTE)
+    assert window_start <= job["run_date"] < window_start + timedelta(minutes=PRECOMPUTE_SPREAD_MINUTES)
+
+    # 같은 날의 반복 업로드는 같은 시각, 사용자마다 다른 시각
+    PrecomputeService.schedule_for_usage(7, {today})
+    assert scheduler.jobs[f"precompute:7:{tomorrow.isoformat()}"]["run_date"] == job["run_date"]
+    assert PrecomputeService.night_slot(8, tomorrow) != job["run_date"]
+
+
+def test_yesterdays_upload_schedules_today_after_delay(scheduler):
+    today = date.today()
+    t0 = datetime.now()
+
+    assert PrecomputeService.schedule_for_usage(7, {today - timedelta(days=1)}) == [today]
+    run_date = scheduler.jobs[f"precompute:7:{today.isoformat()}"]["run_date"]
+    assert run_date - t0 < timedelta(seconds=precompute_service.PRECOMPUTE_DELAY_SECONDS + 5)
+
+    # 지난 날짜의 예측은 예약하지 않음
+    assert PrecomputeService.schedule_for_usage(7, {today - timedelta(days=5)}) == []
+
+
+def test_single_runner_lets_one_holder_in(lock_dir, session_factory):
+    bind = session_factory().get_bind()
+    with single_runner("job", bind) as first:
+        with single_runner("job", bind) as second:
+            assert first and not second
+    with single_runner("job", bind) as again:
+        assert again
+
+
+def test_rollover_is_skipped_while_another_worker_runs_it(db, lock_dir):
+    yesterday = date.today() - timedelta(days=1)
+    db.add(User(user_id=1, google_id="g1"))
+    start = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=21)
+    db.add(AppUsageRaw(
+        user_id=1, usage_date=yesterday, slot_index=42, start_time=start, end_time=start + timedelta(minutes=30),
+        package_name="com.instagram.android", category="SNS", duration_ms=1500000,
+    ))
+    db.commit()
+
+    with single_runner("precompute_rollover", db.get_bind()):
+        precompute_rollover()
+    assert db.query(DailyPrediction).count() == 0
+
+    precompute_rollover()
+    assert db.query(DailyPrediction).count() == 1
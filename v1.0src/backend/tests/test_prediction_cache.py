@@ -0,0 +1,50 @@
+import time
+
+from app.services.prediction_cache import PredictionCache
+
+
+def key(user_id, emotion="GOOD", seq=()):
+    return PredictionCache.make_key(user_id, emotion, "FREE", "2026-01-01", list(seq), "v1")
+
+
+def test_key_changes_with_inputs():
+    assert key(1) == key(1)
+    assert key(1) != key(1, emotion="BAD")
+    assert key(1) != key(1, seq=[{"duration_ms": 1}])
+
+
+def test_get_returns_copies():
+    cache = PredictionCache()
+    cache.set(key(1), {"risk_analysis": {"level": "SAFE"}})
+    got = cache.get(key(1))
+    got["risk_analysis"]["level"] = "DANGER"
+    assert cache.get(key(1))["risk_analysis"]["level"] == "SAFE"
+
+
+def test_ttl_and_per_item_ttl():
+    cache = PredictionCache(ttl_seconds=60)
+    cache.set(key(1), "normal")
+    cache.set(key(2), "degraded", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get(key(1)) == "normal"
+    assert cache.get(key(2)) is None
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.set(key(1), 1)
+    cache.set(key(2), 2)
+    cache.get(key(1))
+    cache.set(key(3), 3)
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1)) == 1 and cache.get(key(3)) == 3
+
+
+def test_invalidate_user():
+    cache = PredictionCache()
+    cache.set(key(1), 1)
+    cache.set(key(1, emotion="BAD"), 2)
+    cache.set(key(2), 3)
+    cache.invalidate_user(1)
+    assert cache.get(key(1)) is None and cache.get(key(1, emotion="BAD")) is None
+    assert cache.get(key(2)) == 3
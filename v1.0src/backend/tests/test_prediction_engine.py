@@ -0,0 +1,166 @@
+# 예측 캐시 / daily_predictions 재사용과 무효화
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import AppUsageRaw, DailyPrediction, EmotionStatusLog, PredictionLog, User
+from app.routers.moods import create_mood
+from app.routers.usage import upload_usage_batch
+from app.schemas.moods import MoodCreateRequest
+from app.schemas.usage import UsageDaySchema
+from app.services.prediction_cache import prediction_cache
+from app.services.precompute_service import PrecomputeService
+from app.services.prediction_engine import PredictionEngine
+
+
+@pytest.fixture(autouse=True)
+def no_precompute(monkeypatch):
+    import app.services.precompute_service as precompute_service
+    monkeypatch.setattr(precompute_service, "PRECOMPUTE_ENABLED", False)
+
+
+def seed_user(db, user_id=1, emotion="BAD", status="BUSY", usage_date=None):
+    user = User(user_id=user_id, google_id=f"g{user_id}")
+    db.add(user)
+    db.add(EmotionStatusLog(user_id=user_id, emotion=emotion, status=status,
+                            created_at=datetime.now() - timedelta(days=1)))
+    usage_date = usage_date or date.today() - timedelta(days=1)
+    for slot in (2, 20, 40, 44):
+        start = datetime.combine(usage_date, datetime.min.time()) + timedelta(minutes=30 * slot)
+        db.add(AppUsageRaw(
+            user_id=user_id, usage_date=usage_date, slot_index=slot, start_time=start,
+            end_time=start + timedelta(minutes=30), package_name="com.instagram.android",
+            category="SNS", duration_ms=1500000,
+        ))
+    db.commit()
+    return user
+
+
+def log_count(db, user_id=1):
+    return db.query(PredictionLog).filter(PredictionLog.user_id == user_id).count()
+
+
+def test_prediction_is_materialized_and_reused(db):
+    user = seed_user(db)
+
+    first = PredictionEngine.predict(user, db)
+    assert not first["degraded"]
+    assert db.query(DailyPrediction).count() == 1
+    assert log_count(db) == 1
+
+    # 메모리 캐시 적중
+    assert PredictionEngine.predict(user, db)["risk_analysis"] == first["risk_analysis"]
+    # daily_predictions 적중 (다른 워커 / 재시작 후)
+    prediction_cache.clear()
+    assert PredictionEngine.predict(user, db)["risk_analysis"] == first["risk_analysis"]
+    assert log_count(db) == 1
+
+
+def test_usage_upload_invalidates_prediction(db):
+    user = seed_user(db)
+    first = PredictionEngine.predict(user, db)
+    assert db.query(DailyPrediction).count() == 1
+
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    upload_usage_batch(
+        [UsageDaySchema(usage_date=yesterday, time_slot="21:00", package_data={"com.nexon.game": 1700000})],
+        db, user,
+    )
+
+    # 바뀐 날짜를 입력으로 쓰는 행 / 캐시는 제거됨
+    assert db.query(DailyPrediction).count() == 0
+
+    second = PredictionEngine.predict(user, db)
+    assert log_count(db) == 2
+    row = db.query(DailyPrediction).one()
+    seq = PredictionEngine.fetch_recent_usage(user.user_id, db)
+    assert row.input_digest == prediction_cache.input_digest(seq)
+    assert second["analysis_date"] == first["analysis_date"]
+
+
+def test_row_with_stale_digest_is_not_served(db):
+    # 업로드 전에 사용 기록을 읽은 계산이 무효화 뒤에 행을 저장한 경우
+    user = seed_user(db)
+    PredictionEngine.predict(user, db)
+    row = db.query(DailyPrediction).one()
+    row.input_digest = "stale"
+    db.commit()
+    prediction_cache.clear()
+
+    PredictionEngine.predict(user, db)
+    assert log_count(db) == 2
+    assert db.query(DailyPrediction).one().input_digest != "stale"
+
+
+def test_mood_change_invalidates_prediction(db, monkeypatch):
+    import app.services.precompute_service as precompute_service
+    monkeypatch.setattr(precompute_service, "PRECOMPUTE_ENABLED", True)
+    scheduled = []
+    monkeypatch.setattr(PrecomputeService, "schedule", lambda user_id, d, **kw: scheduled.append((user_id, d)))
+
+    user = seed_user(db, emotion="BAD", status="BUSY")
+    PredictionEngine.predict(user, db)
+    assert db.query(DailyPrediction).count() == 1
+
+    create_mood(MoodCreateRequest(emotion="GOOD", status="FREE"), db, user)
+    assert db.query(DailyPrediction).count() == 0
+    assert prediction_cache.stats()["size"] == 0
+    assert scheduled == [(user.user_id, date.today())]
+
+    PredictionEngine.predict(user, db)
+    row = db.query(DailyPrediction).one()
+    assert (row.input_emotion, row.input_status) == ("GOOD", "FREE")
+
+
+def test_batch_reads_rows_for_its_prediction_date(db):
+    # 내일 예측 (오늘 사용 기록 입력) 이 저장되어 있으면 같은 날짜의 배치는 다시 계산하지 않음
+    tomorrow = date.today() + timedelta(days=1)
+    user = seed_user(db, usage_date=date.today())
+    first = PredictionEngine.predict(user, db, prediction_date=tomorrow)
+    assert db.query(DailyPrediction).one().prediction_date == tomorrow
+    prediction_cache.clear()
+
+    results = PredictionEngine.predict_batch([user], db, prediction_date=tomorrow)
+    assert results[user.user_id]["risk_analysis"] == first["risk_analysis"]
+    assert log_count(db) == 1
+
+
+@pytest.fixture
+def small_gate(monkeypatch):
+    import app.services.prediction_engine as prediction_engine
+    from app.utils.admission import AdmissionGate
+    gate = AdmissionGate(max_concurrency=1, max_queue=0, max_wait_ms=2000)
+    monkeypatch.setattr(prediction_engine, "prediction_admission", gate)
+    return gate
+
+
+def test_full_gate_rejects_before_submit(db, small_gate):
+    from app.services.prediction_engine import prediction_flights
+    from app.utils.admission import AdmissionRejected
+    user = seed_user(db)
+
+    small_gate.acquire()
+    leaders = prediction_flights.stats()["leaders"]
+    try:
+        with pytest.raises(AdmissionRejected):
+            PredictionEngine.predict(user, db, budget_ms=800, admission=True)
+    finally:
+        small_gate.release()
+
+    # executor 에 넘기지 않고 요청 스레드에서 바로 거절
+    assert prediction_flights.stats()["leaders"] == leaders
+    assert small_gate.stats()["rejected_queue_full"] == 1
+    assert db.query(DailyPrediction).count() == 0
+
+
+def test_admitted_prediction_releases_slot(db, small_gate):
+    user = seed_user(db)
+    result = PredictionEngine.predict(user, db, budget_ms=5000, admission=True)
+    assert not result["degraded"]
+    # 자리는 계산 Future 의 완료 콜백에서 반납 (결과를 받은 직후일 수 있으므로 잠시 대기)
+    deadline = time.monotonic() + 1
+    while small_gate.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert small_gate.stats()["in_flight"] == 0
+    assert small_gate.stats()["admitted"] == 1
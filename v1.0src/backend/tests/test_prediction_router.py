@@ -0,0 +1,74 @@
+# /api/prediction/today 과부하 응답 (503 + Retry-After) 과 /metrics 대기열 깊이
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.models import AppUsageRaw, EmotionStatusLog, User
+from app.routers.prediction import predict_today
+from app.utils.admission import AdmissionGate
+
+
+@pytest.fixture
+def small_gate(monkeypatch):
+    import app.main as main
+    import app.services.prediction_engine as prediction_engine
+    gate = AdmissionGate(max_concurrency=1, max_queue=1, max_wait_ms=2000)
+    monkeypatch.setattr(prediction_engine, "prediction_admission", gate)
+    monkeypatch.setattr(main, "prediction_admission", gate)
+    return gate
+
+
+def seed_user(db, user_id=1):
+    user = User(user_id=user_id, google_id=f"g{user_id}")
+    db.add(user)
+    db.add(EmotionStatusLog(user_id=user_id, emotion="BAD", status="BUSY",
+                            created_at=datetime.now() - timedelta(days=1)))
+    usage_date = date.today() - timedelta(days=1)
+    start = datetime.combine(usage_date, datetime.min.time()) + timedelta(hours=21)
+    db.add(AppUsageRaw(
+        user_id=user_id, usage_date=usage_date, slot_index=42, start_time=start,
+        end_time=start + timedelta(minutes=30), package_name="com.instagram.android",
+        category="SNS", duration_ms=1500000,
+    ))
+    db.commit()
+    return user
+
+
+def pass_through(gate):
+    gate.acquire()
+    gate.release()
+
+
+def wait_for_queue(gate, depth):
+    deadline = time.monotonic() + 1
+    while gate.stats()["queue_depth"] < depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_today_returns_503_when_gate_is_saturated(db, small_gate):
+    from app.main import metrics
+    user = seed_user(db)
+
+    # 실행 자리 1 + 대기열 1 을 모두 채움
+    small_gate.acquire()
+    waiter = threading.Thread(target=pass_through, args=(small_gate,))
+    waiter.start()
+    try:
+        wait_for_queue(small_gate, 1)
+        assert metrics()["prediction_admission"]["queue_depth"] == 1
+
+        t0 = time.perf_counter()
+        with pytest.raises(HTTPException) as e:
+            predict_today(Response(), db, user)
+        # 예산(800 ms)을 기다리지 않고 바로 거절
+        assert time.perf_counter() - t0 < 0.5
+    finally:
+        small_gate.release()
+        waiter.join()
+
+    assert e.value.status_code == 503
+    assert int(e.value.headers["Retry-After"]) > 0
+    assert small_gate.stats()["rejected_queue_full"] == 1
@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_do_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"value": 42}
+
+    results = []
+
+    def call():
+        results.append(flights.do("k", compute))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=call) for _ in range(5)]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 5
+    assert all(result == {"value": 42} for result, _ in results)
+    # 결과는 요청마다 복사본
+    assert len({id(result) for result, _ in results}) == 6
+    assert flights.stats() == {"leaders": 1, "shared": 5, "in_flight": 0}
+
+
+def test_do_shares_exceptions_and_releases_key():
+    flights = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flights.do("k", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(1)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 2
+    # 실패 후에는 다시 실행됨
+    assert flights.do("k", lambda: 1) == (1, False)
+
+
+def test_submit_shares_future_until_done():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first, shared_first = flights.submit("k", compute, executor)
+        second, shared_second = flights.submit("k", compute, executor)
+        assert (shared_first, shared_second) == (False, True)
+        assert first is second
+
+        # 기다리던 쪽이 포기해도 계산은 계속 진행
+        with pytest.raises(TimeoutError):
+            first.result(0.05)
+        release.set()
+        assert first.result(1) == "done"
+
+        # 완료되면 키가 제거되어 다음 호출은 새로 실행
+        time.sleep(0.01)
+        third, shared_third = flights.submit("k", compute, executor)
+        assert third.result(1) == "done" and not shared_third
+    assert len(calls) == 2
@@ -0,0 +1,53 @@
+# AI_ENGINE_MODE=pool: 워커 프로세스 풀 추론 결과 == in-process 추론 결과
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from ai_module.check_features import make_case
+from ai_module.export_weights import sample_inputs
+from ai_module.predictor import PoolPredictor, Predictor
+from ai_module.worker_pool import PredictorPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PredictorPool(size=2, slot_rows=16)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def test_run_splits_batches_larger_than_slot(pool):
+    X = sample_inputs(40)
+    out, version = pool.run(X)
+    expected = Predictor(window_ms=0).predict_tensor(X)
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+    assert version is not None
+
+
+def test_single_requests_are_stacked_into_worker_slot(pool, monkeypatch):
+    predictor = PoolPredictor(pool=pool, window_ms=20, max_batch_size=8)
+    # 단건 요청의 배치는 pool.run (중간 배열 복사) 을 거치지 않음
+    monkeypatch.setattr(pool, "run", lambda X: pytest.fail("batch was stacked outside the worker slot"))
+
+    rng = random.Random(1)
+    cases = [make_case(rng) for _ in range(16)]
+    results = [None] * len(cases)
+
+    def call(i):
+        results[i] = predictor.predict(cases[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(cases))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    reference = Predictor(window_ms=0)
+    for got, data in zip(results, cases):
+        expected = reference.predict(data)
+        assert got["risk_analysis"]["level"] == expected["risk_analysis"]["level"]
+        np.testing.assert_allclose(got["hourly_forecast"], expected["hourly_forecast"], atol=1e-5)
+    assert predictor.batcher.stats()["batches"] < len(cases)